@@ -0,0 +1,288 @@
+# Script: analyze_audio.py
+# Requisitos: pip install pyannote.audio openai-whisper pydub torch torchaudio python-dotenv numpy
+# Descripción: Diarización (split_audios.py) y transcripción (generate_subtitles.py) en una
+#              sola pasada: el .m4a se decodifica una vez a memoria compartida y pyannote y
+#              Whisper corren al mismo tiempo en dos procesos que leen ese mismo buffer, con
+#              los hilos de CPU repartidos entre ambos para no sobresuscribir la máquina.
+#              Genera exactamente los mismos archivos que los dos scripts por separado
+
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+import warnings
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+
+import run_log
+import profiling
+import split_audios
+import generate_subtitles
+import inference_runtime
+from smart_render import ffmpeg_binary
+
+# Ignorar warnings innecesarios
+warnings.filterwarnings("ignore")
+
+# --- CONFIGURACIÓN ---
+WHISPER_SAMPLE_RATE = 16000  # Whisper solo acepta mono a 16 kHz
+MAX_CHANNELS = 2             # Las pistas de HeyGen conservan el estéreo del original
+WHISPER_THREAD_SHARE = 0.5   # Parte de los núcleos para Whisper (el resto para pyannote)
+DECODE_CHUNK_BYTES = 1 << 20
+
+def balance_threads(cores, whisper_share=WHISPER_THREAD_SHARE):
+    """
+    Reparte los núcleos entre los dos modelos para que juntos usen toda la CPU
+    sin pedir más hilos de los que hay
+
+    Args:
+        cores: Núcleos disponibles
+        whisper_share: Fracción para Whisper (0-1)
+
+    Returns:
+        dict: {'diarization': hilos, 'whisper': hilos}
+    """
+    if cores < 2:
+        return {'diarization': 1, 'whisper': 1}
+    whisper = min(cores - 1, max(1, round(cores * whisper_share)))
+    return {'diarization': cores - whisper, 'whisper': whisper}
+
+def probe_audio(input_file):
+    """
+    Duración, frecuencia de muestreo y canales del primer stream de audio
+    (de la salida de `ffmpeg -i`, imageio-ffmpeg no incluye ffprobe)
+
+    Returns:
+        dict: {'duration', 'sample_rate', 'channels'}
+    """
+    result = subprocess.run([ffmpeg_binary(), '-hide_banner', '-i', input_file],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = next((l for l in result.stderr.splitlines() if 'Audio:' in l), '')
+    if not line:
+        raise RuntimeError(f"No se encontró stream de audio en {input_file}")
+
+    duration = re.search(r'Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)', result.stderr)
+    rate = re.search(r'(\d+)\s*Hz', line)
+    layout = re.search(r'Hz,\s*([^,]+)', line)
+    layout = layout.group(1).strip() if layout else 'stereo'
+    channels = re.match(r'(\d+)\s*channels', layout)
+
+    return {
+        'duration': (int(duration.group(1)) * 3600 + int(duration.group(2)) * 60
+                     + float(duration.group(3))) if duration else 0.0,
+        'sample_rate': int(rate.group(1)) if rate else 44100,
+        'channels': int(channels.group(1)) if channels else (1 if layout == 'mono' else 2)
+    }
+
+def decode_to_shared_memory(input_file):
+    """
+    Decodifica el audio una sola vez a float32 intercalado dentro de un bloque de
+    memoria compartida (ffmpeg escribe directo en el buffer, sin copias intermedias)
+
+    Returns:
+        tuple: (SharedMemory, info) con info = {'frames', 'sample_rate', 'channels'}
+    """
+    probe = probe_audio(input_file)
+    channels = min(probe['channels'], MAX_CHANNELS)
+    frame_bytes = 4 * channels
+    # La duración del contenedor puede quedarse corta por unos frames: margen de 1%+1s
+    capacity = int((probe['duration'] * 1.01 + 1) * probe['sample_rate']) * frame_bytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(capacity, frame_bytes))
+    cmd = [ffmpeg_binary(), '-v', 'error', '-i', input_file, '-vn',
+           '-ac', str(channels), '-ar', str(probe['sample_rate']),
+           '-f', 'f32le', '-acodec', 'pcm_f32le', 'pipe:1']
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    written = 0
+    try:
+        while True:
+            if written + DECODE_CHUNK_BYTES > shm.size:
+                # Duración mal informada: crecer el bloque y copiar lo ya decodificado
+                grown = shared_memory.SharedMemory(create=True, size=shm.size * 2)
+                grown.buf[:written] = shm.buf[:written]
+                shm.close()
+                shm.unlink()
+                shm = grown
+            read = process.stdout.readinto(shm.buf[written:written + DECODE_CHUNK_BYTES])
+            if not read:
+                break
+            written += read
+        _, stderr = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg falló: {stderr.decode(errors='replace').strip()[-300:]}")
+    except BaseException:
+        process.kill()
+        shm.close()
+        shm.unlink()
+        raise
+
+    return shm, {'frames': written // frame_bytes, 'sample_rate': probe['sample_rate'], 'channels': channels}
+
+def attach_samples(shm_name, info):
+    """
+    Abre el bloque compartido desde otro proceso (sin copiarlo)
+
+    Returns:
+        tuple: (SharedMemory, np.ndarray float32 (frames, canales) sobre el buffer)
+    """
+    # Los workers (spawn) comparten el resource tracker del proceso principal, que es
+    # el dueño del bloque y el único que lo borra
+    shm = shared_memory.SharedMemory(name=shm_name)
+    samples = np.ndarray((info['frames'], info['channels']), dtype=np.float32, buffer=shm.buf)
+    return shm, samples
+
+def _diarization_worker(shm_name, info, threads):
+    # Antes de cargar el modelo: los cargadores ya no cambian los hilos de este proceso
+    inference_runtime.configure_torch(threads, 1)
+    import torch
+    shm, samples = attach_samples(shm_name, info)
+    try:
+        started = time.time()
+        waveform = torch.from_numpy(samples.mean(axis=1, dtype=np.float32)).unsqueeze(0)
+        pipeline = split_audios.load_diarization_pipeline()
+        turns = split_audios.run_diarization(pipeline, {'waveform': waveform, 'sample_rate': info['sample_rate']})
+        return {'turns': turns, 'started_at': started, 'elapsed': time.time() - started, 'pid': os.getpid()}
+    finally:
+        del samples
+        shm.close()
+
+def _whisper_worker(shm_name, info, threads):
+    inference_runtime.configure_torch(threads, 1)
+    import torch
+    import torchaudio
+    shm, samples = attach_samples(shm_name, info)
+    try:
+        started = time.time()
+        mono = torch.from_numpy(samples.mean(axis=1, dtype=np.float32))
+        if info['sample_rate'] != WHISPER_SAMPLE_RATE:
+            mono = torchaudio.functional.resample(mono, info['sample_rate'], WHISPER_SAMPLE_RATE)
+        model = generate_subtitles.load_whisper_model()
+        result = generate_subtitles.transcribe(model, mono.numpy())
+        return {'segments': result['segments'], 'language': result.get('language'),
+                'started_at': started, 'elapsed': time.time() - started, 'pid': os.getpid()}
+    finally:
+        del samples
+        shm.close()
+
+def save_transcription(segments, input_file):
+    """
+    Escribe el .srt y el .txt en las mismas rutas que generate_subtitles.py
+
+    Returns:
+        tuple: (ruta .srt, ruta .txt)
+    """
+    filename = os.path.splitext(os.path.basename(input_file))[0]
+    output_srt = os.path.join(generate_subtitles.TRANSCRIPTIONS_DIR, f"{filename}.srt")
+    output_txt = os.path.join(generate_subtitles.TRANSCRIPTIONS_DIR, f"{filename}.txt")
+    os.makedirs(generate_subtitles.TRANSCRIPTIONS_DIR, exist_ok=True)
+    generate_subtitles.generate_srt(segments, output_srt)
+    generate_subtitles.generate_plain_text(segments, output_txt)
+    return output_srt, output_txt
+
+def main():
+    parser = argparse.ArgumentParser(description="Diarización + transcripción en paralelo desde un solo decode del audio")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="Núcleos a repartir entre los dos modelos (por defecto: todos los disponibles)")
+    parser.add_argument('--whisper-share', type=float, default=WHISPER_THREAD_SHARE,
+                        help=f"Fracción de los núcleos para Whisper (por defecto: {WHISPER_THREAD_SHARE})")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('analyze_audio', args)
+    run_log.start('analyze_audio')
+
+    print("=" * 60)
+    print("  ANÁLISIS DE AUDIO COMBINADO - AI PODCAST PRODUCER")
+    print("=" * 60)
+
+    if not split_audios.HF_TOKEN:
+        print("❌ ERROR: No se encontró la variable HF_TOKEN.")
+        print("Asegúrate de tener un archivo '.env' con la línea: HF_TOKEN=hf_tu_token_aqui")
+        return 1
+
+    input_file = split_audios.find_input_file()
+    if not input_file:
+        return 1
+    run_log.set_episode(os.path.splitext(os.path.basename(input_file))[0])
+    run_log.add_input(input_file)
+
+    print("\n--> Paso 1/3: Decodificando audio a memoria compartida...")
+    profiling.phase('decode')
+    started = time.time()
+    try:
+        shm, info = decode_to_shared_memory(input_file)
+    except Exception as e:
+        print(f"❌ Error al leer el audio: {e}")
+        return 1
+    size_mb = info['frames'] * info['channels'] * 4 / (1024 * 1024)
+    print(f"✓ {info['frames'] / info['sample_rate']:.1f}s de audio, {info['sample_rate']} Hz, "
+          f"{info['channels']} canal(es) ({size_mb:.0f} MB) en {time.time() - started:.1f}s")
+
+    threads = balance_threads(max(1, args.threads or inference_runtime.available_cores()), args.whisper_share)
+    print(f"\n--> Paso 2/3: Diarización y transcripción en paralelo...")
+    profiling.phase('parallel_inference')
+    print(f"    Hilos: pyannote={threads['diarization']}, Whisper={threads['whisper']} "
+          f"(modelo '{generate_subtitles.WHISPER_MODEL}')")
+
+    failed = False
+    try:
+        # Un proceso nuevo por modelo (spawn): cada uno fija sus hilos antes de cargar torch
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as diarization_pool, \
+             ProcessPoolExecutor(max_workers=1, mp_context=context) as whisper_pool:
+            futures = {
+                diarization_pool.submit(_diarization_worker, shm.name, info, threads['diarization']): 'diarization',
+                whisper_pool.submit(_whisper_worker, shm.name, info, threads['whisper']): 'whisper'
+            }
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        label = "la diarización" if task == 'diarization' else "la transcripción"
+                        print(f"\n❌ ERROR durante {label}: {e}")
+                        failed = True
+                        continue
+
+                    profiling.add_event(task, result['started_at'], result['elapsed'], pid=result['pid'])
+                    if task == 'diarization':
+                        print(f"\n✓ Diarización completada en {result['elapsed']:.1f}s")
+                        # Las pistas salen del mismo buffer: sin volver a decodificar
+                        samples = np.ndarray((info['frames'], info['channels']), dtype=np.float32, buffer=shm.buf)
+                        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+                        del samples
+                        split_audios.save_outputs(pcm, info['sample_rate'], result['turns'])
+                        profiling.phase('parallel_inference')
+                    else:
+                        segments = result['segments']
+                        print(f"\n✓ Transcripción completada en {result['elapsed']:.1f}s: {len(segments)} segmentos")
+                        with profiling.span('save_transcription', segments=len(segments)):
+                            output_srt, output_txt = save_transcription(segments, input_file)
+                        run_log.count(transcript_segments=len(segments))
+                        run_log.add_output(output_srt)
+                        run_log.add_output(output_txt)
+                        print(f"✓ {output_srt}")
+                        print(f"✓ {output_txt}")
+    finally:
+        profiling.phase(None)
+        shm.close()
+        shm.unlink()
+
+    if failed:
+        return 1
+
+    print("\n--> Paso 3/3: Listo")
+    split_audios.print_final_summary()
+    print("   4. transcriptions/*.srt y *.txt (Subtítulos y análisis de capítulos)")
+    print(f"\n⏱️  Tiempo total: {time.time() - started:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_log.finish(main()))
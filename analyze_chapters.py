@@ -3,12 +3,20 @@
 # Descripción: Analiza la transcripción del podcast para generar capítulos, descripción y thumbnail prompt
 
 import os
+import sys
 import json
 import csv
+import argparse
 import warnings
+import numpy as np
 from datetime import timedelta
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_stream import stream_json_completion, PartialResultWriter
+from openai_client import print_metrics_summary
+from clip_ranking import load_or_rank_candidates
+from transcript import parse_srt
+import profiling
+import run_log
 
 # Ignorar warnings innecesarios
 warnings.filterwarnings("ignore")
@@ -21,32 +29,9 @@ OUTPUT_DIR = "./output"
 TRANSCRIPTIONS_DIR = "./output/transcriptions"
 METADATA_DIR = "./output/metadata"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-def parse_srt(srt_path):
-    """
-    Lee un archivo .srt y extrae la transcripción completa con timestamps
-    """
-    with open(srt_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Parsear bloques de subtítulos
-    blocks = content.strip().split('\n\n')
-    transcription = []
-
-    for block in blocks:
-        lines = block.split('\n')
-        if len(lines) >= 3:
-            # Línea 1: número (ignorar)
-            # Línea 2: timestamp
-            timestamp = lines[1].split(' --> ')[0]
-            # Línea 3+: texto
-            text = ' '.join(lines[2:])
-            transcription.append({
-                'timestamp': timestamp,
-                'text': text
-            })
-
-    return transcription
+EDITING_GUIDE_PATH = "./output/editing_guide.json"
+# Pre-selección local de clips virales (CLIP_PRESELECTION=0 deja que la IA los busque en todo el episodio)
+CLIP_PRESELECTION = os.getenv("CLIP_PRESELECTION", "1") != "0"
 
 def format_transcription_for_ai(transcription):
     """
@@ -154,28 +139,118 @@ def get_episode_duration(transcription):
     last_timestamp = transcription[-1]['timestamp']
     return timestamp_to_youtube_format(last_timestamp)
 
+def timestamps_to_seconds_array(timestamps):
+    """
+    Convierte una lista de timestamps a un arreglo numérico (se parsea una sola vez)
+
+    Args:
+        timestamps: Lista de timestamps ("MM:SS", "HH:MM:SS" o "HH:MM:SS,mmm")
+
+    Returns:
+        np.ndarray: Segundos totales (int64)
+    """
+    return np.fromiter((timestamp_to_seconds(t) for t in timestamps), dtype=np.int64, count=len(timestamps))
+
+def clip_bounds(clips):
+    """
+    Extrae los inicios y fines de una lista de clips como arreglos numéricos
+
+    Args:
+        clips: Lista de clips con 'start' y 'end'
+
+    Returns:
+        tuple: (starts, ends) como np.ndarray de segundos
+    """
+    starts = timestamps_to_seconds_array([clip['start'] for clip in clips])
+    ends = timestamps_to_seconds_array([clip['end'] for clip in clips])
+    return starts, ends
+
+def assign_clips_to_chapters(chapter_starts, clip_starts):
+    """
+    Asigna cada clip al capítulo que lo contiene (búsqueda binaria con searchsorted)
+
+    Args:
+        chapter_starts: Inicio de cada capítulo en segundos (en el orden original)
+        clip_starts: Inicio de cada clip en segundos
+
+    Returns:
+        np.ndarray: Índice del capítulo (orden original) para cada clip
+    """
+    chapter_starts = np.asarray(chapter_starts)
+    if chapter_starts.size == 0:
+        return np.zeros(len(clip_starts), dtype=np.int64)
+
+    order = np.argsort(chapter_starts, kind='stable')
+    positions = np.searchsorted(chapter_starts[order], clip_starts, side='right') - 1
+    return order[np.clip(positions, 0, None)]
+
 def calculate_content_density(duration_seconds, num_viral_clips):
     """
     Calcula densidad de contenido para metadata
 
+    Acepta escalares o arreglos (ej: todos los episodios de un lote a la vez).
+
     Args:
         duration_seconds: Duración total en segundos
         num_viral_clips: Número de clips virales generados
 
     Returns:
-        str: 'low', 'medium', 'high'
+        str: 'low', 'medium', 'high' (o lista de ellos si la entrada es un arreglo)
     """
-    if duration_seconds == 0:
-        return 'low'
+    duration = np.asarray(duration_seconds, dtype=np.float64)
+    clips = np.asarray(num_viral_clips, dtype=np.float64)
 
-    clips_per_minute = num_viral_clips / (duration_seconds / 60)
+    minutes = np.where(duration > 0, duration / 60, 1.0)
+    clips_per_minute = np.where(duration > 0, clips / minutes, 0.0)
 
-    if clips_per_minute >= 0.5:
-        return 'high'
-    elif clips_per_minute >= 0.3:
-        return 'medium'
-    else:
-        return 'low'
+    density = np.select(
+        [clips_per_minute >= 0.5, clips_per_minute >= 0.3],
+        ['high', 'medium'],
+        default='low'
+    )
+
+    if density.ndim == 0:
+        return str(density)
+    return density.tolist()
+
+def find_coverage_gaps(starts, ends, total_episode_seconds, tolerance=5):
+    """
+    Encuentra los huecos no cubiertos por un conjunto de intervalos
+
+    Los intervalos se ordenan una vez y se unen con el fin acumulado
+    (np.maximum.accumulate); los gaps salen de comparar cada inicio con
+    el fin acumulado anterior.
+
+    Args:
+        starts: Inicios en segundos
+        ends: Fines en segundos
+        total_episode_seconds: Duración total del episodio
+        tolerance: Segundos tolerados sin cubrir al final del episodio
+
+    Returns:
+        list: Gaps como tuplas (inicio, fin) en segundos
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    if starts.size == 0:
+        return []
+
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    covered_end = np.maximum.accumulate(ends[order])
+
+    gap_mask = starts[1:] > covered_end[:-1]
+    gaps = list(zip(covered_end[:-1][gap_mask].tolist(), starts[1:][gap_mask].tolist()))
+
+    # Verificar que empiece en 00:00
+    if starts[0] > 0:
+        gaps.insert(0, (0, int(starts[0])))
+
+    # Verificar que termine al final del episodio
+    if covered_end[-1] < total_episode_seconds - tolerance:
+        gaps.append((int(covered_end[-1]), int(total_episode_seconds)))
+
+    return gaps
 
 def validate_chapter_coverage(chapter_clips, total_episode_seconds):
     """
@@ -191,48 +266,39 @@ def validate_chapter_coverage(chapter_clips, total_episode_seconds):
     if not chapter_clips:
         return []
 
-    # Ordenar por start
-    sorted_clips = sorted(chapter_clips, key=lambda x: timestamp_to_seconds(x['start']))
-
-    gaps = []
-
-    # Verificar que empiece en 00:00
-    first_start = timestamp_to_seconds(sorted_clips[0]['start'])
-    if first_start > 0:
-        gaps.append({
-            'start': '00:00',
-            'end': seconds_to_timestamp(first_start)
-        })
-
-    # Verificar gaps entre clips
-    for i in range(len(sorted_clips) - 1):
-        current_end = timestamp_to_seconds(sorted_clips[i]['end'])
-        next_start = timestamp_to_seconds(sorted_clips[i + 1]['start'])
+    starts, ends = clip_bounds(chapter_clips)
+    return format_gaps(find_coverage_gaps(starts, ends, total_episode_seconds))
 
-        if next_start > current_end:
-            gaps.append({
-                'start': seconds_to_timestamp(current_end),
-                'end': seconds_to_timestamp(next_start)
-            })
+def format_gaps(gaps):
+    """
+    Convierte gaps en segundos a timestamps legibles
 
-    # Verificar que termine al final del episodio
-    last_end = timestamp_to_seconds(sorted_clips[-1]['end'])
-    if last_end < total_episode_seconds - 5:  # Tolerancia de 5 segundos
-        gaps.append({
-            'start': seconds_to_timestamp(last_end),
-            'end': seconds_to_timestamp(total_episode_seconds)
-        })
+    Args:
+        gaps: Lista de tuplas (inicio, fin) en segundos
 
-    return gaps
+    Returns:
+        list: Lista de gaps [{'start': 'MM:SS', 'end': 'MM:SS'}]
+    """
+    return [
+        {
+            'start': '00:00' if gap_start == 0 else seconds_to_timestamp(gap_start),
+            'end': seconds_to_timestamp(gap_end)
+        }
+        for gap_start, gap_end in gaps
+    ]
 
 def enhance_analysis_with_metadata(analysis, transcription):
     """
     Enriquece el análisis con metadata calculada
     - Agrega end_timestamp a chapters
     - Agrega duration_seconds a todos los clips
+    - Asigna cada clip viral a su capítulo (chapter_index)
     - Valida que no haya gaps en chapter_clips
     - Calcula episode_metadata
 
+    Los timestamps se parsean una sola vez a arreglos numéricos y el resto de
+    cálculos se hace sobre esos arreglos.
+
     Args:
         analysis: Diccionario con el análisis de la IA
         transcription: Lista de entries de transcripción
@@ -254,21 +320,26 @@ def enhance_analysis_with_metadata(analysis, transcription):
             # Último capítulo termina al final del episodio
             chapter['end_timestamp'] = episode_duration
 
-    # 3. Enriquecer viral_clips con duration_seconds y type
+    chapter_starts = timestamps_to_seconds_array([chapter['timestamp'] for chapter in chapters])
+
+    # 3. Enriquecer viral_clips con duration_seconds, type y chapter_index
     viral_clips = analysis.get('viral_clips', [])
-    for clip in viral_clips:
-        start_sec = timestamp_to_seconds(clip['start'])
-        end_sec = timestamp_to_seconds(clip['end'])
-        clip['duration_seconds'] = end_sec - start_sec
+    viral_starts, viral_ends = clip_bounds(viral_clips)
+    viral_durations = (viral_ends - viral_starts).tolist()
+    viral_chapters = assign_clips_to_chapters(chapter_starts, viral_starts).tolist()
+    for clip, duration, chapter_index in zip(viral_clips, viral_durations, viral_chapters):
+        clip['duration_seconds'] = duration
         if 'type' not in clip:
             clip['type'] = 'short'
+        if chapters and 'chapter_index' not in clip:
+            clip['chapter_index'] = chapter_index
 
     # 4. Enriquecer chapter_clips
     chapter_clips = analysis.get('chapter_clips', [])
-    for i, clip in enumerate(chapter_clips):
-        start_sec = timestamp_to_seconds(clip['start'])
-        end_sec = timestamp_to_seconds(clip['end'])
-        clip['duration_seconds'] = end_sec - start_sec
+    chapter_clip_starts, chapter_clip_ends = clip_bounds(chapter_clips)
+    chapter_durations = (chapter_clip_ends - chapter_clip_starts).tolist()
+    for i, (clip, duration) in enumerate(zip(chapter_clips, chapter_durations)):
+        clip['duration_seconds'] = duration
         if 'type' not in clip:
             clip['type'] = 'long'
         if 'chapter_index' not in clip:
@@ -276,7 +347,7 @@ def enhance_analysis_with_metadata(analysis, transcription):
 
     # 5. Validar cobertura completa (chapter_clips sin gaps)
     if chapter_clips:
-        gaps = validate_chapter_coverage(chapter_clips, total_seconds)
+        gaps = format_gaps(find_coverage_gaps(chapter_clip_starts, chapter_clip_ends, total_seconds))
         if gaps:
             print(f"⚠️  ADVERTENCIA: Se encontraron {len(gaps)} gaps en los chapter_clips")
             for gap in gaps:
@@ -294,15 +365,99 @@ def enhance_analysis_with_metadata(analysis, transcription):
 
     return analysis
 
-def analyze_with_ai(transcription_text, episode_duration):
+def viral_clip_count(episode_seconds):
     """
-    Envía la transcripción a OpenAI GPT-4o-mini para análisis
+    Número de clips virales según la duración del episodio (misma tabla que el prompt)
+
+    Args:
+        episode_seconds: Duración total en segundos
+
+    Returns:
+        int: Cantidad de clips virales a generar
+    """
+    minutes = episode_seconds / 60
+    if minutes < 15:
+        return 5
+    elif minutes < 25:
+        return 7
+    elif minutes < 40:
+        return 10
+    return 14
+
+def format_candidates_for_ai(candidates):
+    """
+    Formatea los candidatos pre-seleccionados para el prompt (solo id y rango: el texto ya está en la transcripción)
+    """
+    return '\n'.join(f"[{c['candidate_id']}] {c['start']} - {c['end']}" for c in candidates)
+
+def merge_viral_candidates(analysis, candidates):
+    """
+    Combina los títulos de la IA con los candidatos locales.
+    Los timestamps y el hook_score vienen siempre del ranking local (deterministas);
+    un candidato que la IA no tituló se conserva con un título provisional.
+
+    Args:
+        analysis: Diccionario con el análisis de la IA
+        candidates: Candidatos de clip_ranking
+
+    Returns:
+        dict: Análisis con viral_clips alineados a los candidatos
+    """
+    titled = {clip.get('candidate_id'): clip for clip in analysis.get('viral_clips', [])}
+    viral_clips = []
+
+    for candidate in candidates:
+        clip = dict(titled.get(candidate['candidate_id']) or {
+            'title': candidate['text'][:60].strip() + '...',
+            'reason': 'Pre-seleccionado localmente (sin título de la IA)'
+        })
+        clip['candidate_id'] = candidate['candidate_id']
+        clip['start'] = candidate['start']
+        clip['end'] = candidate['end']
+        clip['hook_score'] = candidate['hook_score']
+        clip.setdefault('type', 'short')
+        viral_clips.append(clip)
+
+    analysis['viral_clips'] = viral_clips
+    return analysis
+
+def analyze_with_ai(transcription_text, episode_duration, on_element=None, label="analyze_chapters",
+                    candidates=None):
+    """
+    Envía la transcripción a OpenAI GPT-4o-mini para análisis (en modo streaming)
 
     Args:
         transcription_text: Transcripción formateada con timestamps
         episode_duration: Duración total del episodio (ej: "16:45")
+        on_element: Callback on_element(key, element) por cada capítulo/clip completo
+        label: Nombre de la llamada para las métricas (una por episodio en modo batch)
+        candidates: Ventanas pre-seleccionadas por clip_ranking (la IA solo las titula)
     """
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    if candidates:
+        viral_instructions = f"""**CLIPS VIRALES (viral_clips)**:
+- Ya fueron PRE-SELECCIONADOS. NO busques otros momentos.
+- Genera exactamente un viral_clip por cada candidato, con su "candidate_id" y sus timestamps exactos:
+{format_candidates_for_ai(candidates)}
+- Lee el fragmento correspondiente de la transcripción para titularlo
+- Asigna un virality_score (1-10) basado en potencial de engagement"""
+    else:
+        viral_instructions = """**CLIPS VIRALES (viral_clips)**:
+- Duración: 15-60 segundos cada uno
+- Cantidad: Decide dinámicamente según la duración del episodio:
+  * Episodios 10-15 min: 4-6 clips
+  * Episodios 15-25 min: 6-8 clips
+  * Episodios 25-40 min: 8-12 clips
+  * Episodios 40+ min: 12-15 clips
+- Criterios para selección:
+  * Momentos impactantes, sorprendentes o emotivos
+  * Frases memorables o citas destacadas
+  * Datos/estadísticas impresionantes
+  * Historias breves y completas
+  * Humor o anécdotas
+  * Consejos accionables y concretos
+- Cada clip DEBE ser autosuficiente (con contexto completo)
+- Prioriza variedad: diferentes temas y tonos
+- Asigna un virality_score (1-10) basado en potencial de engagement"""
 
     prompt = f"""Eres un experto en análisis de contenido para podcasts, YouTube, y estrategia de redes sociales.
 
@@ -332,23 +487,7 @@ INSTRUCCIONES DETALLADAS:
 - Identifica entre 5-8 capítulos según la duración y densidad del contenido
 - Cada capítulo debe tener un tema coherente y completo
 
-**CLIPS VIRALES (viral_clips)**:
-- Duración: 15-60 segundos cada uno
-- Cantidad: Decide dinámicamente según la duración del episodio:
-  * Episodios 10-15 min: 4-6 clips
-  * Episodios 15-25 min: 6-8 clips
-  * Episodios 25-40 min: 8-12 clips
-  * Episodios 40+ min: 12-15 clips
-- Criterios para selección:
-  * Momentos impactantes, sorprendentes o emotivos
-  * Frases memorables o citas destacadas
-  * Datos/estadísticas impresionantes
-  * Historias breves y completas
-  * Humor o anécdotas
-  * Consejos accionables y concretos
-- Cada clip DEBE ser autosuficiente (con contexto completo)
-- Prioriza variedad: diferentes temas y tonos
-- Asigna un virality_score (1-10) basado en potencial de engagement
+{viral_instructions}
 
 **CLIPS DE CAPÍTULO (chapter_clips)**:
 - Uno por cada capítulo identificado
@@ -438,17 +577,20 @@ IMPORTANTE:
 - Los thumbnail prompts deben ser visuales y específicos"""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        result, info = stream_json_completion(
             messages=[
                 {"role": "system", "content": "Eres un experto en análisis de contenido para podcasts. Siempre respondes con JSON válido."},
                 {"role": "user", "content": prompt}
             ],
+            model="gpt-4o-mini",
             temperature=0.7,
-            response_format={"type": "json_object"}
+            on_element=on_element,
+            label=label
         )
 
-        result = json.loads(response.choices[0].message.content)
+        if result and info['repaired']:
+            print("⚠️  La respuesta llegó incompleta: se recuperó hasta el último elemento completo")
+
         return result
 
     except Exception as e:
@@ -480,7 +622,8 @@ def generate_content_table_csv(analysis, filename_base, episode_duration):
                 'thumbnail_prompt': clip.get('thumbnail_prompt', ''),
                 'type': 'short',
                 'start_seconds': timestamp_to_seconds(clip['start']),
-                'virality_score': clip.get('virality_score', 5)
+                'virality_score': clip.get('virality_score', 5),
+                'hook_score': clip.get('hook_score', 0)
             })
         except Exception as e:
             print(f"⚠️  Clip viral inválido ignorado: {e}")
@@ -497,7 +640,8 @@ def generate_content_table_csv(analysis, filename_base, episode_duration):
                 'thumbnail_prompt': clip.get('thumbnail_prompt', ''),
                 'type': 'long',
                 'start_seconds': timestamp_to_seconds(clip['start']),
-                'virality_score': 0  # Not applicable for long clips
+                'virality_score': 0,  # Not applicable for long clips
+                'hook_score': 0
             })
         except Exception as e:
             print(f"⚠️  Clip de capítulo inválido ignorado: {e}")
@@ -564,8 +708,8 @@ def generate_publication_calendar_csv(all_clips, filename_base, episode_title):
     long_clips = [c for c in all_clips if c['type'] == 'long']
 
     # Ordenar por calidad/relevancia
-    # Para shorts: ordenar por virality_score (mayor primero)
-    short_clips.sort(key=lambda x: x.get('virality_score', 5), reverse=True)
+    # Para shorts: ordenar por virality_score (mayor primero); empates por hook_score local
+    short_clips.sort(key=lambda x: (x.get('virality_score', 5), x.get('hook_score', 0)), reverse=True)
     # Para longs: mantener orden cronológico (ya ordenados por start_seconds)
 
     # Inicializar calendario
@@ -679,41 +823,27 @@ def generate_youtube_description(analysis):
 
     return '\n'.join(lines)
 
-def main():
-    print("=" * 80)
-    print("  ANALIZADOR DE CAPÍTULOS Y METADATA - AI PODCAST PRODUCER")
-    print("=" * 80)
-
-    # 1. Validar API Key
-    if not OPENAI_API_KEY:
-        print("\n❌ ERROR: No se encontró OPENAI_API_KEY en el archivo .env")
-        print("Por favor, agrega la línea: OPENAI_API_KEY=sk-tu_clave_aqui")
-        print("\nPuedes obtener tu API key en: https://platform.openai.com/api-keys")
-        return
-
-    # 2. Buscar archivo .srt en /output/transcriptions
-    print("\n--> Paso 1/5: Buscando archivo de subtítulos...")
-    srt_files = [f for f in os.listdir(TRANSCRIPTIONS_DIR) if f.endswith('.srt') and os.path.isfile(os.path.join(TRANSCRIPTIONS_DIR, f))]
-
-    if len(srt_files) == 0:
-        print("❌ ERROR: No se encontró ningún archivo .srt en /output/transcriptions")
-        print("Por favor, ejecuta primero: python generate_subtitles.py")
-        return
-    elif len(srt_files) > 1:
-        print("⚠️  Se encontraron múltiples archivos .srt:")
-        for idx, file in enumerate(srt_files, 1):
-            print(f"   {idx}. {file}")
-        print(f"\nUsando el más reciente: {srt_files[0]}")
+def process_transcript(srt_path, editing_guide_path=None):
+    """
+    Procesa una transcripción completa: análisis con IA y archivos de metadata
 
-    srt_path = os.path.join(TRANSCRIPTIONS_DIR, srt_files[0])
-    filename_base = os.path.splitext(srt_files[0])[0]
+    Args:
+        srt_path: Ruta al archivo .srt de la transcripción
+        editing_guide_path: editing_guide.json de ESTE episodio, para los cambios de speaker
+                            del ranking de clips (None = sin guía, ej: batch_metadata.py,
+                            donde la guía de /output es solo la del episodio actual)
 
-    print(f"✓ Archivo encontrado: {srt_files[0]}")
+    Returns:
+        bool: True si todos los archivos de metadata se generaron correctamente
+    """
+    filename_base = os.path.splitext(os.path.basename(srt_path))[0]
 
     # 3. Parsear transcripción
     print("\n--> Paso 2/5: Leyendo transcripción...")
+    profiling.phase('read_transcript')
     try:
         transcription = parse_srt(srt_path)
+        run_log.add_input(srt_path)
         total_entries = len(transcription)
         print(f"✓ Se cargaron {total_entries} segmentos de transcripción")
 
@@ -727,10 +857,11 @@ def main():
             episode_seconds = 0
     except Exception as e:
         print(f"❌ ERROR al leer el archivo .srt: {e}")
-        return
+        return False
 
     # 4. Formatear para IA
     print("\n--> Paso 3/5: Preparando análisis con IA...")
+    profiling.phase('prepare')
     transcription_text = format_transcription_for_ai(transcription)
 
     # Calcular tokens aproximados (4 caracteres ≈ 1 token)
@@ -741,23 +872,63 @@ def main():
     print(f"   Tokens estimados: ~{estimated_tokens:,}")
     print(f"   Costo estimado: ~${estimated_cost:.4f} USD")
 
+    # Pre-selección local de clips virales (determinista y cacheada por episodio)
+    candidates = None
+    if CLIP_PRESELECTION and transcription:
+        top_k = viral_clip_count(episode_seconds)
+        cache_path = os.path.join(METADATA_DIR, f"{filename_base}_candidates.json")
+        with profiling.span('rank_candidates', top_k=top_k):
+            candidates, cached = load_or_rank_candidates(
+                cache_path, srt_path, transcription, top_k, editing_guide_path=editing_guide_path
+            )
+        origin = "desde caché" if cached else "calculados localmente"
+        print(f"   Candidatos a clip viral: {len(candidates)} ({origin})")
+
     # 5. Analizar con IA
     print("\n--> Paso 4/5: Analizando contenido con GPT-4o-mini...")
+    profiling.phase('llm_analysis')
     print("   (Esto puede tardar 10-30 segundos dependiendo de la longitud)")
 
-    analysis = analyze_with_ai(transcription_text, episode_duration)
+    # Los capítulos y clips se guardan en disco a medida que llegan del stream
+    os.makedirs(METADATA_DIR, exist_ok=True)
+    partial_path = os.path.join(METADATA_DIR, f"{filename_base}_partial.jsonl")
+    partial_writer = PartialResultWriter(partial_path)
+
+    def on_element(key, element):
+        partial_writer(key, element)
+        if key == 'chapters':
+            print(f"   ✓ Capítulo recibido: {element.get('timestamp', '?')} - {element.get('title', 'Sin título')}")
+
+    try:
+        analysis = analyze_with_ai(transcription_text, episode_duration, on_element=on_element,
+                                   label=f"analyze_chapters:{filename_base}", candidates=candidates)
+    finally:
+        partial_writer.close()
 
     if not analysis:
         print("❌ ERROR: No se pudo completar el análisis")
-        return
+        if partial_writer.count:
+            print(f"   Resultados parciales guardados en: {partial_path}")
+        return False
+
+    # Campos mínimos por si la respuesta fue reparada tras un corte
+    analysis.setdefault('title', filename_base)
+    analysis.setdefault('chapters', [])
+    analysis.setdefault('description', '')
+    analysis.setdefault('thumbnail_prompt', '')
+
+    if candidates:
+        analysis = merge_viral_candidates(analysis, candidates)
 
     print(f"✓ Análisis completado exitosamente")
+    print_metrics_summary(f"analyze_chapters:{filename_base}")
     print(f"   • Título generado: {analysis['title'][:60]}...")
     print(f"   • Capítulos detectados: {len(analysis['chapters'])}")
     print(f"   • Clips sugeridos: {len(analysis.get('clips', []))}")
 
     # 6. Enriquecer análisis con metadata
     print("\n--> Enriqueciendo análisis con metadata...")
+    profiling.phase('enrich')
     analysis = enhance_analysis_with_metadata(analysis, transcription)
     print(f"✓ Metadata agregada")
     print(f"   • Clips virales: {analysis['episode_metadata']['total_viral_clips']}")
@@ -765,6 +936,7 @@ def main():
 
     # 6. Generar archivos de salida
     print("\n--> Paso 5/5: Generando archivos de salida...")
+    profiling.phase('write_outputs')
 
     # Crear directorio metadata si no existe
     os.makedirs(METADATA_DIR, exist_ok=True)
@@ -804,9 +976,18 @@ def main():
         calendar_csv = generate_publication_calendar_csv(all_clips, filename_base, analysis['title'])
         print(f"✓ {calendar_csv}")
 
+        for path in (chapters_path, description_path, metadata_path, content_csv, calendar_csv):
+            run_log.add_output(path)
+        run_log.count(chapters=len(analysis['chapters']), clips=len(all_clips))
+
     except Exception as e:
         print(f"❌ ERROR al guardar archivos: {e}")
-        return
+        return False
+
+    profiling.phase(None)
+    # Las salidas finales ya están en disco: el archivo parcial ya no es necesario
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
 
     # 7. Resumen final
     print("\n" + "=" * 80)
@@ -828,5 +1009,48 @@ def main():
     print(f"   4. Usa el prompt del thumbnail para generar la portada")
     print("=" * 80)
 
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Analiza la transcripción (.srt) y genera capítulos, metadata de YouTube y clips sugeridos'
+    )
+    profiling.add_arguments(parser)
+    profiling.start('analyze_chapters', parser.parse_args())
+    run_log.start('analyze_chapters')
+
+    print("=" * 80)
+    print("  ANALIZADOR DE CAPÍTULOS Y METADATA - AI PODCAST PRODUCER")
+    print("=" * 80)
+
+    # 1. Validar API Key
+    if not OPENAI_API_KEY:
+        print("\n❌ ERROR: No se encontró OPENAI_API_KEY en el archivo .env")
+        print("Por favor, agrega la línea: OPENAI_API_KEY=sk-tu_clave_aqui")
+        print("\nPuedes obtener tu API key en: https://platform.openai.com/api-keys")
+        return 1
+
+    # 2. Buscar archivo .srt en /output/transcriptions
+    print("\n--> Paso 1/5: Buscando archivo de subtítulos...")
+    profiling.phase('find_transcript')
+    srt_files = [f for f in os.listdir(TRANSCRIPTIONS_DIR) if f.endswith('.srt') and os.path.isfile(os.path.join(TRANSCRIPTIONS_DIR, f))]
+
+    if len(srt_files) == 0:
+        print("❌ ERROR: No se encontró ningún archivo .srt en /output/transcriptions")
+        print("Por favor, ejecuta primero: python generate_subtitles.py")
+        return 1
+    elif len(srt_files) > 1:
+        print("⚠️  Se encontraron múltiples archivos .srt:")
+        for idx, file in enumerate(srt_files, 1):
+            print(f"   {idx}. {file}")
+        print(f"\nUsando el más reciente: {srt_files[0]}")
+
+    print(f"✓ Archivo encontrado: {srt_files[0]}")
+
+    run_log.set_episode(os.path.splitext(srt_files[0])[0])
+    # Un solo episodio: la guía de /output es la de este episodio
+    srt_path = os.path.join(TRANSCRIPTIONS_DIR, srt_files[0])
+    return 0 if process_transcript(srt_path, editing_guide_path=EDITING_GUIDE_PATH) else 1
+
 if __name__ == "__main__":
-    main()
+    sys.exit(run_log.finish(main()))
@@ -1,9 +1,13 @@
 # Script: montar_video.py
 # Requisitos: pip install moviepy
 
-import json
 import os
-from moviepy.editor import VideoFileClip, concatenate_videoclips
+import argparse
+
+import run_log
+import profiling
+import editing_guide
+import subtitle_render
 
 # --- CONFIGURACIÓN ---
 INPUT_DIR = "./input"
@@ -13,20 +17,76 @@ FILE_VIDEO_A = "./input/video_host_A.mp4"
 FILE_VIDEO_B = "./input/video_host_B.mp4"
 # Archivo generado por el script anterior
 JSON_GUIA = "./output/editing_guide.json"
+# Transcripción de generate_subtitles.py (para --burn-subtitles)
+TRANSCRIPTIONS_DIR = "./output/transcriptions"
+
+def plan_cuts(guia, min_gap=0.1):
+    """
+    Lista de cortes del video final a partir de la guía de edición
+
+    Cada bloque muestra al host que habla; los silencios entre bloques se rellenan
+    con el video del ÚLTIMO que habló (plano de reacción: se queda escuchando).
+
+    Args:
+        guia: Bloques de editing_guide.json [{'host', 'start', 'end'}]
+        min_gap: Silencios más cortos se ignoran (segundos)
+
+    Returns:
+        list: Cortes (host, inicio, fin) en orden
+    """
+    cortes = []
+    tiempo_actual = 0.0
+    # Variable para saber quién fue el último en hablar (para planos de reacción)
+    ultimo_host_activo = "HOST_A"
+
+    for bloque in guia:
+        inicio = bloque['start']
+        fin = bloque['end']
+        host_actual = "HOST_A" if bloque['host'] == "HOST_A" else "HOST_B"
+
+        # --- LÓGICA DE "REACCIÓN" (Rellenar silencios) ---
+        if inicio - tiempo_actual > min_gap:
+            cortes.append((ultimo_host_activo, tiempo_actual, inicio))
+
+        # --- LÓGICA DE "ACCIÓN" (El que habla) ---
+        cortes.append((host_actual, inicio, fin))
+        ultimo_host_activo = host_actual
+
+        # Avanzamos el cursor
+        tiempo_actual = fin
+
+    return cortes
+
+def write_final_video(video_final, output_file, ffmpeg_params=None):
+    """
+    Codifica el video final (mismos parámetros para el script y los benchmarks)
+    """
+    # preset="medium" es buen balance. Usa "ultrafast" si solo estás probando.
+    video_final.write_videofile(
+        output_file,
+        codec="libx264",
+        audio_codec="aac",
+        fps=24,
+        preset="medium",
+        threads=4,
+        ffmpeg_params=ffmpeg_params
+    )
 
-def montar_video():
+def montar_video(burn_subtitles=False):
     print("--> Paso 1/4: Buscando archivo de audio original...")
+    profiling.phase('find_inputs')
 
     # Buscar archivo .m4a en /input para determinar el nombre de salida
     m4a_files = [f for f in os.listdir(INPUT_DIR) if f.endswith('.m4a') and os.path.isfile(os.path.join(INPUT_DIR, f))]
 
     if len(m4a_files) == 0:
         print("❌ ERROR: No se encontró ningún archivo .m4a en /input")
-        return
+        return False
 
     # Usar el nombre del archivo original para el output
     filename_base = os.path.splitext(m4a_files[0])[0]
     OUTPUT_FILE = os.path.join(OUTPUT_DIR, f"{filename_base}.mp4")
+    run_log.set_episode(filename_base)
 
     print(f"✓ Archivo original encontrado: {m4a_files[0]}")
     print(f"✓ El video final se guardará como: {filename_base}.mp4")
@@ -40,56 +100,33 @@ def montar_video():
     if missing:
         print(f"❌ ERROR: Faltan archivos necesarios: {missing}")
         print("   Asegúrate de haber corrido 'split_audios.py' y de haber descargado los videos de HeyGen.")
-        return
+        return False
 
     print("\n--> Paso 3/4: Cargando videos y procesando cortes de cámara...")
+    profiling.phase('load_and_cut')
+    # Import diferido: moviepy tarda en cargar y las validaciones anteriores no lo necesitan
+    from moviepy.editor import VideoFileClip, concatenate_videoclips
     
     # Cargar videos en memoria
     # Nota: audio=True es importante para mantener el audio que generó HeyGen
-    clip_a = VideoFileClip(FILE_VIDEO_A)
-    clip_b = VideoFileClip(FILE_VIDEO_B)
-    
-    with open(JSON_GUIA, 'r') as f:
-        guia = json.load(f)
-    
-    clips_finales = []
-    tiempo_actual = 0.0
+    with profiling.span('open_sources'):
+        clip_a = VideoFileClip(FILE_VIDEO_A)
+        clip_b = VideoFileClip(FILE_VIDEO_B)
     
-    # Variable para saber quién fue el último en hablar (para planos de reacción)
-    ultimo_host_activo = "HOST_A" 
+    # Guía con las correcciones de fix_speaker_assignment.py (diario de ediciones) aplicadas
+    guia = editing_guide.load_segments(JSON_GUIA)
+    for path in files_needed:
+        run_log.add_input(path)
 
-    total_cortes = len(guia)
-
-    for i, bloque in enumerate(guia):
-        inicio = bloque['start']
-        fin = bloque['end']
-        host_actual = bloque['host']
+    cortes = plan_cuts(guia)
+    fuentes = {"HOST_A": clip_a, "HOST_B": clip_b}
+    clips_finales = []
+    total_cortes = len(cortes)
+    run_log.count(cuts=total_cortes)
 
-        # --- LÓGICA DE "REACCIÓN" (Rellenar silencios) ---
-        # Si hay un espacio vacío entre el corte anterior y este...
-        if inicio > tiempo_actual:
-            duracion_gap = inicio - tiempo_actual
-            if duracion_gap > 0.1: # Ignoramos micro-gaps menores a 100ms
-                # Rellenamos con el video del ÚLTIMO que habló (se queda escuchando)
-                if ultimo_host_activo == "HOST_A":
-                    gap = clip_a.subclip(tiempo_actual, inicio)
-                else:
-                    gap = clip_b.subclip(tiempo_actual, inicio)
-                clips_finales.append(gap)
+    for i, (host, inicio, fin) in enumerate(cortes):
+        clips_finales.append(fuentes[host].subclip(inicio, fin))
 
-        # --- LÓGICA DE "ACCIÓN" (El que habla) ---
-        if host_actual == "HOST_A":
-            segmento = clip_a.subclip(inicio, fin)
-            ultimo_host_activo = "HOST_A"
-        else:
-            segmento = clip_b.subclip(inicio, fin)
-            ultimo_host_activo = "HOST_B"
-        
-        clips_finales.append(segmento)
-        
-        # Avanzamos el cursor
-        tiempo_actual = fin
-        
         # Feedback visual
         if i % 5 == 0:
             print(f"   Montando corte {i}/{total_cortes}...", end="\r")
@@ -97,22 +134,42 @@ def montar_video():
     print(f"   Montando corte {total_cortes}/{total_cortes} - Listo.")
 
     print("\n--> Paso 4/4: Renderizando video final (Ve por un café ☕)...")
-    
+    profiling.phase('render')
+
     # Unir todo
-    video_final = concatenate_videoclips(clips_finales, method="compose")
+    with profiling.span('concatenate', cuts=total_cortes):
+        video_final = concatenate_videoclips(clips_finales, method="compose")
+
+    # Subtítulos quemados en el mismo encode (filtro ass de ffmpeg, color por host)
+    ffmpeg_params = None
+    if burn_subtitles:
+        srt_path = os.path.join(TRANSCRIPTIONS_DIR, f"{filename_base}.srt")
+        if os.path.exists(srt_path):
+            ass_path = subtitle_render.episode_ass(srt_path, JSON_GUIA, *video_final.size)
+            ffmpeg_params = ['-vf', subtitle_render.ass_filter(ass_path)]
+            print(f"   Subtítulos: {ass_path}")
+        else:
+            print(f"   ⚠️  No se encontró {srt_path}: el video se generará sin subtítulos")
+            print("   Ejecuta primero: python generate_subtitles.py")
     
     # Exportar
-    # preset="medium" es buen balance. Usa "ultrafast" si solo estás probando.
-    video_final.write_videofile(
-        OUTPUT_FILE, 
-        codec="libx264", 
-        audio_codec="aac", 
-        fps=24,
-        preset="medium",
-        threads=4
-    )
+    with profiling.span('encode', subtitles=ffmpeg_params is not None):
+        write_final_video(video_final, OUTPUT_FILE, ffmpeg_params)
+    profiling.phase(None)
+    run_log.add_output(OUTPUT_FILE)
 
     print(f"\n✅ ¡PRODUCCIÓN TERMINADA! Video guardado en: {OUTPUT_FILE}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Monta el video final alternando los videos de cada host')
+    parser.add_argument('--burn-subtitles', action='store_true',
+                        help='Quemar los subtítulos del episodio (color por host) en el mismo render')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('assemble_video', args)
+    run_log.start('assemble_video')
+    return 0 if montar_video(burn_subtitles=args.burn_subtitles) else 1
 
 if __name__ == "__main__":
-    montar_video()
\ No newline at end of file
+    exit(run_log.finish(main()))
\ No newline at end of file
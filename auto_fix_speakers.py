@@ -0,0 +1,439 @@
+# Script: auto_fix_speakers.py
+# Requisitos: pip install pyannote.audio torch python-dotenv numpy (FFmpeg para decodificar)
+# Descripción: Corrección automática de speakers confundidos en editing_guide.json.
+#              Extrae un embedding de voz por turno (cacheado en disco), calcula el
+#              centroide de cada host y reasigna en bloque los turnos que se parecen más
+#              al otro host (k-means de 2 grupos que parte de las etiquetas actuales).
+#              Escribe la guía corregida y un reporte con los rangos cambiados, en una
+#              sola pasada en vez del ciclo debug_diarization.py -> --swap-range
+# Uso: python auto_fix_speakers.py [--dry-run] [--min-margin 0.05]
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime
+import numpy as np
+
+import run_log
+import profiling
+import split_audios
+import diarization_qa
+import editing_guide
+import inference_runtime
+from smart_render import ffmpeg_binary
+
+# --- CONFIGURACIÓN ---
+EDITING_GUIDE_PATH = "./output/editing_guide.json"
+REPORT_PATH = "./output/speaker_corrections.json"
+# Modelo de embeddings que usa internamente pyannote/speaker-diarization-3.1
+EMBEDDING_MODEL = "pyannote/wespeaker-voxceleb-resnet34-LM"
+EMBEDDING_CACHE_DIR = "./output/.cache/speaker_embeddings"
+CACHE_VERSION = 1
+SAMPLE_RATE = 16000
+MIN_TURN_SECONDS = 1.0   # Turnos más cortos no dan un embedding confiable
+MIN_MARGIN = 0.05        # Diferencia mínima de similitud coseno para cambiar un turno de host
+MAX_ITERATIONS = 10
+SUSPICIOUS_THRESHOLD = 15  # Igual que la validación de split_audios.py
+
+def decode_mono(input_file, sample_rate=SAMPLE_RATE):
+    """
+    Decodifica el audio completo a mono int16 a `sample_rate` (el formato del modelo de embeddings)
+
+    Returns:
+        np.ndarray: Muestras int16
+    """
+    cmd = [ffmpeg_binary(), '-v', 'error', '-i', input_file, '-vn', '-ac', '1', '-ar', str(sample_rate),
+           '-f', 's16le', '-acodec', 'pcm_s16le', 'pipe:1']
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg falló: {result.stderr.decode(errors='replace').strip()[-300:]}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+def load_embedding_model():
+    """
+    Carga el modelo de embeddings de voz de pyannote (torch se importa aquí)
+
+    Returns:
+        pyannote.audio.Inference: Un embedding por fragmento completo (window="whole")
+    """
+    inference_runtime.configure_torch()
+    from pyannote.audio import Model, Inference
+
+    model = Model.from_pretrained(EMBEDDING_MODEL, use_auth_token=split_audios.HF_TOKEN)
+    if inference_runtime.INFERENCE_QUANTIZE:
+        model, _ = inference_runtime.quantize_dynamic_int8(model)
+    return Inference(model, window="whole")
+
+def _cache_path(input_file):
+    stat = os.stat(input_file)
+    key = f"{CACHE_VERSION}:{EMBEDDING_MODEL}:{os.path.abspath(input_file)}:{stat.st_size}:{stat.st_mtime_ns}"
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(EMBEDDING_CACHE_DIR, f"{digest}.npz")
+
+def load_embedding_cache(input_file):
+    """
+    Embeddings ya calculados para este audio (clave: ruta + tamaño + fecha de modificación)
+
+    Returns:
+        dict: {(inicio_ms, fin_ms): np.ndarray float32}
+    """
+    cache_path = _cache_path(input_file)
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with np.load(cache_path) as data:
+            return {(int(start), int(end)): vector for (start, end), vector in zip(data['keys'], data['vectors'])}
+    except (OSError, KeyError, ValueError):
+        return {}
+
+def save_embedding_cache(input_file, cache):
+    if not cache:
+        return
+    os.makedirs(EMBEDDING_CACHE_DIR, exist_ok=True)
+    cache_path = _cache_path(input_file)
+    tmp_path = cache_path + '.tmp'
+    keys = np.array(list(cache), dtype=np.int64)
+    vectors = np.stack(list(cache.values())).astype(np.float32)
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, keys=keys, vectors=vectors)
+    os.replace(tmp_path, cache_path)
+
+def turn_embeddings(input_file, guide, min_turn=MIN_TURN_SECONDS):
+    """
+    Embedding de voz de cada turno de al menos `min_turn` segundos; los que no están
+    en la caché se calculan (el audio y el modelo solo se cargan si falta alguno)
+
+    Args:
+        input_file: Audio original del episodio
+        guide: GuideArrays de diarization_qa
+        min_turn: Duración mínima del turno
+
+    Returns:
+        tuple: (np.ndarray float32 (turnos, dim) con NaN en los turnos sin embedding,
+                cantidad de embeddings calculados en esta ejecución)
+    """
+    keys = list(zip(np.round(guide.start * 1000).astype(np.int64).tolist(),
+                    np.round(guide.end * 1000).astype(np.int64).tolist()))
+    eligible = np.flatnonzero(guide.end - guide.start >= min_turn)
+    cache = load_embedding_cache(input_file)
+    missing = [i for i in eligible if keys[i] not in cache]
+    print(f"   Turnos con embedding: {len(eligible)} ({len(eligible) - len(missing)} desde caché)")
+
+    if missing:
+        with profiling.span('decode'):
+            samples = decode_mono(input_file)
+        with profiling.span('load_model'):
+            inference = load_embedding_model()
+        print(f"   Runtime: {inference_runtime.describe()}")
+
+        import torch
+        with profiling.span('embed', turns=len(missing)), inference_runtime.inference_context():
+            for done, i in enumerate(missing, 1):
+                start_ms, end_ms = keys[i]
+                crop = samples[start_ms * SAMPLE_RATE // 1000:end_ms * SAMPLE_RATE // 1000]
+                waveform = torch.from_numpy(crop.astype(np.float32) / 32768.0).unsqueeze(0)
+                cache[keys[i]] = np.asarray(inference({'waveform': waveform, 'sample_rate': SAMPLE_RATE}),
+                                            dtype=np.float32).ravel()
+                if done % 25 == 0 or done == len(missing):
+                    print(f"   Calculando embeddings... {done}/{len(missing)}", end="\r")
+        print()
+        save_embedding_cache(input_file, cache)
+
+    if not cache:
+        return np.zeros((len(guide), 0), dtype=np.float32), 0
+    dim = len(next(iter(cache.values())))
+    embeddings = np.full((len(guide), dim), np.nan, dtype=np.float32)
+    for i in eligible:
+        embeddings[i] = cache[keys[i]]
+    return embeddings, len(missing)
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+def reassign_hosts(embeddings, labels, weights, min_margin=MIN_MARGIN, max_iterations=MAX_ITERATIONS):
+    """
+    K-means de 2 grupos sobre similitud coseno, inicializado con las etiquetas actuales:
+    los centroides (promedio ponderado por duración) se recalculan hasta que ningún
+    turno cambia. Un turno solo cambia si se parece al otro centroide por más de `min_margin`
+
+    Args:
+        embeddings: np.ndarray (turnos, dim); solo turnos con embedding
+        labels: np.ndarray int 0/1 con el host actual de cada turno
+        weights: np.ndarray con la duración de cada turno
+        min_margin: Ventaja mínima de similitud para cambiar de host
+        max_iterations: Tope de iteraciones
+
+    Returns:
+        dict: {'labels', 'margin' (similitud al host final - al otro), 'iterations'}
+    """
+    vectors = _normalize(embeddings.astype(np.float64))
+    labels = labels.copy()
+
+    def host_similarity():
+        # Un solo host con embeddings: no hay contra qué comparar
+        if np.all(labels == labels[0]):
+            return None
+        centroids = _normalize(np.stack([(vectors[labels == k] * weights[labels == k, None]).sum(axis=0)
+                                         for k in (0, 1)]))
+        return vectors @ centroids.T
+
+    iterations = 0
+    similarity = host_similarity()
+    while similarity is not None and iterations < max_iterations:
+        proposed = np.argmax(similarity, axis=1)
+        gain = np.abs(similarity[:, 0] - similarity[:, 1])
+        changes = (proposed != labels) & (gain >= min_margin)
+        if not changes.any():
+            break
+        labels[changes] = proposed[changes]
+        iterations += 1
+        similarity = host_similarity()
+
+    if similarity is None:
+        return {'labels': labels, 'margin': np.zeros(len(labels)), 'iterations': iterations}
+    rows = np.arange(len(labels))
+    margin = similarity[rows, labels] - similarity[rows, 1 - labels]
+    return {'labels': labels, 'margin': margin, 'iterations': iterations}
+
+def propagate_to_short_turns(new_hosts, old_hosts, has_embedding, codes):
+    """
+    Los turnos cortos (sin embedding) entre dos turnos corregidos también se
+    intercambian: una confusión de speakers invierte el rango completo, y así no
+    quedan cortes de cámara sueltos dentro de él
+
+    Args:
+        new_hosts: Códigos de host corregidos
+        old_hosts: Códigos de host originales
+        has_embedding: Máscara de los turnos que pasaron por reassign_hosts()
+        codes: Códigos de (HOST_A, HOST_B)
+
+    Returns:
+        np.ndarray: new_hosts actualizado
+    """
+    embedded = np.flatnonzero(has_embedding)
+    if not len(embedded):
+        return new_hosts
+    changed = new_hosts != old_hosts
+    short = np.flatnonzero(~has_embedding & np.isin(old_hosts, codes))
+    position = np.searchsorted(embedded, short)
+    inner = (position > 0) & (position < len(embedded))
+    short, position = short[inner], position[inner]
+    inside = changed[embedded[position - 1]] & changed[embedded[position]]
+    new_hosts = new_hosts.copy()
+    targets = short[inside]
+    new_hosts[targets] = np.where(old_hosts[targets] == codes[0], codes[1], codes[0])
+    return new_hosts
+
+def change_ranges(guide, old_hosts, new_hosts, margin):
+    """
+    Agrupa los turnos cambiados consecutivos en rangos para el reporte
+
+    Returns:
+        list: [{'start', 'end', 'turns', 'start_idx', 'end_idx', 'swaps', 'min_margin'}]
+              con swaps = {"HOST_A->HOST_B": n, ...}
+    """
+    changed = np.flatnonzero(old_hosts != new_hosts)
+    if not len(changed):
+        return []
+    ranges = []
+    for group in np.split(changed, np.flatnonzero(np.diff(changed) != 1) + 1):
+        swaps = {}
+        for old, new in zip(old_hosts[group], new_hosts[group]):
+            key = f"{guide.hosts[old]}->{guide.hosts[new]}"
+            swaps[key] = swaps.get(key, 0) + 1
+        margins = margin[group][~np.isnan(margin[group])]
+        ranges.append({
+            'start': float(guide.start[group[0]]),
+            'end': float(guide.end[group[-1]]),
+            'turns': len(group),
+            'start_idx': int(group[0]),
+            'end_idx': int(group[-1]),
+            'swaps': swaps,
+            'min_margin': round(float(margins.min()), 4) if len(margins) else None
+        })
+    return ranges
+
+def correct_guide(guide, embeddings, min_margin=MIN_MARGIN):
+    """
+    Calcula los hosts corregidos de la guía
+
+    Args:
+        guide: GuideArrays
+        embeddings: Matriz de turn_embeddings() (NaN = sin embedding)
+        min_margin: Ver reassign_hosts()
+
+    Returns:
+        tuple: (np.ndarray con el código de host corregido por turno, margen por turno
+                (NaN sin embedding), iteraciones)
+    """
+    codes = [guide.host_code(name) for name in diarization_qa.HOSTS]
+    has_embedding = ~np.isnan(embeddings).any(axis=1) if embeddings.shape[1] else np.zeros(len(guide), dtype=bool)
+    # Solo HOST_A / HOST_B participan (UNKNOWN queda como está)
+    usable = has_embedding & np.isin(guide.host, codes)
+    new_hosts = guide.host.copy()
+    margin = np.full(len(guide), np.nan)
+    if usable.sum() < 2:
+        return new_hosts, margin, 0
+
+    labels = (guide.host[usable] == codes[1]).astype(np.int64)
+    result = reassign_hosts(embeddings[usable], labels, guide.duration[usable], min_margin=min_margin)
+    new_hosts[usable] = np.array(codes)[result['labels']]
+    margin[usable] = result['margin']
+    new_hosts = propagate_to_short_turns(new_hosts, guide.host, usable, codes)
+    return new_hosts, margin, result['iterations']
+
+def rebuild_tracks(input_file, corrected):
+    """
+    Vuelve a exportar las pistas por host desde el audio original con la guía corregida
+    (mismo proceso que split_audios.py, sin cargar el modelo de diarización)
+    """
+    from pydub import AudioSegment
+    original_audio = AudioSegment.from_file(input_file)
+    samples = split_audios.audio_to_int16(original_audio)
+    with profiling.span('build_host_tracks', turns=len(corrected)):
+        tracks = split_audios.build_host_tracks(samples, original_audio.frame_rate, corrected)
+    for host, path in (("HOST_A", split_audios.TRACK_HOST_A), ("HOST_B", split_audios.TRACK_HOST_B)):
+        with profiling.span('export_track', host=host):
+            split_audios.export_track(tracks[host], original_audio.frame_rate, path)
+        run_log.add_output(path)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Corrige automáticamente los speakers confundidos de editing_guide.json con embeddings de voz'
+    )
+    parser.add_argument('--input', default=EDITING_GUIDE_PATH,
+                        help=f'Guía a corregir (default: {EDITING_GUIDE_PATH})')
+    parser.add_argument('--output', default=None,
+                        help='Guía corregida (default: correcciones en el diario de la guía original)')
+    parser.add_argument('--audio', default=None,
+                        help='Audio del episodio (default: el .m4a de /input)')
+    parser.add_argument('--report', default=REPORT_PATH,
+                        help=f'Reporte de cambios (default: {REPORT_PATH})')
+    parser.add_argument('--min-margin', type=float, default=MIN_MARGIN,
+                        help=f'Ventaja mínima de similitud para cambiar un turno (default: {MIN_MARGIN})')
+    parser.add_argument('--min-turn', type=float, default=MIN_TURN_SECONDS,
+                        help=f'Duración mínima de un turno para calcular su embedding (default: {MIN_TURN_SECONDS}s)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Solo escribir el reporte, sin modificar la guía')
+    parser.add_argument('--rebuild-tracks', action='store_true',
+                        help='Regenerar track_host_A/B.mp3 con la guía corregida (sin repetir la diarización)')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('auto_fix_speakers', args)
+    run_log.start('auto_fix_speakers')
+
+    print("=" * 80)
+    print("  CORRECCIÓN AUTOMÁTICA DE SPEAKERS - AI PODCAST PRODUCER")
+    print("=" * 80)
+
+    print("\n--> Paso 1/4: Cargando guía y audio...")
+    profiling.phase('load')
+    try:
+        segments, guide = diarization_qa.load_guide(args.input)
+    except FileNotFoundError:
+        print(f"❌ Error: No se encontró el archivo {args.input}")
+        return 1
+    except json.JSONDecodeError:
+        print(f"❌ Error: El archivo {args.input} no es un JSON válido")
+        return 1
+    input_file = args.audio or split_audios.find_input_file()
+    if not input_file or not os.path.exists(input_file):
+        print(f"❌ Error: No se encontró el audio del episodio {input_file or ''}")
+        return 1
+    print(f"✓ {len(segments)} turnos en {args.input}")
+    run_log.set_episode(os.path.splitext(os.path.basename(input_file))[0])
+    run_log.add_input(args.input)
+    run_log.add_input(input_file)
+
+    print("\n--> Paso 2/4: Embeddings de voz por turno...")
+    profiling.phase('embeddings')
+    try:
+        embeddings, computed = turn_embeddings(input_file, guide, min_turn=args.min_turn)
+    except MemoryError as e:
+        print(f"❌ ERROR: {e}")
+        return 1
+    except Exception as e:
+        print(f"❌ ERROR al calcular los embeddings: {e}")
+        return 1
+
+    print("\n--> Paso 3/4: Comparando cada turno con el centroide de cada host...")
+    profiling.phase('cluster')
+    new_hosts, margin, iterations = correct_guide(guide, embeddings, min_margin=args.min_margin)
+    ranges = change_ranges(guide, guide.host, new_hosts, margin)
+    changed = np.flatnonzero(new_hosts != guide.host)
+    corrected = [dict(seg, host=guide.hosts[new_hosts[i]]) for i, seg in enumerate(segments)]
+    before = diarization_qa.suspicious_sequences(guide, SUSPICIOUS_THRESHOLD)
+    after = diarization_qa.suspicious_sequences(diarization_qa.guide_arrays(corrected), SUSPICIOUS_THRESHOLD)
+
+    print(f"✓ {len(changed)} turnos reasignados en {len(ranges)} rangos ({iterations} iteraciones)")
+    for r in ranges:
+        margin_text = f", margen mín. {r['min_margin']:.3f}" if r['min_margin'] is not None else ""
+        swaps = ', '.join(f"{key} {count}" for key, count in r['swaps'].items())
+        print(f"   🔄 {r['start']:.1f}s - {r['end']:.1f}s: {r['turns']} turnos ({swaps}{margin_text})")
+    print(f"   Secuencias sospechosas: {len(before)} antes, {len(after)} después")
+
+    print("\n--> Paso 4/4: Guardando resultados...")
+    profiling.phase('save')
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'guide': args.input,
+        'audio': input_file,
+        'model': EMBEDDING_MODEL,
+        'min_margin': args.min_margin,
+        'min_turn_seconds': args.min_turn,
+        'turns': len(segments),
+        'embedded_turns': int((~np.isnan(margin)).sum()),
+        'computed_embeddings': computed,
+        'iterations': iterations,
+        'changed_turns': len(changed),
+        'suspicious_before': len(before),
+        'suspicious_after': len(after),
+        'ranges': ranges,
+        'changes': [{'index': int(i), 'start': segments[i]['start'], 'end': segments[i]['end'],
+                     'from': segments[i]['host'], 'to': corrected[i]['host'],
+                     'margin': None if np.isnan(margin[i]) else round(float(margin[i]), 4)} for i in changed]
+    }
+    os.makedirs(os.path.dirname(args.report) or '.', exist_ok=True)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"✓ Reporte: {args.report}")
+    run_log.add_output(args.report)
+    run_log.count(turns=len(segments), embeddings_computed=computed, swapped=len(changed))
+
+    if args.dry_run or not len(changed):
+        print("   La guía no se modificó" + (" (--dry-run)" if args.dry_run else ""))
+        profiling.phase(None)
+        return 0
+
+    if args.output and args.output != args.input:
+        editing_guide.write_guide(args.output, corrected)
+        output_file = args.output
+    else:
+        # Una sola línea en el diario con todos los cambios (se deshace con fix_speaker_assignment.py --undo)
+        editing_guide.append_journal(args.input, [{
+            'op': 'assign', 'changes': [[int(i), corrected[i]['host']] for i in changed]
+        }])
+        output_file = editing_guide.journal_path(args.input)
+    print(f"✓ Guía corregida: {output_file}")
+    run_log.add_output(output_file)
+
+    if args.rebuild_tracks:
+        print("\n--> Regenerando las pistas de HeyGen con la guía corregida...")
+        profiling.phase('rebuild_tracks')
+        rebuild_tracks(input_file, corrected)
+        print(f"✓ {split_audios.TRACK_HOST_A}")
+        print(f"✓ {split_audios.TRACK_HOST_B}")
+    profiling.phase(None)
+
+    print("\n💡 Siguiente paso: revisa los rangos del reporte y vuelve a generar el video")
+    if not args.rebuild_tracks:
+        print("   (las pistas de HeyGen se regeneran con --rebuild-tracks)")
+    print("   Para ajustar a mano un rango puntual: python fix_speaker_assignment.py --swap-range INICIO FIN")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_log.finish(main()))
@@ -0,0 +1,297 @@
+# Script: batch_metadata.py
+# Requisitos: pip install openai python-dotenv
+# Descripción: Genera metadata (capítulos y marcadores visuales) para TODAS las transcripciones
+#              de /output/transcriptions, saltando los episodios que ya están al día
+# Uso: python batch_metadata.py [--jobs N] [--only chapters|visual] [--force]
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from datetime import datetime
+
+import run_log
+import profiling
+import transcript
+import llm_stream
+import clip_ranking
+import editing_guide
+import openai_client
+import analyze_chapters
+import generate_visual_markers
+
+# --- CONFIGURACIÓN ---
+TRANSCRIPTIONS_DIR = "./output/transcriptions"
+METADATA_DIR = "./output/metadata"
+MANIFEST_PATH = "./output/metadata/batch_manifest.json"
+DEFAULT_JOBS = 3
+
+# Etapas: función por episodio + módulos de los que depende su salida + archivos de salida
+# que genera (sufijos sobre el nombre base) y la etiqueta con la que openai_client.py
+# registra sus llamadas
+STAGES = {
+    'chapters': {
+        'module': analyze_chapters,
+        'dependencies': [llm_stream, openai_client, transcript, clip_ranking, editing_guide],
+        'usage_label': 'analyze_chapters',
+        'outputs': ['_chapters.json', '_youtube.txt', '_metadata.json',
+                    '_content_table.csv', '_calendar.csv'],
+        # Solo se escribe si la IA devolvió clips
+        'optional_outputs': ['_clips.json']
+    },
+    'visual': {
+        'module': generate_visual_markers,
+        'dependencies': [llm_stream, openai_client, transcript],
+        'usage_label': 'visual_markers',
+        'outputs': ['_visual_guide.txt', '_visual_timeline.csv', '_visual_markers.json'],
+        'optional_outputs': []
+    }
+}
+
+def file_hash(path):
+    """
+    Calcula el SHA-256 del contenido de un archivo (por bloques)
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def stage_code_hash(stage):
+    """
+    Hash del código de la etapa: si cambia el prompt, el script o un módulo del que
+    depende (parser de transcripciones, streaming, ranking de clips...), la salida deja
+    de estar al día
+    """
+    modules = [STAGES[stage]['module']] + STAGES[stage]['dependencies']
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(f"{module.__name__}:{file_hash(module.__file__)}\n".encode())
+    return digest.hexdigest()
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"⚠️  Manifest inválido, se regenerará: {MANIFEST_PATH}")
+        return {}
+
+def save_manifest(manifest):
+    os.makedirs(METADATA_DIR, exist_ok=True)
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def output_paths(filename_base, stage, optional=True):
+    suffixes = STAGES[stage]['outputs'] + (STAGES[stage]['optional_outputs'] if optional else [])
+    return [os.path.join(METADATA_DIR, f"{filename_base}{suffix}") for suffix in suffixes]
+
+def is_up_to_date(entry, input_hash, code_hash, filename_base, stage):
+    """
+    Una etapa está al día si la transcripción y el código no cambiaron y todas
+    sus salidas existen con el mismo contenido que se registró (las opcionales,
+    como _clips.json, solo si se registraron)
+    """
+    if not entry or entry.get('input_hash') != input_hash or entry.get('code_hash') != code_hash:
+        return False
+
+    recorded = entry.get('outputs', {})
+    for path in output_paths(filename_base, stage, optional=False):
+        name = os.path.basename(path)
+        if not os.path.exists(path) or recorded.get(name) != file_hash(path):
+            return False
+
+    # Las salidas opcionales deben seguir como se registraron: si se generaron y después se
+    # borraron o editaron, la etapa se vuelve a ejecutar
+    for suffix in STAGES[stage]['optional_outputs']:
+        path = os.path.join(METADATA_DIR, f"{filename_base}{suffix}")
+        current = file_hash(path) if os.path.exists(path) else None
+        if recorded.get(os.path.basename(path)) != current:
+            return False
+
+    return True
+
+def plan_jobs(srt_files, stages, manifest, force=False):
+    """
+    Decide qué (episodio, etapa) hay que procesar
+
+    Returns:
+        tuple: (jobs pendientes, número de trabajos omitidos por estar al día)
+    """
+    jobs = []
+    skipped = 0
+    code_hashes = {stage: stage_code_hash(stage) for stage in stages}
+
+    for srt_file in srt_files:
+        srt_path = os.path.join(TRANSCRIPTIONS_DIR, srt_file)
+        filename_base = os.path.splitext(srt_file)[0]
+        input_hash = file_hash(srt_path)
+
+        for stage in stages:
+            entry = manifest.get(filename_base, {}).get(stage)
+            if not force and is_up_to_date(entry, input_hash, code_hashes[stage], filename_base, stage):
+                skipped += 1
+                continue
+            jobs.append({
+                'srt_path': srt_path,
+                'filename_base': filename_base,
+                'stage': stage,
+                'input_hash': input_hash,
+                'code_hash': code_hashes[stage]
+            })
+
+    return jobs, skipped
+
+async def run_jobs(jobs, concurrency, manifest):
+    """
+    Ejecuta los trabajos en un pool de workers asyncio con límite global de concurrencia.
+    Cada trabajo corre en un hilo (las llamadas a OpenAI son bloqueantes); el
+    limitador de openai_client es compartido, así que el lote respeta los límites
+    de la organización.
+
+    Returns:
+        list: Resultados por trabajo
+    """
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    results = []
+    manifest_lock = asyncio.Lock()
+    total = len(jobs)
+
+    async def worker():
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            module = STAGES[job['stage']]['module']
+
+            def run_job():
+                # El span se abre en el hilo del trabajo: cada hilo es una fila en la línea de tiempo
+                # Sin editing_guide.json: la guía de /output es solo la del episodio actual
+                with profiling.span(job['stage'], episode=job['filename_base']):
+                    return module.process_transcript(job['srt_path'])
+
+            started = time.perf_counter()
+            try:
+                ok = await asyncio.to_thread(run_job)
+                error = None if ok else 'la etapa reportó un error'
+            except Exception as e:
+                ok, error = False, str(e)
+            elapsed = time.perf_counter() - started
+
+            result = dict(job, ok=ok, error=error, elapsed=elapsed)
+            results.append(result)
+            run_log.event('job', episode=job['filename_base'], stage=job['stage'],
+                          status='ok' if ok else 'error', error=error, duration_seconds=round(elapsed, 3),
+                          openai=run_log.openai_usage(f"{STAGES[job['stage']]['usage_label']}:{job['filename_base']}"))
+
+            if ok:
+                async with manifest_lock:
+                    manifest.setdefault(job['filename_base'], {})[job['stage']] = {
+                        'input_hash': job['input_hash'],
+                        'code_hash': job['code_hash'],
+                        'outputs': {
+                            os.path.basename(path): file_hash(path)
+                            for path in output_paths(job['filename_base'], job['stage'])
+                            if os.path.exists(path)
+                        },
+                        'updated_at': datetime.now().isoformat(timespec='seconds')
+                    }
+                    save_manifest(manifest)
+
+            status = "✓" if ok else "❌"
+            print(f"\n[{len(results)}/{total}] {status} {job['filename_base']} ({job['stage']}) en {elapsed:.1f}s")
+            queue.task_done()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, total)))))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Genera metadata para todas las transcripciones de /output/transcriptions'
+    )
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f'Episodios procesados en paralelo (default: {DEFAULT_JOBS})')
+    parser.add_argument('--only', choices=sorted(STAGES), default=None,
+                        help='Ejecutar solo una etapa (default: todas)')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerar aunque las salidas estén al día')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('batch_metadata', args)
+    run_log.start('batch_metadata')
+
+    print("=" * 80)
+    print("  METADATA EN LOTE - AI PODCAST PRODUCER")
+    print("=" * 80)
+
+    if not analyze_chapters.OPENAI_API_KEY:
+        print("\n❌ ERROR: No se encontró OPENAI_API_KEY en el archivo .env")
+        return 1
+
+    # 1. Enumerar transcripciones
+    print("\n--> Paso 1/3: Buscando transcripciones...")
+    profiling.phase('find_transcripts')
+    if not os.path.isdir(TRANSCRIPTIONS_DIR):
+        print(f"❌ ERROR: Directorio {TRANSCRIPTIONS_DIR} no existe")
+        return 1
+
+    srt_files = sorted(f for f in os.listdir(TRANSCRIPTIONS_DIR)
+                       if f.endswith('.srt') and os.path.isfile(os.path.join(TRANSCRIPTIONS_DIR, f)))
+    if not srt_files:
+        print("❌ ERROR: No se encontró ningún archivo .srt en /output/transcriptions")
+        return 1
+    print(f"✓ {len(srt_files)} transcripciones encontradas")
+
+    # 2. Comparar hashes con el manifest
+    print("\n--> Paso 2/3: Verificando episodios al día...")
+    profiling.phase('check_manifest')
+    stages = [args.only] if args.only else list(STAGES)
+    manifest = load_manifest()
+    jobs, skipped = plan_jobs(srt_files, stages, manifest, force=args.force)
+    print(f"✓ {skipped} trabajos al día (omitidos)")
+    print(f"✓ {len(jobs)} trabajos pendientes")
+
+    if not jobs:
+        print("\n✅ Todo está al día. No hay nada que procesar.")
+        return 0
+
+    # 3. Procesar en paralelo
+    print(f"\n--> Paso 3/3: Procesando con {min(args.jobs, len(jobs))} workers...")
+    profiling.phase('process')
+    started = time.perf_counter()
+    results = asyncio.run(run_jobs(jobs, args.jobs, manifest))
+    elapsed = time.perf_counter() - started
+    profiling.phase(None)
+
+    ok_count = sum(1 for r in results if r['ok'])
+    failed = [r for r in results if not r['ok']]
+
+    print("\n" + "=" * 80)
+    print("✅ ¡LOTE COMPLETADO!")
+    print("=" * 80)
+    print(f"\n📊 RESUMEN:")
+    print(f"   • Trabajos completados: {ok_count}")
+    print(f"   • Trabajos omitidos (al día): {skipped}")
+    print(f"   • Trabajos con errores: {len(failed)}")
+    print(f"   • Tiempo total: {elapsed:.1f}s")
+    for r in failed:
+        print(f"   ❌ {r['filename_base']} ({r['stage']}): {r['error']}")
+    print(f"\n💡 Manifest: {MANIFEST_PATH}")
+    print("=" * 80)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(run_log.finish(main()))
@@ -0,0 +1,303 @@
+# Script: benchmark_episode.py
+# Requisitos: pip install numpy (moviepy para la etapa assemble_render)
+# Descripción: Benchmark de las etapas del episodio sobre fixtures sintéticas
+#              (benchmark_fixtures.py): pistas por host de split_audios.py, plan de cortes
+#              y render de assemble_video.py, y extracción de clips de generate_clips.py
+#              (smart render y single pass). Cada etapa corre en un proceso nuevo y se
+#              guarda tiempo real, tiempo de CPU y memoria pico en JSON para comparar
+#              entre commits
+# Uso: python benchmark_episode.py --minutes 10 --cuts 500
+#      python benchmark_episode.py --compare output/.benchmarks/anterior.json
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime
+
+import benchmark_fixtures
+import inference_runtime
+
+# --- CONFIGURACIÓN ---
+BENCHMARK_DIR = "./output/.benchmarks"
+FIXTURES_DIR = "./output/.benchmarks/fixtures"
+STAGES = ('tracks', 'cut_plan', 'guide_report', 'assemble_timeline', 'assemble_render',
+          'clips_smart', 'clips_single_pass')
+VIDEO_STAGES = ('assemble_timeline', 'assemble_render', 'clips_smart', 'clips_single_pass')
+DEFAULT_MINUTES = 5
+DEFAULT_CUTS = 300
+DEFAULT_CLIPS = 4
+RESULT_PREFIX = "RESULT "
+
+
+# --- ETAPAS (corren dentro del proceso hijo) ---
+
+def stage_tracks(fixtures, clips, work_dir):
+    import split_audios
+    samples, frame_rate = benchmark_fixtures.read_wav(fixtures['audio'])
+    with open(fixtures['guide'], 'r') as f:
+        turns = benchmark_fixtures.guide_turns(json.load(f))
+
+    def run():
+        mapping = split_audios.map_speakers(turns)
+        guide = split_audios.build_editing_guide(turns, mapping)
+        return split_audios.build_host_tracks(samples, frame_rate, guide)
+    return run, {'turns': len(turns), 'frames': len(samples)}
+
+def stage_cut_plan(fixtures, clips, work_dir):
+    import assemble_video
+    with open(fixtures['guide'], 'r') as f:
+        guide = json.load(f)
+    return (lambda: assemble_video.plan_cuts(guide)), {'blocks': len(guide)}
+
+def stage_guide_report(fixtures, clips, work_dir):
+    import split_audios
+    import debug_diarization
+    with open(fixtures['guide'], 'r') as f:
+        guide = json.load(f)
+
+    def run():
+        # Validaciones de split_audios.py y el informe completo de debug_diarization.py
+        split_audios.report_suspicious_sequences(guide)
+        debug_diarization.analyze_editing_guide(fixtures['guide'])
+    return run, {'blocks': len(guide)}
+
+def stage_assemble_timeline(fixtures, clips, work_dir):
+    import assemble_video
+    from moviepy.editor import VideoFileClip, concatenate_videoclips
+    with open(fixtures['guide'], 'r') as f:
+        cuts = assemble_video.plan_cuts(json.load(f))
+
+    def run():
+        # Solo subclips + concatenación (sin codificar): el costo por corte de moviepy
+        sources = {'HOST_A': VideoFileClip(fixtures['video_a']), 'HOST_B': VideoFileClip(fixtures['video_b'])}
+        concatenate_videoclips([sources[host].subclip(start, end) for host, start, end in cuts],
+                               method="compose")
+    return run, {'cuts': len(cuts)}
+
+def stage_assemble_render(fixtures, clips, work_dir):
+    import assemble_video
+    from moviepy.editor import VideoFileClip, concatenate_videoclips
+    with open(fixtures['guide'], 'r') as f:
+        cuts = assemble_video.plan_cuts(json.load(f))
+
+    def run():
+        sources = {'HOST_A': VideoFileClip(fixtures['video_a']), 'HOST_B': VideoFileClip(fixtures['video_b'])}
+        final = concatenate_videoclips([sources[host].subclip(start, end) for host, start, end in cuts],
+                                       method="compose")
+        assemble_video.write_final_video(final, os.path.join(work_dir, 'episode.mp4'))
+    return run, {'cuts': len(cuts)}
+
+def stage_clips_smart(fixtures, clips, work_dir):
+    import smart_render
+    ranges = benchmark_fixtures.make_clip_ranges(fixtures['params']['minutes'] * 60, clips,
+                                                 fixtures['params']['seed'])
+
+    def run():
+        plans = [smart_render.render_clip(fixtures['video_a'], start, end, os.path.join(work_dir, f"{i}.mp4"))
+                 for i, (start, end) in enumerate(ranges)]
+        return sum(1 for plan in plans if plan)
+    return run, {'clips': len(ranges)}
+
+def stage_clips_single_pass(fixtures, clips, work_dir):
+    import single_pass_render
+    ranges = benchmark_fixtures.make_clip_ranges(fixtures['params']['minutes'] * 60, clips,
+                                                 fixtures['params']['seed'])
+    # Verticales con cámara según la guía, como los clips virales
+    jobs = [{'start': start, 'end': end, 'output_path': os.path.join(work_dir, f"{i}.mp4"),
+             'vertical': {'editing_guide': fixtures['guide']}, 'subtitles': None}
+            for i, (start, end) in enumerate(ranges)]
+
+    def run():
+        results, _ = single_pass_render.render_single_pass(fixtures['video_a'], jobs)
+        failed = [r['error'] for r in results if not r['ok']]
+        if failed:
+            raise RuntimeError(failed[0])
+    return run, {'clips': len(jobs)}
+
+STAGE_FUNCTIONS = {
+    'tracks': stage_tracks,
+    'cut_plan': stage_cut_plan,
+    'guide_report': stage_guide_report,
+    'assemble_timeline': stage_assemble_timeline,
+    'assemble_render': stage_assemble_render,
+    'clips_smart': stage_clips_smart,
+    'clips_single_pass': stage_clips_single_pass
+}
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def run_stage(name, fixtures, clips):
+    """
+    Dentro del proceso hijo: prepara la etapa (sin medir) y mide su camino crítico
+
+    Returns:
+        dict: {'wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'baseline_rss_mb', 'peak_child_rss_mb',
+               'details'}
+    """
+    # Memoria del intérprete y las librerías antes de la etapa (para separar lo que crece con ella)
+    baseline_rss = inference_runtime.rss_mb()
+    # Los scripts imprimen progreso: se descarta para que la salida sea solo el resultado
+    with contextlib.redirect_stdout(io.StringIO()), \
+         tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as work_dir:
+        run, details = STAGE_FUNCTIONS[name](fixtures, clips, work_dir)
+        cpu_started = _cpu_seconds()
+        started = time.perf_counter()
+        run()
+        wall = time.perf_counter() - started
+        cpu = _cpu_seconds() - cpu_started
+
+    return {
+        'wall_seconds': round(wall, 4),
+        'cpu_seconds': round(cpu, 4),
+        'peak_rss_mb': inference_runtime.peak_rss_mb(),
+        'baseline_rss_mb': baseline_rss,
+        'peak_child_rss_mb': inference_runtime.peak_rss_mb(children=True),
+        'details': details
+    }
+
+
+# --- ORQUESTACIÓN ---
+
+def measure(name, fixtures, clips, timeout=None):
+    """
+    Corre una etapa en un proceso nuevo (la memoria pico es solo de esa etapa)
+
+    Args:
+        timeout: Segundos máximos de la etapa (None = sin límite)
+
+    Returns:
+        dict: Resultado de run_stage(), {'skipped': ...} si falta una dependencia
+              opcional (ej: moviepy), {'timeout': segundos} o {'error': ...}
+    """
+    try:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), '--stage', name,
+                                 '--fixture-json', json.dumps(fixtures), '--clips', str(clips)],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'timeout': timeout}
+    for line in result.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    last_line = (result.stderr.strip().splitlines() or ['sin salida'])[-1]
+    if last_line.startswith('ModuleNotFoundError'):
+        return {'skipped': last_line}
+    return {'error': last_line}
+
+def git_revision():
+    """
+    Commit actual (con '+' si hay cambios sin commitear), o None fuera de git
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('+' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_comparison(results, previous_path):
+    """
+    Diferencia de tiempo real y memoria contra un JSON anterior
+    """
+    with open(previous_path, 'r') as f:
+        previous = json.load(f)
+    before = {row['stage']: row for row in previous.get('results', [])}
+    print(f"\n📊 Comparación con {os.path.basename(previous_path)} ({previous.get('commit') or '?'}):")
+    for row in results:
+        old = before.get(row['stage'])
+        if not old or 'wall_seconds' not in old or 'wall_seconds' not in row:
+            continue
+        delta = (row['wall_seconds'] - old['wall_seconds']) / old['wall_seconds'] * 100 if old['wall_seconds'] else 0
+        icon = "🔺" if delta > 10 else ("🔻" if delta < -10 else "  ")
+        print(f"   {icon} {row['stage']:<18} {old['wall_seconds']:>8.3f}s → {row['wall_seconds']:>8.3f}s "
+              f"({delta:+.0f}%)  RSS {old['peak_rss_mb']} → {row['peak_rss_mb']} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las etapas del episodio con fixtures sintéticas')
+    parser.add_argument('--minutes', type=float, default=DEFAULT_MINUTES,
+                        help=f'Duración del episodio sintético (default: {DEFAULT_MINUTES})')
+    parser.add_argument('--cuts', type=int, default=DEFAULT_CUTS,
+                        help=f'Bloques de la guía de edición (default: {DEFAULT_CUTS})')
+    parser.add_argument('--clips', type=int, default=DEFAULT_CLIPS,
+                        help=f'Clips a extraer (default: {DEFAULT_CLIPS})')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=360)
+    parser.add_argument('--fps', type=int, default=24)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--output', default=None,
+                        help=f'JSON de resultados (default: {BENCHMARK_DIR}/<fecha>_<commit>.json)')
+    parser.add_argument('--compare', default=None, help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--stage', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--fixture-json', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        print(RESULT_PREFIX + json.dumps(run_stage(args.stage, json.loads(args.fixture_json), args.clips)))
+        return 0
+
+    print("=" * 80)
+    print("  BENCHMARK DEL EPISODIO - AI PODCAST PRODUCER")
+    print("=" * 80)
+
+    print(f"\n--> Generando fixtures ({args.minutes:g} min, {args.cuts} cortes, "
+          f"{args.width}x{args.height}@{args.fps})...")
+    started = time.perf_counter()
+    fixtures = benchmark_fixtures.make_fixtures(
+        FIXTURES_DIR, args.minutes, args.cuts, args.width, args.height, args.fps, args.seed,
+        videos=any(stage in VIDEO_STAGES for stage in args.stages)
+    )
+    print(f"✓ {fixtures['dir']} ({time.perf_counter() - started:.1f}s)")
+
+    print(f"\n{'Etapa':<20} {'Real':>9} {'CPU':>9} {'RSS pico':>10} {'ffmpeg':>8}  Detalle")
+    print("-" * 80)
+    results = []
+    for stage in args.stages:
+        measured = measure(stage, fixtures, args.clips)
+        results.append({'stage': stage, **measured})
+        if 'skipped' in measured:
+            print(f"{stage:<20} ⏭️  omitida: {measured['skipped'][:50]}")
+            continue
+        if 'error' in measured:
+            print(f"{stage:<20} ❌ {measured['error'][:58]}")
+            continue
+        details = ', '.join(f"{k}={v}" for k, v in measured['details'].items())
+        print(f"{stage:<20} {measured['wall_seconds']:>8.3f}s {measured['cpu_seconds']:>8.3f}s "
+              f"{measured['peak_rss_mb']:>7} MB {measured['peak_child_rss_mb']:>5} MB  {details}")
+    print("-" * 80)
+
+    commit = git_revision()
+    output_path = args.output or os.path.join(
+        BENCHMARK_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{(commit or 'local').rstrip('+')}.json"
+    )
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': sys.version.split()[0],
+            'cores': inference_runtime.available_cores(),
+            'params': fixtures['params'],
+            'clips': args.clips,
+            'results': results
+        }, f, indent=2, ensure_ascii=False)
+    print(f"📄 Resultados guardados en {output_path}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    return 1 if any('error' in row for row in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# Módulo: benchmark_fixtures.py
+# Requisitos: pip install numpy (ffmpeg de imageio-ffmpeg para los videos)
+# Descripción: Genera fixtures sintéticas y deterministas (misma semilla = mismos
+#              archivos) para los benchmarks, sin red ni archivos reales: guía de edición
+#              con N cortes, audio de dos "voces" (tonos con modulación + ruido) que sigue
+#              esa guía, y videos de barras de color que reemplazan a los de HeyGen
+
+import os
+import json
+import wave
+import hashlib
+import subprocess
+import numpy as np
+
+from smart_render import ffmpeg_binary
+
+# --- CONFIGURACIÓN ---
+FIXTURES_VERSION = 1        # Cambiar si cambia algún generador (invalida las fixtures)
+GAP_PROBABILITY = 0.3       # Bloques precedidos por un silencio (plano de reacción)
+REPEAT_PROBABILITY = 0.15   # Bloques seguidos del mismo host (como los de pyannote)
+AUDIO_CHUNK_SECONDS = 10
+KEYFRAME_INTERVAL = 48      # GOP de los videos (~2s a 24 fps, como los de HeyGen)
+
+# Voz sintética por host: (frecuencia fundamental, modulación silábica, nivel de ruido)
+VOICES = {
+    'HOST_A': (140.0, 4.0, 0.02),
+    'HOST_B': (220.0, 5.5, 0.05)
+}
+
+def make_guide(duration, cuts, seed=0):
+    """
+    Guía de edición con `cuts` bloques que cubren `duration` segundos
+
+    Returns:
+        list: [{'host', 'start', 'end', 'duration'}] como la de split_audios.py
+    """
+    rng = np.random.default_rng(seed)
+    # Duraciones de bloque con la variabilidad de una conversación (gamma, forma 2)
+    weights = rng.gamma(2.0, 1.0, cuts)
+    bounds = np.concatenate([[0.0], np.cumsum(weights) / weights.sum() * duration])
+    gaps = np.where(rng.random(cuts) < GAP_PROBABILITY, rng.uniform(0.15, 0.8, cuts), 0.0)
+    repeats = rng.random(cuts) < REPEAT_PROBABILITY
+
+    guide = []
+    host = 'HOST_A'
+    for i in range(cuts):
+        if i and not repeats[i]:
+            host = 'HOST_B' if host == 'HOST_A' else 'HOST_A'
+        start = bounds[i] + min(gaps[i], (bounds[i + 1] - bounds[i]) / 2)
+        end = bounds[i + 1]
+        guide.append({'host': host, 'start': round(float(start), 3), 'end': round(float(end), 3),
+                      'duration': round(float(end - start), 3)})
+    return guide
+
+def guide_turns(guide):
+    """
+    Turnos (inicio, fin, speaker) como los devuelve split_audios.run_diarization()
+    """
+    speakers = {'HOST_A': 'SPEAKER_00', 'HOST_B': 'SPEAKER_01'}
+    return [(block['start'], block['end'], speakers[block['host']]) for block in guide]
+
+def synthesize_audio(guide, duration, sample_rate, channels, seed=0):
+    """
+    Genera el audio por bloques de AUDIO_CHUNK_SECONDS (memoria acotada)
+
+    Yields:
+        np.ndarray int16 (frames, canales)
+    """
+    rng = np.random.default_rng(seed + 1)
+    total_frames = int(duration * sample_rate)
+    chunk_frames = AUDIO_CHUNK_SECONDS * sample_rate
+    starts = np.array([block['start'] for block in guide])
+    ends = np.array([block['end'] for block in guide])
+    is_a = np.array([block['host'] == 'HOST_A' for block in guide])
+
+    for offset in range(0, total_frames, chunk_frames):
+        t = (np.arange(offset, min(offset + chunk_frames, total_frames)) / sample_rate)
+        # Bloque vigente para cada muestra (en silencios queda en -1 / fuera de rango)
+        idx = np.searchsorted(starts, t, side='right') - 1
+        inside = (idx >= 0) & (t < ends[np.clip(idx, 0, None)])
+        speaker_a = inside & is_a[np.clip(idx, 0, None)]
+        speaker_b = inside & ~is_a[np.clip(idx, 0, None)]
+
+        signal = np.zeros(len(t))
+        for mask, host in ((speaker_a, 'HOST_A'), (speaker_b, 'HOST_B')):
+            f0, syllables, noise = VOICES[host]
+            voice = (np.sin(2 * np.pi * f0 * t) + 0.5 * np.sin(4 * np.pi * f0 * t)
+                     + 0.25 * np.sin(6 * np.pi * f0 * t))
+            envelope = 0.5 + 0.5 * np.sin(2 * np.pi * syllables * t) ** 2
+            signal += mask * (0.25 * voice * envelope + noise * rng.standard_normal(len(t)))
+
+        samples = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+        yield np.repeat(samples[:, None], channels, axis=1)
+
+def write_wav(path, guide, duration, sample_rate=44100, channels=2, seed=0):
+    """
+    Escribe el audio sintético del episodio como WAV PCM 16 bits
+    """
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        for chunk in synthesize_audio(guide, duration, sample_rate, channels, seed):
+            f.writeframes(chunk.tobytes())
+
+def read_wav(path):
+    """
+    Returns:
+        tuple: (np.ndarray int16 (frames, canales), frecuencia de muestreo)
+    """
+    with wave.open(path, 'rb') as f:
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        return data.reshape(-1, f.getnchannels()), f.getframerate()
+
+def write_host_video(path, duration, width, height, fps, pattern):
+    """
+    Video de barras de color con un tono de audio (reemplaza al video de HeyGen)
+
+    Args:
+        pattern: Fuente lavfi de ffmpeg ('smptebars', 'testsrc2', ...)
+    """
+    subprocess.run([ffmpeg_binary(), '-v', 'error', '-y',
+                    '-f', 'lavfi', '-i', f"{pattern}=size={width}x{height}:rate={fps}:duration={duration}",
+                    '-f', 'lavfi', '-i', f"sine=frequency=440:sample_rate=44100:duration={duration}",
+                    '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+                    '-g', str(KEYFRAME_INTERVAL), '-c:a', 'aac', '-shortest', path], check=True)
+
+def make_clip_ranges(duration, count, seed=0):
+    """
+    Rangos de clips sintéticos de 15 a 60 segundos (como los virales)
+
+    Returns:
+        list: [(inicio, fin)] ordenados
+    """
+    rng = np.random.default_rng(seed + 2)
+    lengths = rng.uniform(15, 60, count).clip(max=duration)
+    starts = rng.uniform(0, np.maximum(duration - lengths, 0))
+    return sorted((round(float(s), 3), round(float(s + l), 3)) for s, l in zip(starts, lengths))
+
+def fixture_key(params):
+    """
+    Nombre de la carpeta de fixtures para unos parámetros
+    """
+    payload = json.dumps({'version': FIXTURES_VERSION, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+def make_fixtures(root, minutes, cuts, width=640, height=360, fps=24, seed=0,
+                  sample_rate=44100, channels=2, videos=True):
+    """
+    Genera (o reutiliza, si ya existen con los mismos parámetros) las fixtures de un episodio
+
+    Args:
+        root: Carpeta base de fixtures
+        minutes: Duración del episodio
+        cuts: Bloques de la guía de edición
+        videos: Generar también los videos de barras (lo más lento de generar)
+
+    Returns:
+        dict: Rutas {'dir', 'guide', 'audio', 'video_a', 'video_b'} y 'params'
+    """
+    params = {'minutes': minutes, 'cuts': cuts, 'width': width, 'height': height, 'fps': fps,
+              'seed': seed, 'sample_rate': sample_rate, 'channels': channels}
+    fixture_dir = os.path.join(root, fixture_key(params))
+    # Los videos no dependen de la guía: se comparten entre fixtures con distinto número de cortes
+    video_dir = os.path.join(root, 'videos_' + fixture_key({'minutes': minutes, 'width': width,
+                                                            'height': height, 'fps': fps}))
+    paths = {
+        'dir': fixture_dir,
+        'guide': os.path.join(fixture_dir, 'editing_guide.json'),
+        'audio': os.path.join(fixture_dir, 'episode.wav'),
+        'video_a': os.path.join(video_dir, 'video_host_A.mp4'),
+        'video_b': os.path.join(video_dir, 'video_host_B.mp4'),
+        'params': params
+    }
+    os.makedirs(fixture_dir, exist_ok=True)
+    duration = minutes * 60
+
+    # Cada archivo se escribe a .tmp y se renombra: una generación cortada no deja basura válida
+    if not os.path.exists(paths['guide']):
+        guide = make_guide(duration, cuts, seed)
+        with open(paths['guide'] + '.tmp', 'w') as f:
+            json.dump(guide, f, indent=4)
+        os.replace(paths['guide'] + '.tmp', paths['guide'])
+    with open(paths['guide'], 'r') as f:
+        guide = json.load(f)
+
+    if not os.path.exists(paths['audio']):
+        write_wav(paths['audio'] + '.tmp', guide, duration, sample_rate, channels, seed)
+        os.replace(paths['audio'] + '.tmp', paths['audio'])
+
+    if videos:
+        os.makedirs(video_dir, exist_ok=True)
+        for key, pattern in (('video_a', 'smptebars'), ('video_b', 'testsrc2')):
+            if not os.path.exists(paths[key]):
+                tmp_path = paths[key][:-4] + '.tmp.mp4'
+                write_host_video(tmp_path, duration, width, height, fps, pattern)
+                os.replace(tmp_path, paths[key])
+
+    with open(os.path.join(fixture_dir, 'fixture.json'), 'w') as f:
+        json.dump(params, f, indent=2)
+    return paths
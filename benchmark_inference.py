@@ -0,0 +1,184 @@
+# Script: benchmark_inference.py
+# Requisitos: pip install pyannote.audio openai-whisper torch python-dotenv
+# Descripción: Mide el factor de tiempo real (RTF = segundos de proceso / segundos de
+#              audio) de pyannote y Whisper con distintas configuraciones de
+#              inference_runtime.py (hilos y cuantización int8), para elegir la más rápida
+#              en cada tipo de máquina. Cada configuración corre en un proceso nuevo
+#              (torch no permite cambiar los hilos una vez iniciado)
+# Uso: python benchmark_inference.py --seconds 120 --threads 2 4 8
+
+import os
+import sys
+import json
+import wave
+import argparse
+import tempfile
+import subprocess
+
+import inference_runtime
+from smart_render import ffmpeg_binary
+
+# --- CONFIGURACIÓN ---
+INPUT_DIR = "./input"
+DEFAULT_SECONDS = 120     # Fragmento del episodio a procesar (0 = completo)
+DEFAULT_RUNS = 1
+MODELS = ('whisper', 'diarization')
+RESULT_PREFIX = "RESULT "
+
+def default_thread_counts():
+    """
+    1 hilo, la mitad y todos los núcleos (sin repetir)
+    """
+    cores = inference_runtime.available_cores()
+    return sorted({1, max(1, cores // 2), cores})
+
+def prepare_audio(source, seconds, work_dir):
+    """
+    Recorta y convierte el audio a WAV mono 16 kHz (lo que ambos modelos usan internamente)
+
+    Returns:
+        tuple: (ruta del WAV, duración en segundos)
+    """
+    wav_path = os.path.join(work_dir, "benchmark.wav")
+    cmd = [ffmpeg_binary(), '-v', 'error', '-y', '-i', source, '-vn', '-ac', '1', '-ar', '16000']
+    if seconds:
+        cmd += ['-t', str(seconds)]
+    subprocess.run(cmd + [wav_path], check=True)
+    with wave.open(wav_path, 'rb') as f:
+        return wav_path, f.getnframes() / f.getframerate()
+
+def run_worker(model_name, wav_path, runs):
+    """
+    Dentro del proceso hijo: carga el modelo y mide `runs` inferencias
+
+    Returns:
+        dict: {'load_seconds', 'seconds' (mejor corrida), 'peak_rss_mb', 'threads'}
+    """
+    import time
+
+    started = time.perf_counter()
+    if model_name == 'whisper':
+        import generate_subtitles
+        model = generate_subtitles.load_whisper_model()
+        run = lambda: generate_subtitles.transcribe(model, wav_path)
+    else:
+        import split_audios
+        pipeline = split_audios.load_diarization_pipeline()
+        run = lambda: split_audios.run_diarization(pipeline, wav_path)
+    load_seconds = time.perf_counter() - started
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'load_seconds': round(load_seconds, 2),
+        'seconds': round(min(timings), 2),
+        'peak_rss_mb': inference_runtime.peak_rss_mb(),
+        'threads': inference_runtime.configure_torch()['threads']
+    }
+
+def measure(model_name, wav_path, threads, quantize, runs):
+    """
+    Lanza un proceso hijo con la configuración dada (por variables de entorno)
+
+    Returns:
+        dict: Resultado de run_worker() o {'error': ...}
+    """
+    env = dict(os.environ,
+               INFERENCE_THREADS=str(threads),
+               INFERENCE_QUANTIZE="1" if quantize else "0",
+               MODEL_SERVER="0")
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', model_name, wav_path,
+                             '--runs', str(runs)],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    for line in result.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    last_line = (result.stderr.strip().splitlines() or ['sin salida'])[-1]
+    return {'error': last_line}
+
+def find_input_audio():
+    if not os.path.isdir(INPUT_DIR):
+        return None
+    m4a_files = sorted(f for f in os.listdir(INPUT_DIR) if f.endswith('.m4a'))
+    return os.path.join(INPUT_DIR, m4a_files[0]) if m4a_files else None
+
+def main():
+    parser = argparse.ArgumentParser(description='Factor de tiempo real de pyannote y Whisper por configuración')
+    parser.add_argument('--audio', default=None, help='Audio a usar (default: el .m4a de /input)')
+    parser.add_argument('--seconds', type=float, default=DEFAULT_SECONDS,
+                        help=f'Segundos de audio a procesar (default: {DEFAULT_SECONDS}, 0 = completo)')
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=list(MODELS))
+    parser.add_argument('--threads', nargs='+', type=int, default=None,
+                        help='Hilos a probar (default: 1, la mitad y todos los núcleos)')
+    parser.add_argument('--quantize', nargs='+', choices=('off', 'on'), default=['off', 'on'],
+                        help='Probar sin y/o con cuantización int8')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS,
+                        help='Inferencias por configuración (se toma la más rápida)')
+    parser.add_argument('--json', default=None, help='Guardar los resultados en este archivo JSON')
+    parser.add_argument('--worker', nargs=2, metavar=('MODELO', 'WAV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(RESULT_PREFIX + json.dumps(run_worker(args.worker[0], args.worker[1], args.runs)))
+        return 0
+
+    source = args.audio or find_input_audio()
+    if not source or not os.path.exists(source):
+        print("❌ ERROR: No se encontró el audio (usa --audio o coloca un .m4a en /input)")
+        return 1
+
+    print("=" * 80)
+    print("  BENCHMARK DE INFERENCIA (RTF) - AI PODCAST PRODUCER")
+    print("=" * 80)
+
+    thread_counts = args.threads or default_thread_counts()
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        wav_path, duration = prepare_audio(source, args.seconds, work_dir)
+        print(f"\nAudio: {os.path.basename(source)} ({duration:.1f}s) · núcleos: {inference_runtime.available_cores()}")
+        print("RTF < 1 = más rápido que tiempo real\n")
+        print(f"{'Modelo':<12} {'Hilos':>5} {'int8':>5} {'Carga':>8} {'Proceso':>9} {'RTF':>7} {'RSS pico':>10}")
+        print("-" * 80)
+
+        for model_name in args.models:
+            for quantize in (mode == 'on' for mode in args.quantize):
+                for threads in thread_counts:
+                    measured = measure(model_name, wav_path, threads, quantize, args.runs)
+                    row = {'model': model_name, 'threads': threads, 'quantize': quantize, **measured}
+                    label = f"{model_name:<12} {threads:>5} {'sí' if quantize else 'no':>5}"
+                    if 'error' in measured:
+                        print(f"{label}  ❌ {measured['error'][:50]}")
+                    else:
+                        row['rtf'] = round(measured['seconds'] / duration, 3)
+                        print(f"{label} {measured['load_seconds']:>7.1f}s {measured['seconds']:>8.1f}s "
+                              f"{row['rtf']:>7.3f} {measured['peak_rss_mb']:>7} MB")
+                    results.append(row)
+
+    print("-" * 80)
+    best = {}
+    for row in results:
+        if 'rtf' in row and (row['model'] not in best or row['rtf'] < best[row['model']]['rtf']):
+            best[row['model']] = row
+    if best:
+        print("🏆 Configuración más rápida:")
+        for model_name, row in best.items():
+            print(f"   • {model_name}: INFERENCE_THREADS={row['threads']} "
+                  f"INFERENCE_QUANTIZE={'1' if row['quantize'] else '0'} (RTF {row['rtf']:.3f})")
+    else:
+        print("⚠️  Ninguna configuración terminó (¿faltan torch / pyannote / whisper o HF_TOKEN?)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'audio': source, 'audio_seconds': round(duration, 2),
+                       'cores': inference_runtime.available_cores(), 'results': results},
+                      f, indent=2, ensure_ascii=False)
+        print(f"📄 Resultados guardados en {args.json}")
+
+    return 0 if best else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+# Script: benchmark_scaling.py
+# Requisitos: pip install numpy (moviepy para las etapas de video)
+# Descripción: Barrido de escalabilidad de las etapas del episodio: mide tiempo y memoria
+#              (con benchmark_episode.py) para cada combinación de duración del episodio
+#              y número de cortes de la guía, estima la pendiente log-log de cada etapa
+#              (1 = lineal, 2 = cuadrática) para detectar comportamiento superlineal, y
+#              calcula hasta qué tamaño cabe cada etapa en un presupuesto de tiempo y memoria
+# Uso: python benchmark_scaling.py
+#      python benchmark_scaling.py --minutes 10 60 180 --cuts 100 1000 10000 --stages tracks guide_report
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+import benchmark_episode
+import benchmark_fixtures
+
+# --- CONFIGURACIÓN ---
+DEFAULT_MINUTES = [10, 30, 60, 120, 180]
+DEFAULT_CUTS = [100, 300, 1000, 3000, 10000]
+DEFAULT_STAGES = ['tracks', 'cut_plan', 'guide_report']
+SUPERLINEAR_SLOPE = 1.3     # Pendiente log-log a partir de la cual se marca la etapa
+MIN_SECONDS_FOR_FIT = 0.005  # Tiempos menores son ruido de medición (no se usan en el ajuste)
+MIN_STAGE_RSS_MB = 5        # Idem para la memoria propia de la etapa
+DEFAULT_BUDGET_SECONDS = 600
+DEFAULT_BUDGET_RSS_MB = 8192
+
+
+def fit_slope(xs, ys, min_value=0):
+    """
+    Ajuste de una ley de potencia y = c·x^k en escala log-log
+
+    Returns:
+        tuple: (k, c), o None si hay menos de dos puntos útiles (>= min_value)
+    """
+    points = [(x, y) for x, y in zip(xs, ys) if x > 0 and y and y >= min_value]
+    if len(set(x for x, _ in points)) < 2:
+        return None
+    slope, intercept = np.polyfit(np.log([x for x, _ in points]), np.log([y for _, y in points]), 1)
+    return float(slope), float(np.exp(intercept))
+
+def stage_rss_mb(row):
+    """
+    Memoria pico propia de la etapa (sin la base del intérprete), o None sin medición
+    """
+    if 'peak_rss_mb' not in row:
+        return None
+    return max(row['peak_rss_mb'] - (row.get('baseline_rss_mb') or 0), 1)
+
+def axis_slopes(rows, stage, metric, axis, other_axis, min_value=0):
+    """
+    Pendiente de `metric` respecto a `axis`, una por cada valor fijo del otro eje
+
+    Args:
+        metric: Función fila -> valor (None si la fila no tiene medición)
+
+    Returns:
+        dict: {valor del otro eje: (pendiente, constante)}
+    """
+    slopes = {}
+    for fixed in sorted(set(row[other_axis] for row in rows)):
+        series = sorted((row[axis], metric(row)) for row in rows
+                        if row['stage'] == stage and row[other_axis] == fixed and metric(row) is not None)
+        fit = fit_slope([x for x, _ in series], [y for _, y in series], min_value)
+        if fit:
+            slopes[fixed] = fit
+    return slopes
+
+def fit_surface(rows, stage, metric, min_value=0):
+    """
+    Ajuste conjunto y = c·minutos^a·cortes^b (mínimos cuadrados en escala log)
+
+    Un costo minutos × cortes se ve lineal en cada eje por separado, pero crece
+    como a + b cuando los cortes aumentan con la duración (densidad constante,
+    como en los episodios reales).
+
+    Returns:
+        tuple: (a, b), o None si no hay variación en ambos ejes
+    """
+    points = [(row['minutes'], row['cuts'], metric(row)) for row in rows
+              if row['stage'] == stage and metric(row) is not None and metric(row) >= min_value]
+    if len(points) < 3 or len(set(p[0] for p in points)) < 2 or len(set(p[1] for p in points)) < 2:
+        return None
+    design = np.column_stack([np.ones(len(points)), np.log([p[0] for p in points]),
+                              np.log([p[1] for p in points])])
+    coefficients = np.linalg.lstsq(design, np.log([p[2] for p in points]), rcond=None)[0]
+    return float(coefficients[1]), float(coefficients[2])
+
+def capacity(fits, budget):
+    """
+    Mayor valor del eje que cabe en el presupuesto según el peor ajuste (el más lento)
+
+    Args:
+        fits: {valor del otro eje: (pendiente, constante)}
+        budget: Límite de la métrica (segundos o MB)
+
+    Returns:
+        float: Tamaño máximo estimado (math.inf si la curva es casi plana), o None sin ajustes
+    """
+    limits = []
+    for k, c in fits.values():
+        if k <= 0 or c <= 0:
+            continue
+        if budget <= 0:
+            limits.append(0.0)
+            continue
+        # En escala logarítmica: con una pendiente cercana a 0, (budget / c) ** (1 / k) desborda
+        exponent = (math.log(budget) - math.log(c)) / k
+        limits.append(math.exp(exponent) if exponent < math.log(sys.float_info.max) else math.inf)
+    return min(limits) if limits else None
+
+def should_skip(rows, stage, minutes, cuts):
+    """
+    Una etapa que ya agotó el tiempo con un tamaño menor (en ambos ejes) no se vuelve a medir
+    """
+    return any(row['stage'] == stage and 'timeout' in row and row['minutes'] <= minutes and row['cuts'] <= cuts
+               for row in rows)
+
+def print_table(rows, stages, minutes_list, cuts_list):
+    for stage in stages:
+        print(f"\n📊 {stage} — tiempo real (s) / RSS pico (MB)")
+        print('min / cortes'.rjust(14) + ''.join(f"{cuts:>16}" for cuts in cuts_list))
+        for minutes in minutes_list:
+            cells = []
+            for cuts in cuts_list:
+                row = next((r for r in rows if r['stage'] == stage and r['minutes'] == minutes
+                            and r['cuts'] == cuts), None)
+                if row is None:
+                    cells.append('—')
+                elif 'wall_seconds' in row:
+                    cells.append(f"{row['wall_seconds']:.3f}/{row['peak_rss_mb']}")
+                elif 'timeout' in row:
+                    cells.append('timeout')
+                elif 'skipped' in row:
+                    cells.append('omitida')
+                else:
+                    cells.append('error')
+            print(f"{minutes:>14g}" + ''.join(f"{cell:>16}" for cell in cells))
+
+def analyze(rows, stages, budget_seconds, budget_rss_mb):
+    """
+    Pendientes por etapa y eje, marcas de superlinealidad y límites de capacidad
+
+    La pendiente de memoria usa la memoria propia de la etapa (pico - base del intérprete).
+
+    Returns:
+        dict: {etapa: {'cuts_slope', 'minutes_slope', 'rss_minutes_slope', 'density_slope', 'superlinear',
+                       'max_cuts', 'max_minutes', 'max_minutes_rss'}}
+    """
+    report = {}
+    for stage in stages:
+        wall = lambda row: row.get('wall_seconds')
+        by_cuts = axis_slopes(rows, stage, wall, 'cuts', 'minutes', MIN_SECONDS_FOR_FIT)
+        by_minutes = axis_slopes(rows, stage, wall, 'minutes', 'cuts', MIN_SECONDS_FOR_FIT)
+        rss_by_minutes = axis_slopes(rows, stage, stage_rss_mb, 'minutes', 'cuts', MIN_STAGE_RSS_MB)
+        surface = fit_surface(rows, stage, wall, MIN_SECONDS_FOR_FIT)
+        baseline = max((row.get('baseline_rss_mb') or 0 for row in rows if row['stage'] == stage), default=0)
+        worst = lambda fits: max((k for k, _ in fits.values()), default=None)
+        summary = {
+            'cuts_slope': worst(by_cuts),
+            'minutes_slope': worst(by_minutes),
+            'rss_minutes_slope': worst(rss_by_minutes),
+            'density_slope': sum(surface) if surface else None,
+            'max_cuts': capacity(by_cuts, budget_seconds),
+            'max_minutes': capacity(by_minutes, budget_seconds),
+            'max_minutes_rss': capacity(rss_by_minutes, budget_rss_mb - baseline)
+        }
+        summary['superlinear'] = [axis for axis in ('cuts', 'minutes', 'density')
+                                  if (summary[f'{axis}_slope'] or 0) > SUPERLINEAR_SLOPE]
+        report[stage] = summary
+    return report
+
+def print_analysis(report, budget_seconds, budget_rss_mb):
+    fmt_slope = lambda k: '—' if k is None else f"{k:.2f}"
+    fmt_limit = lambda v: '—' if v is None else (f"{v:,.0f}" if v < 1e6 else '∞')
+    print(f"\n📈 Escalabilidad (pendiente log-log: 1 = lineal, 2 = cuadrática; k dens = cortes y minutos "
+          f"crecen juntos; presupuesto {budget_seconds:g}s / {budget_rss_mb} MB)")
+    print(f"{'Etapa':<18} {'k cortes':>8} {'k min':>6} {'k dens':>6} {'k RSS':>6} {'máx cortes':>11} "
+          f"{'máx min':>8} {'máx min RSS':>11}")
+    print("-" * 80)
+    for stage, summary in report.items():
+        flag = f"  ⚠️  superlineal en {', '.join(summary['superlinear'])}" if summary['superlinear'] else ""
+        print(f"{stage:<18} {fmt_slope(summary['cuts_slope']):>8} {fmt_slope(summary['minutes_slope']):>6} "
+              f"{fmt_slope(summary['density_slope']):>6} {fmt_slope(summary['rss_minutes_slope']):>6} "
+              f"{fmt_limit(summary['max_cuts']):>11} {fmt_limit(summary['max_minutes']):>8} "
+              f"{fmt_limit(summary['max_minutes_rss']):>11}{flag}")
+    print("-" * 80)
+    print("Los máximos se extrapolan del peor ajuste medido; usa puntos cercanos al límite para confirmarlos")
+
+def save_results(output_path, results):
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Barrido de escalabilidad por duración del episodio y número de cortes')
+    parser.add_argument('--minutes', nargs='+', type=float, default=DEFAULT_MINUTES,
+                        help=f'Duraciones a probar (default: {" ".join(map(str, DEFAULT_MINUTES))})')
+    parser.add_argument('--cuts', nargs='+', type=int, default=DEFAULT_CUTS,
+                        help=f'Cortes de la guía a probar (default: {" ".join(map(str, DEFAULT_CUTS))})')
+    parser.add_argument('--stages', nargs='+', choices=benchmark_episode.STAGES, default=DEFAULT_STAGES,
+                        help=f'Etapas a medir (default: {" ".join(DEFAULT_STAGES)}; las de video son lentas)')
+    parser.add_argument('--clips', type=int, default=benchmark_episode.DEFAULT_CLIPS)
+    parser.add_argument('--sample-rate', type=int, default=44100)
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=360)
+    parser.add_argument('--fps', type=int, default=24)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_BUDGET_SECONDS * 2,
+                        help='Segundos máximos por medición; los tamaños mayores se omiten')
+    parser.add_argument('--budget-seconds', type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help=f'Tiempo aceptable por etapa para los límites de capacidad (default: {DEFAULT_BUDGET_SECONDS})')
+    parser.add_argument('--budget-rss-mb', type=int, default=DEFAULT_BUDGET_RSS_MB,
+                        help=f'Memoria aceptable por etapa en MB (default: {DEFAULT_BUDGET_RSS_MB})')
+    parser.add_argument('--output', default=None,
+                        help=f'JSON de resultados (default: {benchmark_episode.BENCHMARK_DIR}/scaling_<fecha>_<commit>.json)')
+    args = parser.parse_args()
+
+    minutes_list = sorted(set(args.minutes))
+    cuts_list = sorted(set(args.cuts))
+    videos = any(stage in benchmark_episode.VIDEO_STAGES for stage in args.stages)
+
+    print("=" * 80)
+    print("  BENCHMARK DE ESCALABILIDAD - AI PODCAST PRODUCER")
+    print("=" * 80)
+    print(f"\nDuraciones: {', '.join(f'{m:g}' for m in minutes_list)} min · cortes: "
+          f"{', '.join(map(str, cuts_list))} · etapas: {', '.join(args.stages)}")
+
+    rows = []
+    for minutes in minutes_list:
+        for cuts in cuts_list:
+            started = time.perf_counter()
+            fixtures = benchmark_fixtures.make_fixtures(
+                benchmark_episode.FIXTURES_DIR, minutes, cuts, args.width, args.height, args.fps, args.seed,
+                sample_rate=args.sample_rate, channels=args.channels, videos=videos
+            )
+            print(f"\n--> {minutes:g} min, {cuts} cortes (fixtures en {time.perf_counter() - started:.1f}s)")
+            for stage in args.stages:
+                if should_skip(rows, stage, minutes, cuts):
+                    rows.append({'stage': stage, 'minutes': minutes, 'cuts': cuts, 'timeout': args.timeout})
+                    print(f"   ⏭️  {stage}: omitida (ya agotó el tiempo con un tamaño menor)")
+                    continue
+                measured = benchmark_episode.measure(stage, fixtures, args.clips, timeout=args.timeout)
+                rows.append({'stage': stage, 'minutes': minutes, 'cuts': cuts, **measured})
+                if 'wall_seconds' in measured:
+                    print(f"   ✓ {stage}: {measured['wall_seconds']:.3f}s, {measured['peak_rss_mb']} MB")
+                elif 'timeout' in measured:
+                    print(f"   ⚠️  {stage}: más de {args.timeout:g}s")
+                elif 'skipped' in measured:
+                    print(f"   ⏭️  {stage}: omitida ({measured['skipped'][:50]})")
+                else:
+                    print(f"   ❌ {stage}: {measured['error'][:60]}")
+
+    commit = benchmark_episode.git_revision()
+    output_path = args.output or os.path.join(
+        benchmark_episode.BENCHMARK_DIR,
+        f"scaling_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{(commit or 'local').rstrip('+')}.json"
+    )
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'budget': {'seconds': args.budget_seconds, 'rss_mb': args.budget_rss_mb},
+        'results': rows,
+        'analysis': None
+    }
+    # Las mediciones se guardan antes del análisis: si el ajuste falla, el barrido no se pierde
+    save_results(output_path, results)
+
+    print_table(rows, args.stages, minutes_list, cuts_list)
+    results['analysis'] = analyze(rows, args.stages, args.budget_seconds, args.budget_rss_mb)
+    print_analysis(results['analysis'], args.budget_seconds, args.budget_rss_mb)
+    save_results(output_path, results)
+    print(f"📄 Resultados guardados en {output_path}")
+
+    return 1 if any('error' in row for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
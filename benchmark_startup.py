@@ -0,0 +1,188 @@
+# Script: benchmark_startup.py
+# Requisitos: ninguno (solo la librería estándar)
+# Descripción: Mide el arranque de cada script del proyecto: tiempo de import (con
+#              `python -X importtime`, desglosado por paquete) y tiempo real de `--help`.
+#              Sirve para verificar que los imports pesados (torch, pyannote, whisper,
+#              moviepy, openai, notion_client) siguen diferidos y que una validación
+#              fallida o un --dry-run responden en menos de un segundo
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# --- CONFIGURACIÓN ---
+SCRIPTS = [
+    'split_audios.py',
+    'generate_subtitles.py',
+    'analyze_audio.py',
+    'model_server.py',
+    'benchmark_inference.py',
+    'benchmark_episode.py',
+    'benchmark_scaling.py',
+    'assemble_video.py',
+    'analyze_chapters.py',
+    'generate_visual_markers.py',
+    'batch_metadata.py',
+    'generate_clips.py',
+    'sync_to_notion.py',
+    'search_transcripts.py',
+    'fix_speaker_assignment.py',
+    'auto_fix_speakers.py',
+    'debug_diarization.py',
+    'pipeline.py'
+]
+STARTUP_BUDGET_SECONDS = 1.0  # Objetivo para --help / validaciones
+DEFAULT_RUNS = 5
+TOP_IMPORTS = 3
+
+IMPORTTIME_RE = re.compile(r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+def parse_importtime(stderr, module):
+    """
+    Interpreta la salida de -X importtime
+
+    Args:
+        stderr: Salida de error del intérprete
+        module: Módulo importado
+
+    Returns:
+        dict: {'total_ms', 'top': [(paquete, ms acumulados)]} con los imports directos
+              más pesados del módulo
+    """
+    total_ms = 0.0
+    children = []
+    pending = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        # La salida es post-orden y cada nivel de anidamiento suma 2 espacios de sangría:
+        # los imports directos del módulo (3 espacios) aparecen justo antes que él (1 espacio)
+        depth = len(match.group(3))
+        cumulative_ms = int(match.group(2)) / 1000
+        if depth == 3:
+            pending.append((match.group(4), cumulative_ms))
+        elif depth == 1:
+            if match.group(4) == module:
+                total_ms = cumulative_ms
+                children = pending
+            pending = []
+    return {
+        'total_ms': total_ms,
+        'top': sorted(children, key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+    }
+
+def measure_import(module):
+    """
+    Importa el módulo en un intérprete nuevo con -X importtime
+
+    Returns:
+        dict: parse_importtime() + 'error' si el import falló
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    measured = parse_importtime(result.stderr, module)
+    measured['error'] = None
+    if result.returncode != 0:
+        last_line = (result.stderr.strip().splitlines() or ['?'])[-1]
+        measured['error'] = last_line
+    return measured
+
+def measure_help(script, runs):
+    """
+    Tiempo real (mediana de `runs` ejecuciones) de `python script --help`
+
+    Returns:
+        tuple: (segundos, código de salida)
+    """
+    timings = []
+    returncode = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, script, '--help'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+        returncode = result.returncode
+    return statistics.median(timings), returncode
+
+def baseline_seconds(runs):
+    """
+    Arranque de un intérprete vacío (referencia para el costo propio de cada script)
+    """
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'])
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Mide el tiempo de arranque (imports y --help) de cada script')
+    parser.add_argument('scripts', nargs='*', default=None,
+                        help='Scripts a medir (default: todos)')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS,
+                        help=f'Ejecuciones de --help por script (se toma la mediana, default: {DEFAULT_RUNS})')
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_SECONDS,
+                        help=f'Segundos máximos para --help (default: {STARTUP_BUDGET_SECONDS})')
+    parser.add_argument('--json', default=None,
+                        help='Guardar los resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    scripts = args.scripts or SCRIPTS
+
+    print("=" * 80)
+    print("  BENCHMARK DE ARRANQUE - AI PODCAST PRODUCER")
+    print("=" * 80)
+    base = baseline_seconds(args.runs)
+    print(f"\nIntérprete vacío: {base * 1000:.0f} ms (Python {sys.version.split()[0]})\n")
+    print(f"{'Script':<28} {'--help':>8} {'import':>8}  Imports más pesados")
+    print("-" * 80)
+
+    results = []
+    over_budget = []
+    for script in scripts:
+        if not os.path.exists(script):
+            print(f"{script:<28} {'—':>8} {'—':>8}  ❌ no existe")
+            continue
+        module = os.path.splitext(script)[0]
+        imported = measure_import(module)
+        help_seconds, returncode = measure_help(script, args.runs)
+
+        slow = help_seconds > args.budget or returncode != 0
+        if slow:
+            over_budget.append(script)
+        detail = imported['error'] or ', '.join(f"{name} {ms:.0f}ms" for name, ms in imported['top'])
+        icon = "⚠️ " if slow else "✓ "
+        print(f"{script:<28} {help_seconds * 1000:>6.0f}ms {imported['total_ms']:>6.0f}ms  {icon}{detail}")
+
+        results.append({
+            'script': script,
+            'help_seconds': round(help_seconds, 4),
+            'help_returncode': returncode,
+            'import_ms': round(imported['total_ms'], 1),
+            'top_imports': [{'module': name, 'ms': round(ms, 1)} for name, ms in imported['top']],
+            'import_error': imported['error']
+        })
+
+    print("-" * 80)
+    if over_budget:
+        print(f"⚠️  Sobre el presupuesto de {args.budget:.1f}s o con error: {', '.join(over_budget)}")
+    else:
+        print(f"✓ Todos los scripts responden a --help en menos de {args.budget:.1f}s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'baseline_seconds': round(base, 4),
+                       'budget_seconds': args.budget, 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"📄 Resultados guardados en {args.json}")
+
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
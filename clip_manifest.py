@@ -0,0 +1,133 @@
+# Módulo: clip_manifest.py
+# Descripción: Manifest de clips generados (.clips_manifest.json en cada carpeta de clips).
+#              Registra por clip el hash del video fuente, inicio/fin, perfil del encoder y
+#              checksum de la salida, para que generate_clips.py solo renderice lo que cambió
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+# --- CONFIGURACIÓN ---
+MANIFEST_NAME = ".clips_manifest.json"
+MANIFEST_VERSION = 1
+
+def file_hash(path):
+    """
+    Calcula el SHA-256 del contenido de un archivo (por bloques)
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def manifest_path(clips_dir):
+    return os.path.join(clips_dir, MANIFEST_NAME)
+
+def load_manifest(clips_dir):
+    """
+    Returns:
+        dict: {'version', 'source', 'clips': {nombre_archivo: entrada}}
+    """
+    path = manifest_path(clips_dir)
+    empty = {'version': MANIFEST_VERSION, 'source': None, 'clips': {}}
+    if not os.path.exists(path):
+        return empty
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"⚠️  Manifest inválido, se regenerará: {path}")
+        return empty
+    if manifest.get('version') != MANIFEST_VERSION:
+        return empty
+    manifest.setdefault('clips', {})
+    return manifest
+
+def save_manifest(clips_dir, manifest):
+    os.makedirs(clips_dir, exist_ok=True)
+    path = manifest_path(clips_dir)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _stat_record(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def source_video_hash(video_path, manifests):
+    """
+    Hash del video fuente, reutilizando el de algún manifest si el archivo no cambió
+    (mismo tamaño y fecha de modificación): evita releer varios GB en cada ejecución
+
+    Args:
+        video_path: Video fuente
+        manifests: Manifests cargados (se actualiza su registro 'source')
+
+    Returns:
+        str: SHA-256 del video
+    """
+    record = dict(_stat_record(video_path), path=os.path.abspath(video_path))
+
+    sha = None
+    for manifest in manifests:
+        source = manifest.get('source') or {}
+        if all(source.get(k) == record[k] for k in ('path', 'size', 'mtime_ns')) and source.get('sha256'):
+            sha = source['sha256']
+            break
+
+    if sha is None:
+        sha = file_hash(video_path)
+
+    for manifest in manifests:
+        manifest['source'] = dict(record, sha256=sha)
+    return sha
+
+def is_up_to_date(manifest, filename, output_path, source_hash, start, end, profile):
+    """
+    Un clip está al día si se generó desde el mismo video, con el mismo rango y perfil
+    de encoder, y el archivo de salida sigue siendo el que se registró
+    """
+    entry = manifest['clips'].get(filename)
+    if not entry or not os.path.exists(output_path):
+        return False
+    if (entry.get('source_sha256') != source_hash or entry.get('start') != start
+            or entry.get('end') != end or entry.get('profile') != profile):
+        return False
+
+    # Si tamaño y fecha coinciden no hace falta releer el clip
+    stat = _stat_record(output_path)
+    if stat['size'] == entry.get('output_size') and stat['mtime_ns'] == entry.get('output_mtime_ns'):
+        return True
+    return file_hash(output_path) == entry.get('output_sha256')
+
+def record_clip(manifest, filename, output_path, source_hash, start, end, profile, title=None):
+    """
+    Registra (o actualiza) un clip recién generado
+    """
+    stat = _stat_record(output_path)
+    manifest['clips'][filename] = {
+        'title': title,
+        'source_sha256': source_hash,
+        'start': start,
+        'end': end,
+        'profile': profile,
+        'output_sha256': file_hash(output_path),
+        'output_size': stat['size'],
+        'output_mtime_ns': stat['mtime_ns'],
+        'updated_at': datetime.now().isoformat(timespec='seconds')
+    }
+
+def prune_missing(manifest, clips_dir):
+    """
+    Quita del manifest los clips cuyo archivo ya no existe
+
+    Returns:
+        int: Entradas eliminadas
+    """
+    missing = [name for name in manifest['clips'] if not os.path.exists(os.path.join(clips_dir, name))]
+    for name in missing:
+        del manifest['clips'][name]
+    return len(missing)
@@ -0,0 +1,247 @@
+# Módulo: clip_ranking.py
+# Requisitos: pip install numpy
+# Descripción: Pre-selección local (solo CPU, sin red) de ventanas candidatas a clip viral.
+#              Embebe ventanas de la transcripción con hashing de palabras, puntúa "ganchos"
+#              (preguntas, números, palabras de contraste, cambios de speaker) de forma
+#              vectorizada y devuelve el top-K sin solapes para que la IA solo los titule
+
+import os
+import re
+import json
+import zlib
+import hashlib
+import numpy as np
+
+import editing_guide
+
+# --- CONFIGURACIÓN ---
+EMBEDDING_DIM = 512            # Dimensión del embedding por hashing
+WINDOW_TARGET_SECONDS = 40     # Duración objetivo de cada ventana candidata
+WINDOW_MIN_SECONDS = 15        # Duración mínima aceptada (rango de clips virales: 15-60s)
+WINDOW_MAX_SECONDS = 60        # Duración máxima aceptada
+RANKING_VERSION = 1            # Cambiar si cambia el algoritmo (invalida la caché)
+
+# Palabras que suelen abrir un giro o un contraste ("ganchos" verbales en español)
+CONTRAST_WORDS = [
+    'pero', 'sin embargo', 'aunque', 'en cambio', 'no obstante', 'mientras que',
+    'la verdad', 'en realidad', 'realmente', 'imagina', 'el secreto', 'el problema',
+    'error', 'nadie', 'nunca', 'sorprendente', 'increíble', 'ojo', 'cuidado'
+]
+
+# Pesos del puntaje final (sobre features normalizadas con z-score)
+FEATURE_WEIGHTS = {
+    'questions': 1.0,
+    'numbers': 0.8,
+    'contrast': 0.9,
+    'speaker_switches': 0.6,
+    'opening_hook': 1.2,
+    'centrality': 1.0
+}
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?%?")
+CONTRAST_RE = re.compile(r"\b(" + "|".join(re.escape(w) for w in CONTRAST_WORDS) + r")\b", re.IGNORECASE)
+
+def srt_timestamp_to_seconds(timestamp_str):
+    """
+    Convierte timestamp SRT (HH:MM:SS,mmm) a segundos con decimales
+    """
+    time_part, _, millis = timestamp_str.strip().partition(',')
+    parts = [int(p) for p in time_part.split(':')]
+    while len(parts) < 3:
+        parts.insert(0, 0)
+    hours, minutes, seconds = parts
+    return hours * 3600 + minutes * 60 + seconds + (int(millis) / 1000 if millis else 0)
+
+def format_clip_timestamp(total_seconds):
+    """
+    Formatea segundos como MM:SS (o HH:MM:SS si pasa de una hora), igual que los clips de la IA
+    """
+    total_seconds = int(round(total_seconds))
+    hours, rest = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+def embed_texts(texts, dim=EMBEDDING_DIM):
+    """
+    Embedding por hashing de palabras (bag-of-words con signo), determinista y sin modelos
+
+    Args:
+        texts: Lista de textos
+        dim: Dimensión del embedding
+
+    Returns:
+        np.ndarray: Matriz (len(texts), dim) float32
+    """
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in WORD_RE.findall(text.lower()):
+            if len(word) < 3:
+                continue
+            h = zlib.crc32(word.encode('utf-8'))
+            matrix[row, h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    return matrix
+
+def load_speaker_turn_starts(editing_guide_path):
+    """
+    Lee los inicios de cambio de speaker desde editing_guide.json (si existe)
+
+    Returns:
+        np.ndarray: Segundos en los que el host activo cambia (vacío si no hay guía)
+    """
+    if not editing_guide_path or not os.path.exists(editing_guide_path):
+        return np.zeros(0)
+
+    segments = editing_guide.load_segments(editing_guide_path)
+    if not segments:
+        return np.zeros(0)
+
+    hosts = np.array([s['host'] for s in segments])
+    starts = np.array([s['start'] for s in segments], dtype=np.float64)
+    switches = np.flatnonzero(hosts[1:] != hosts[:-1]) + 1
+    return starts[switches]
+
+def _zscore(values):
+    std = values.std()
+    if std == 0:
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+def rank_candidate_windows(transcription, top_k, speaker_switch_times=None):
+    """
+    Puntúa ventanas de la transcripción y devuelve las top-K sin solapes
+
+    Args:
+        transcription: Lista de entries {'timestamp': 'HH:MM:SS,mmm', 'text': ...}
+        top_k: Número de candidatos a devolver
+        speaker_switch_times: Arreglo de segundos con cambios de speaker (opcional)
+
+    Returns:
+        list: Candidatos ordenados por puntaje [{'candidate_id', 'start', 'end', 'hook_score', 'text', 'features'}]
+    """
+    n = len(transcription)
+    if n == 0 or top_k <= 0:
+        return []
+
+    texts = [entry['text'] for entry in transcription]
+    starts = np.array([srt_timestamp_to_seconds(entry['timestamp']) for entry in transcription])
+    ends = np.append(starts[1:], starts[-1] + 5.0)
+
+    # Features por cue
+    cue_features = {
+        'questions': np.array([t.count('?') + t.count('¿') > 0 for t in texts], dtype=np.float64),
+        'numbers': np.array([len(NUMBER_RE.findall(t)) for t in texts], dtype=np.float64),
+        'contrast': np.array([len(CONTRAST_RE.findall(t)) for t in texts], dtype=np.float64)
+    }
+
+    # Ventanas: desde cada cue hasta cubrir ~WINDOW_TARGET_SECONDS (búsqueda binaria)
+    first = np.arange(n)
+    last = np.searchsorted(starts, starts + WINDOW_TARGET_SECONDS, side='left') - 1
+    last = np.maximum(last, first)
+    win_start = starts[first]
+    win_end = np.minimum(ends[last], win_start + WINDOW_MAX_SECONDS)
+    duration = win_end - win_start
+    valid = duration >= WINDOW_MIN_SECONDS
+    if not valid.any():
+        valid = np.ones(n, dtype=bool)
+
+    # Sumas por ventana con sumas prefijas (O(1) por ventana)
+    def window_sum(values):
+        prefix = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        return prefix[last + 1] - prefix[first]
+
+    minutes = np.maximum(duration, 1.0) / 60
+    features = {name: window_sum(values) / minutes for name, values in cue_features.items()}
+
+    # El gancho en los primeros segundos pesa más: pregunta o contraste en la cue inicial
+    features['opening_hook'] = cue_features['questions'] + np.minimum(cue_features['contrast'], 1)
+
+    if speaker_switch_times is not None and len(speaker_switch_times):
+        switch_times = np.sort(np.asarray(speaker_switch_times))
+        switches = (np.searchsorted(switch_times, win_end, side='left')
+                    - np.searchsorted(switch_times, win_start, side='right'))
+        features['speaker_switches'] = switches / minutes
+    else:
+        features['speaker_switches'] = np.zeros(n)
+
+    # Centralidad temática: similitud coseno de cada ventana con el centroide del episodio
+    window_vectors = window_sum(embed_texts(texts))
+    norms = np.linalg.norm(window_vectors, axis=1, keepdims=True)
+    window_vectors = window_vectors / np.where(norms == 0, 1, norms)
+    centroid = window_vectors[valid].mean(axis=0)
+    centroid_norm = np.linalg.norm(centroid)
+    features['centrality'] = window_vectors @ (centroid / centroid_norm) if centroid_norm else np.zeros(n)
+
+    # Puntaje: suma ponderada de features normalizadas (solo entre ventanas válidas)
+    zscores = {name: np.zeros(n) for name in FEATURE_WEIGHTS}
+    for name in FEATURE_WEIGHTS:
+        zscores[name][valid] = _zscore(np.asarray(features[name], dtype=np.float64)[valid])
+    score = sum(weight * zscores[name] for name, weight in FEATURE_WEIGHTS.items())
+    score[~valid] = -np.inf
+
+    # Selección greedy sin solapes (non-maximum suppression)
+    selected = []
+    for idx in np.argsort(-score, kind='stable'):
+        if not np.isfinite(score[idx]) or len(selected) >= top_k:
+            break
+        if any(win_start[idx] < win_end[j] and win_start[j] < win_end[idx] for j in selected):
+            continue
+        selected.append(idx)
+
+    candidates = []
+    for rank, idx in enumerate(selected, 1):
+        candidates.append({
+            'candidate_id': f"C{rank}",
+            'start': format_clip_timestamp(win_start[idx]),
+            'end': format_clip_timestamp(win_end[idx]),
+            'hook_score': round(float(score[idx]), 3),
+            'text': ' '.join(texts[first[idx]:last[idx] + 1]).strip(),
+            'features': {name: round(float(features[name][idx]), 3) for name in FEATURE_WEIGHTS}
+        })
+
+    return candidates
+
+def candidates_cache_key(srt_path, editing_guide_path, top_k):
+    """
+    Clave de caché: contenido de la transcripción + guía de edición + parámetros
+    """
+    digest = hashlib.sha256()
+    journal = editing_guide.journal_path(editing_guide_path) if editing_guide_path else None
+    for path in (srt_path, editing_guide_path, journal):
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    digest.update(f"{RANKING_VERSION}:{top_k}:{WINDOW_TARGET_SECONDS}:{EMBEDDING_DIM}".encode())
+    return digest.hexdigest()
+
+def load_or_rank_candidates(cache_path, srt_path, transcription, top_k, editing_guide_path=None):
+    """
+    Devuelve los candidatos desde la caché si la transcripción no cambió; si no, los calcula
+
+    Returns:
+        tuple: (candidatos, True si vinieron de la caché)
+    """
+    key = candidates_cache_key(srt_path, editing_guide_path, top_k)
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('cache_key') == key:
+                return cached['candidates'], True
+        except (OSError, json.JSONDecodeError, KeyError):
+            pass
+
+    candidates = rank_candidate_windows(
+        transcription,
+        top_k,
+        speaker_switch_times=load_speaker_turn_starts(editing_guide_path)
+    )
+
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({'cache_key': key, 'candidates': candidates}, f, indent=2, ensure_ascii=False)
+
+    return candidates, False
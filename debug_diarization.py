@@ -1,14 +1,19 @@
 # Script de debugging para analizar el archivo editing_guide.json
 # y detectar problemas en la asignación de speakers
 
-import json
 import sys
+import argparse
+import numpy as np
+
+import run_log
+import profiling
+import diarization_qa
 
 def analyze_editing_guide(json_path):
     """Analiza el archivo editing_guide.json para detectar problemas"""
 
-    with open(json_path, 'r') as f:
-        segments = json.load(f)
+    profiling.phase('load')
+    segments, guide = diarization_qa.load_guide(json_path)
 
     print("=" * 80)
     print("ANÁLISIS DE ASIGNACIÓN DE SPEAKERS")
@@ -16,57 +21,20 @@ def analyze_editing_guide(json_path):
     print(f"\nTotal de segmentos: {len(segments)}\n")
 
     # Estadísticas generales
-    host_a_count = sum(1 for s in segments if s['host'] == 'HOST_A')
-    host_b_count = sum(1 for s in segments if s['host'] == 'HOST_B')
-    host_a_duration = sum(s['duration'] for s in segments if s['host'] == 'HOST_A')
-    host_b_duration = sum(s['duration'] for s in segments if s['host'] == 'HOST_B')
+    totals = diarization_qa.host_totals(guide)
+    host_a_count, host_a_duration = totals['HOST_A']['count'], totals['HOST_A']['duration']
+    host_b_count, host_b_duration = totals['HOST_B']['count'], totals['HOST_B']['duration']
 
     print(f"HOST_A: {host_a_count} segmentos ({host_a_duration:.2f}s totales)")
     print(f"HOST_B: {host_b_count} segmentos ({host_b_duration:.2f}s totales)")
     print()
 
     # Detectar secuencias largas del mismo speaker
+    profiling.phase('suspicious_sequences')
     print("SECUENCIAS SOSPECHOSAS (>10 segmentos consecutivos del mismo host):")
     print("-" * 80)
 
-    current_host = None
-    consecutive_count = 0
-    sequence_start_idx = 0
-    sequence_start_time = 0
-
-    suspicious_sequences = []
-
-    for i, seg in enumerate(segments):
-        if seg['host'] == current_host:
-            consecutive_count += 1
-        else:
-            # Registrar secuencia si es sospechosa
-            if consecutive_count > 10:
-                suspicious_sequences.append({
-                    'host': current_host,
-                    'count': consecutive_count,
-                    'start_idx': sequence_start_idx,
-                    'end_idx': i - 1,
-                    'start_time': sequence_start_time,
-                    'end_time': segments[i-1]['end']
-                })
-
-            # Resetear contador
-            current_host = seg['host']
-            consecutive_count = 1
-            sequence_start_idx = i
-            sequence_start_time = seg['start']
-
-    # Verificar última secuencia
-    if consecutive_count > 10:
-        suspicious_sequences.append({
-            'host': current_host,
-            'count': consecutive_count,
-            'start_idx': sequence_start_idx,
-            'end_idx': len(segments) - 1,
-            'start_time': sequence_start_time,
-            'end_time': segments[-1]['end']
-        })
+    suspicious_sequences = diarization_qa.suspicious_sequences(guide, min_count=11)
 
     if suspicious_sequences:
         for seq in suspicious_sequences:
@@ -82,6 +50,7 @@ def analyze_editing_guide(json_path):
     else:
         print("✓ No se detectaron secuencias sospechosas")
 
+    profiling.phase('patterns')
     print("\n" + "=" * 80)
     print("ANÁLISIS DE PATRONES")
     print("=" * 80)
@@ -95,49 +64,52 @@ def analyze_editing_guide(json_path):
     print(f"  HOST_B: {avg_duration_b:.2f}s")
 
     # Detectar segmentos muy cortos (posibles errores)
-    very_short = [s for s in segments if s['duration'] < 0.5]
-    print(f"\nSegmentos muy cortos (<0.5s): {len(very_short)}")
-    if very_short and len(very_short) <= 10:
-        for s in very_short:
-            idx = segments.index(s)
+    very_short = diarization_qa.short_segments(guide)
+    print(f"\nSegmentos muy cortos (<{diarization_qa.SHORT_SEGMENT_SECONDS}s): {len(very_short)}")
+    if len(very_short) and len(very_short) <= 10:
+        for idx in very_short:
+            s = segments[idx]
             print(f"  [{idx}] {s['host']} - {s['start']:.2f}s - {s['end']:.2f}s (duración: {s['duration']:.2f}s)")
 
     # Análisis temporal (dividir en chunks de 60s)
+    profiling.phase('per_minute')
     print("\n" + "=" * 80)
     print("DISTRIBUCIÓN TEMPORAL (por minuto)")
     print("=" * 80)
 
-    total_duration = segments[-1]['end']
-    num_minutes = int(total_duration / 60) + 1
-
-    for minute in range(num_minutes):
-        start = minute * 60
-        end = (minute + 1) * 60
-
-        minute_segments = [s for s in segments if start <= s['start'] < end]
-        a_count = sum(1 for s in minute_segments if s['host'] == 'HOST_A')
-        b_count = sum(1 for s in minute_segments if s['host'] == 'HOST_B')
-
-        # Detectar minutos sospechosos (más del 90% es un solo host)
-        total = a_count + b_count
-        if total > 0:
-            a_ratio = a_count / total
-            b_ratio = b_count / total
-
-            warning = ""
-            if a_ratio > 0.9 or b_ratio > 0.9:
-                warning = " ⚠️  SOSPECHOSO"
-
-            print(f"Minuto {minute} ({start}s-{end}s): A={a_count}, B={b_count}{warning}")
-
-if __name__ == "__main__":
-    json_path = "./output/editing_guide.json"
+    minute_seconds = diarization_qa.MINUTE_SECONDS
+    counts = diarization_qa.per_minute_counts(guide, minute_seconds)
+    host_codes = [guide.host_code('HOST_A'), guide.host_code('HOST_B')]
+    # Detectar minutos sospechosos (más del 90% es un solo host)
+    dominant = diarization_qa.dominant_minutes(counts, host_codes)
+    lines = []
+    for minute in np.flatnonzero(counts[:, host_codes].sum(axis=1)):
+        a_count, b_count = counts[minute, host_codes]
+        warning = " ⚠️  SOSPECHOSO" if dominant[minute] else ""
+        start = minute * minute_seconds
+        lines.append(f"Minuto {minute} ({start}s-{start + minute_seconds}s): A={a_count}, B={b_count}{warning}")
+    if lines:
+        print('\n'.join(lines))
+
+def main():
+    parser = argparse.ArgumentParser(description='Detecta problemas en la asignación de speakers de editing_guide.json')
+    parser.add_argument('json_path', nargs='?', default="./output/editing_guide.json",
+                        help='Guía a analizar (default: ./output/editing_guide.json)')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('debug_diarization', args)
+    run_log.start('debug_diarization')
 
     try:
-        analyze_editing_guide(json_path)
+        analyze_editing_guide(args.json_path)
+        run_log.add_input(args.json_path)
     except FileNotFoundError:
-        print(f"❌ Error: No se encontró el archivo {json_path}")
-        sys.exit(1)
+        print(f"❌ Error: No se encontró el archivo {args.json_path}")
+        return 1
     except Exception as e:
         print(f"❌ Error: {e}")
-        sys.exit(1)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_log.finish(main()))
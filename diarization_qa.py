@@ -0,0 +1,169 @@
+# Módulo: diarization_qa.py
+# Requisitos: pip install numpy
+# Descripción: Control de calidad de la diarización sobre editing_guide.json. La guía se
+#              carga una sola vez en arreglos (inicio, fin, duración, host como código) y
+#              cada métrica es una pasada vectorizada: rachas del mismo host, totales por
+#              host, segmentos muy cortos y proporción de cada host por minuto (bincount).
+#              Lo usan split_audios.py (validación al generar la guía) y debug_diarization.py
+
+import numpy as np
+
+import editing_guide
+
+# --- CONFIGURACIÓN ---
+HOSTS = ('HOST_A', 'HOST_B')
+SHORT_SEGMENT_SECONDS = 0.5     # Segmentos más cortos son posibles errores del modelo
+DOMINANT_RATIO = 0.9            # Un minuto donde un host tiene más de esta proporción es sospechoso
+MINUTE_SECONDS = 60
+
+
+class GuideArrays:
+    """
+    Guía de edición en formato columnar
+
+    Attributes:
+        start: np.ndarray float64 con el inicio de cada segmento (segundos)
+        end: np.ndarray float64 con el final de cada segmento
+        duration: np.ndarray float64 (el campo 'duration' de la guía, o fin - inicio)
+        host: np.ndarray int64 con el código de host de cada segmento (índice en `hosts`)
+        hosts: Nombres de los hosts; HOSTS primero y después cualquier otro (ej: UNKNOWN)
+    """
+
+    def __init__(self, start, end, duration, host, hosts):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.host = host
+        self.hosts = hosts
+
+    def __len__(self):
+        return len(self.start)
+
+    def host_code(self, name):
+        """
+        Código de un host (-1 si no aparece en la guía)
+        """
+        return self.hosts.index(name) if name in self.hosts else -1
+
+
+def guide_arrays(segments):
+    """
+    Convierte la guía (lista de bloques) a GuideArrays en una sola pasada por campo
+
+    Args:
+        segments: Bloques de editing_guide.json [{'host', 'start', 'end', 'duration'}]
+
+    Returns:
+        GuideArrays
+    """
+    count = len(segments)
+    hosts = list(HOSTS) + sorted({s['host'] for s in segments} - set(HOSTS))
+    codes = {name: code for code, name in enumerate(hosts)}
+    return GuideArrays(
+        np.fromiter((s['start'] for s in segments), dtype=np.float64, count=count),
+        np.fromiter((s['end'] for s in segments), dtype=np.float64, count=count),
+        np.fromiter((s.get('duration', s['end'] - s['start']) for s in segments), dtype=np.float64, count=count),
+        np.fromiter((codes[s['host']] for s in segments), dtype=np.int64, count=count),
+        tuple(hosts)
+    )
+
+def load_guide(json_path):
+    """
+    Lee editing_guide.json con las correcciones de su diario aplicadas
+
+    Returns:
+        tuple: (lista de bloques ordenados por inicio, GuideArrays)
+    """
+    segments = editing_guide.load_segments(json_path)
+    return segments, guide_arrays(segments)
+
+def host_runs(guide):
+    """
+    Rachas de segmentos consecutivos del mismo host
+
+    Returns:
+        tuple: (índice inicial, índice final inclusivo, código de host, cantidad), todos np.ndarray
+    """
+    if not len(guide):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    changes = np.flatnonzero(guide.host[1:] != guide.host[:-1]) + 1
+    run_starts = np.concatenate(([0], changes))
+    run_ends = np.concatenate((changes, [len(guide)])) - 1
+    return run_starts, run_ends, guide.host[run_starts], run_ends - run_starts + 1
+
+def suspicious_sequences(guide, min_count):
+    """
+    Rachas largas del mismo host (probables confusiones de speaker)
+
+    Args:
+        guide: GuideArrays
+        min_count: Cantidad mínima de segmentos consecutivos para reportar la racha
+
+    Returns:
+        list: [{'start_idx', 'end_idx', 'host', 'count', 'start_time', 'end_time'}]
+    """
+    run_starts, run_ends, run_hosts, counts = host_runs(guide)
+    selected = np.flatnonzero(counts >= min_count)
+    return [{
+        'start_idx': int(run_starts[i]),
+        'end_idx': int(run_ends[i]),
+        'host': guide.hosts[run_hosts[i]],
+        'count': int(counts[i]),
+        'start_time': float(guide.start[run_starts[i]]),
+        'end_time': float(guide.end[run_ends[i]])
+    } for i in selected]
+
+def host_totals(guide):
+    """
+    Segmentos y segundos por host
+
+    Returns:
+        dict: {host: {'count', 'duration'}} para todos los hosts de la guía
+    """
+    size = len(guide.hosts)
+    counts = np.bincount(guide.host, minlength=size)
+    durations = np.bincount(guide.host, weights=guide.duration, minlength=size)
+    return {name: {'count': int(counts[code]), 'duration': float(durations[code])}
+            for code, name in enumerate(guide.hosts)}
+
+def short_segments(guide, max_duration=SHORT_SEGMENT_SECONDS):
+    """
+    Índices de los segmentos más cortos que `max_duration`
+
+    Returns:
+        np.ndarray: Índices en orden de la guía
+    """
+    return np.flatnonzero(guide.duration < max_duration)
+
+def per_minute_counts(guide, minute_seconds=MINUTE_SECONDS):
+    """
+    Segmentos de cada host por minuto (según el minuto en que empieza cada segmento)
+
+    Returns:
+        np.ndarray: Matriz int64 (minutos, hosts); una fila por minuto hasta el final de la guía
+    """
+    if not len(guide):
+        return np.zeros((0, len(guide.hosts)), dtype=np.int64)
+    num_minutes = int(max(guide.end.max(), guide.start.max()) / minute_seconds) + 1
+    minutes = (guide.start // minute_seconds).astype(np.int64)
+    size = len(guide.hosts)
+    flat = np.bincount(minutes * size + guide.host, minlength=num_minutes * size)
+    return flat.reshape(num_minutes, size)
+
+def dominant_minutes(counts, host_codes, ratio=DOMINANT_RATIO):
+    """
+    Minutos donde un solo host tiene más de `ratio` de los segmentos
+
+    Args:
+        counts: Matriz de per_minute_counts()
+        host_codes: Columnas que cuentan para la proporción (ej: HOST_A y HOST_B)
+        ratio: Proporción a partir de la cual el minuto es sospechoso
+
+    Returns:
+        np.ndarray: Máscara booleana por minuto (False en los minutos sin segmentos)
+    """
+    selected = counts[:, host_codes]
+    totals = selected.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (totals > 0) & (selected.max(axis=1, initial=0) / totals > ratio)
@@ -0,0 +1,458 @@
+# Módulo: editing_guide.py
+# Requisitos: pip install numpy
+# Descripción: Edición de editing_guide.json sin reescribir la guía. Los bloques se mantienen
+#              ordenados por inicio con arreglos auxiliares (inicios y máximo acumulado de
+#              finales) para consultar rangos con búsqueda binaria. Las operaciones (swap,
+#              relabel, split, merge, assign) resuelven los bloques que cruzan los bordes del
+#              rango y se agregan a un diario (<guía>.journal.jsonl) que se reproduce al
+#              leer la guía: corregir es anexar una línea, deshacer es quitarla y compact()
+#              vuelve a escribir la guía completa cuando hace falta
+
+import os
+import json
+import bisect
+import hashlib
+from datetime import datetime
+
+import numpy as np
+
+# --- CONFIGURACIÓN ---
+JOURNAL_SUFFIX = ".journal.jsonl"
+PARTIAL_MODES = ('split', 'contained', 'overlap')
+DEFAULT_PARTIAL = 'split'
+SNAP_SECONDS = 0.05     # Fragmentos más cortos que esto en los bordes del rango no se separan
+HOSTS = ('HOST_A', 'HOST_B')  # Hosts que se pueden asignar con relabel/assign
+SWAP_HOSTS = {'HOST_A': 'HOST_B', 'HOST_B': 'HOST_A'}
+OPERATIONS = ('swap', 'relabel', 'split', 'merge', 'assign')
+
+
+def journal_path(guide_path):
+    """
+    Ruta del diario de ediciones de una guía
+    """
+    return guide_path + JOURNAL_SUFFIX
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def content_hash(guide_path):
+    """
+    SHA-256 de la guía más su diario (igual al de la guía sola si no hay diario), para
+    claves de caché que deben invalidarse con cada corrección
+
+    Returns:
+        str: Hash, o None si la guía no existe
+    """
+    if not guide_path or not os.path.exists(guide_path):
+        return None
+    digest = hashlib.sha256()
+    for path in (guide_path, journal_path(guide_path)):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+    return digest.hexdigest()
+
+def _start_key(block):
+    return block['start']
+
+def _check_host(host):
+    if host not in HOSTS:
+        raise ValueError(f"Host inválido: {host} (usa {', '.join(HOSTS)})")
+
+def _set_bounds(block, start, end):
+    block['start'] = start
+    block['end'] = end
+    block['duration'] = end - start
+
+
+class EditingGuide:
+    """
+    Guía de edición ordenada por inicio, con consultas de rango y operaciones de corrección
+
+    Attributes:
+        segments: Bloques [{'host', 'start', 'end', 'duration'}] ordenados por inicio
+        pending: Operaciones aplicadas que todavía no están en el diario
+        replayed: Operaciones del diario aplicadas al cargar
+        stale: Líneas del diario ignoradas por corresponder a otra versión de la guía
+    """
+
+    def __init__(self, segments):
+        self.segments = sorted(segments, key=_start_key)
+        self.pending = []
+        self.replayed = 0
+        self.stale = 0
+        self._starts = None
+        self._max_ends = None
+
+    def __len__(self):
+        return len(self.segments)
+
+    def _index(self):
+        # Los arreglos solo se reconstruyen cuando cambian los bordes (split/merge)
+        if self._starts is None:
+            count = len(self.segments)
+            self._starts = np.fromiter((s['start'] for s in self.segments), dtype=np.float64, count=count)
+            ends = np.fromiter((s['end'] for s in self.segments), dtype=np.float64, count=count)
+            self._max_ends = np.maximum.accumulate(ends) if count else ends
+        return self._starts, self._max_ends
+
+    def _invalidate(self):
+        self._starts = None
+        self._max_ends = None
+
+    def query(self, start, end):
+        """
+        Bloques que se superponen con [start, end)
+
+        El máximo acumulado de los finales es no decreciente: con dos búsquedas binarias
+        queda la ventana candidata y solo se filtran los bloques de esa ventana.
+
+        Returns:
+            np.ndarray: Índices en orden de la guía
+        """
+        starts, max_ends = self._index()
+        lo = int(np.searchsorted(max_ends, start, side='right'))
+        hi = int(np.searchsorted(starts, end, side='left')) if end > start else \
+            int(np.searchsorted(starts, start, side='right'))
+        if hi <= lo:
+            return np.zeros(0, dtype=np.int64)
+        ends = np.fromiter((self.segments[i]['end'] for i in range(lo, hi)), dtype=np.float64, count=hi - lo)
+        return np.flatnonzero(ends > start) + lo
+
+    def host_at(self, time):
+        """
+        Host del último bloque que empezó antes de `time` (None si la guía está vacía)
+        """
+        starts, _ = self._index()
+        idx = int(np.searchsorted(starts, time, side='right')) - 1
+        return self.segments[max(idx, 0)]['host'] if self.segments else None
+
+    def _split_at(self, time):
+        """
+        Corta en `time` los bloques que lo contienen (sin dejar fragmentos menores a SNAP_SECONDS)
+
+        Returns:
+            int: Bloques cortados
+        """
+        pieces = []
+        for i in self.query(time, time):
+            block = self.segments[i]
+            if block['start'] + SNAP_SECONDS < time < block['end'] - SNAP_SECONDS:
+                tail = dict(block)
+                _set_bounds(tail, time, block['end'])
+                _set_bounds(block, block['start'], time)
+                pieces.append(tail)
+        for tail in pieces:
+            bisect.insort(self.segments, tail, key=_start_key)
+        if pieces:
+            self._invalidate()
+        return len(pieces)
+
+    def _select(self, start, end, partial):
+        """
+        Índices afectados por una operación de rango según el modo de superposición parcial:
+        'split' corta los bloques en los bordes, 'contained' solo toma los bloques que caen
+        dentro del rango y 'overlap' toma todo bloque que lo toque
+        """
+        if partial not in PARTIAL_MODES:
+            raise ValueError(f"Modo de superposición inválido: {partial} (usa {', '.join(PARTIAL_MODES)})")
+        if end <= start:
+            raise ValueError(f"Rango vacío: {start} - {end}")
+        if partial == 'split':
+            self._split_at(start)
+            self._split_at(end)
+        idx = self.query(start, end)
+        if partial == 'overlap':
+            return idx
+        return [i for i in idx
+                if self.segments[i]['start'] >= start - SNAP_SECONDS and self.segments[i]['end'] <= end + SNAP_SECONDS]
+
+    def _record(self, op, **args):
+        self.pending.append(dict(op=op, **args))
+
+    def swap(self, start, end, partial=DEFAULT_PARTIAL):
+        """
+        Intercambia HOST_A y HOST_B en un rango de tiempo (otros hosts no cambian)
+
+        Returns:
+            int: Bloques intercambiados
+        """
+        changed = 0
+        for i in self._select(start, end, partial):
+            block = self.segments[i]
+            if block['host'] in SWAP_HOSTS:
+                block['host'] = SWAP_HOSTS[block['host']]
+                changed += 1
+        self._record('swap', start=start, end=end, partial=partial)
+        return changed
+
+    def relabel(self, start, end, host, partial=DEFAULT_PARTIAL):
+        """
+        Asigna `host` a todos los bloques del rango
+
+        Returns:
+            int: Bloques que cambiaron de host
+        """
+        _check_host(host)
+        changed = 0
+        for i in self._select(start, end, partial):
+            if self.segments[i]['host'] != host:
+                self.segments[i]['host'] = host
+                changed += 1
+        self._record('relabel', start=start, end=end, host=host, partial=partial)
+        return changed
+
+    def split(self, time):
+        """
+        Corta en dos los bloques que contienen `time`
+
+        Returns:
+            int: Bloques cortados
+        """
+        changed = self._split_at(time)
+        self._record('split', time=time)
+        return changed
+
+    def merge(self, start, end):
+        """
+        Une los bloques consecutivos del mismo host que caen dentro del rango
+
+        Returns:
+            int: Bloques eliminados por la unión
+        """
+        idx = self._select(start, end, 'contained')
+        removed = set()
+        current = None
+        for i in idx:
+            block = self.segments[i]
+            if current is not None and current['host'] == block['host']:
+                _set_bounds(current, current['start'], max(current['end'], block['end']))
+                removed.add(i)
+            else:
+                current = block
+        if removed:
+            self.segments = [block for i, block in enumerate(self.segments) if i not in removed]
+            self._invalidate()
+        self._record('merge', start=start, end=end)
+        return len(removed)
+
+    def assign(self, changes):
+        """
+        Asigna hosts por índice de bloque (para correcciones calculadas sobre la guía
+        completa, como las de auto_fix_speakers.py)
+
+        Args:
+            changes: [[índice, host], ...]
+
+        Returns:
+            int: Bloques que cambiaron de host
+        """
+        for _, host in changes:
+            _check_host(host)
+        changed = 0
+        for i, host in changes:
+            if self.segments[i]['host'] != host:
+                self.segments[i]['host'] = host
+                changed += 1
+        self._record('assign', changes=[[int(i), host] for i, host in changes])
+        return changed
+
+    def apply(self, op):
+        """
+        Aplica una operación en formato de diario/script {'op': nombre, ...argumentos}
+
+        Returns:
+            int: Bloques afectados
+        """
+        name = op.get('op')
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida: {name} (usa {', '.join(OPERATIONS)})")
+        args = {key: value for key, value in op.items() if key not in ('op', 'ts', 'base')}
+        return getattr(self, name)(**args)
+
+
+def load(guide_path):
+    """
+    Lee la guía y reproduce su diario de ediciones
+
+    Solo se aplican las líneas del diario hechas sobre esta misma versión de la guía
+    (hash 'base'): si la guía cambió por fuera del diario, las correcciones viejas se
+    ignoran con un aviso (split_audios.py borra el diario al regenerarla).
+
+    Returns:
+        EditingGuide: Con `pending` vacío (todo lo reproducido ya está en el diario)
+    """
+    with open(guide_path, 'r') as f:
+        guide = EditingGuide(json.load(f))
+
+    path = journal_path(guide_path)
+    if os.path.exists(path):
+        base = file_sha256(guide_path)
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Línea incompleta de una escritura interrumpida
+                if entry.get('base') != base:
+                    guide.stale += 1
+                    continue
+                guide.apply(entry)
+                guide.replayed += 1
+        guide.pending = []
+        if guide.stale:
+            print(f"⚠️  {guide.stale} correcciones de {path} se ignoran: editing_guide.json cambió "
+                  f"después de hacerlas (¿editada a mano?). Usa 'fix_speaker_assignment.py --compact' "
+                  f"antes de editar la guía a mano")
+    return guide
+
+def load_segments(guide_path):
+    """
+    Bloques de la guía con las correcciones del diario aplicadas, ordenados por inicio
+    """
+    return load(guide_path).segments
+
+def append_journal(guide_path, operations):
+    """
+    Agrega operaciones al diario de la guía (una línea JSON por operación, en una sola escritura)
+
+    Returns:
+        int: Líneas agregadas
+    """
+    if not operations:
+        return 0
+    base = file_sha256(guide_path)
+    ts = datetime.now().isoformat(timespec='seconds')
+    lines = ''.join(json.dumps(dict(op, ts=ts, base=base), ensure_ascii=False) + '\n' for op in operations)
+    with open(journal_path(guide_path), 'a', encoding='utf-8') as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(operations)
+
+def save(guide, guide_path):
+    """
+    Persiste las operaciones pendientes en el diario (la guía no se reescribe)
+
+    Returns:
+        int: Líneas agregadas
+    """
+    added = append_journal(guide_path, guide.pending)
+    guide.pending = []
+    return added
+
+def read_journal(guide_path):
+    """
+    Historial de ediciones vigentes (las hechas sobre la versión actual de la guía)
+
+    Returns:
+        list: Entradas del diario en orden
+    """
+    path = journal_path(guide_path)
+    if not os.path.exists(path):
+        return []
+    base = file_sha256(guide_path)
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get('base') == base:
+                entries.append(entry)
+    return entries
+
+def undo(guide_path, count=1):
+    """
+    Quita las últimas `count` ediciones vigentes del diario
+
+    Returns:
+        list: Entradas eliminadas
+    """
+    entries = read_journal(guide_path)
+    removed = entries[len(entries) - count:] if count > 0 else []
+    path = journal_path(guide_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for entry in entries[:len(entries) - len(removed)]:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+    return removed
+
+def write_guide(guide_path, segments):
+    """
+    Escribe la guía completa (escritura atómica) y descarta su diario, que quedaría
+    apuntando a otra versión
+    """
+    os.makedirs(os.path.dirname(guide_path) or '.', exist_ok=True)
+    tmp_path = guide_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(segments, f, indent=4)
+    os.replace(tmp_path, guide_path)
+    if os.path.exists(journal_path(guide_path)):
+        os.remove(journal_path(guide_path))
+
+def compact(guide_path):
+    """
+    Materializa el diario en la guía: reescribe editing_guide.json con las correcciones
+    aplicadas y elimina el diario
+
+    Returns:
+        int: Ediciones incorporadas
+    """
+    guide = load(guide_path)
+    write_guide(guide_path, guide.segments)
+    return guide.replayed
+
+def parse_script(script_path):
+    """
+    Lee un script de ediciones en lote
+
+    Acepta JSON (lista de operaciones {'op', ...}) o texto con una operación por línea
+    ('#' para comentarios):
+        swap 160 248 [split|contained|overlap]
+        relabel 300 310.5 HOST_A [modo]
+        split 120.5
+        merge 10 20
+
+    Returns:
+        list: Operaciones [{'op', ...}]
+    """
+    with open(script_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if content.lstrip().startswith('['):
+        return json.loads(content)
+
+    operations = []
+    for number, raw in enumerate(content.splitlines(), 1):
+        words = raw.split('#', 1)[0].split()
+        if not words:
+            continue
+        name, args = words[0].lower(), words[1:]
+        try:
+            if name == 'swap' and len(args) in (2, 3):
+                op = {'op': 'swap', 'start': float(args[0]), 'end': float(args[1])}
+                if len(args) == 3:
+                    op['partial'] = args[2]
+            elif name == 'relabel' and len(args) in (3, 4):
+                _check_host(args[2])
+                op = {'op': 'relabel', 'start': float(args[0]), 'end': float(args[1]), 'host': args[2]}
+                if len(args) == 4:
+                    op['partial'] = args[3]
+            elif name == 'split' and len(args) == 1:
+                op = {'op': 'split', 'time': float(args[0])}
+            elif name == 'merge' and len(args) == 2:
+                op = {'op': 'merge', 'start': float(args[0]), 'end': float(args[1])}
+            else:
+                raise ValueError
+        except ValueError as e:
+            detail = f" ({e})" if str(e).startswith('Host') else ""
+            raise ValueError(f"{script_path}:{number}: operación inválida: {raw.strip()}{detail}")
+        operations.append(op)
+    return operations
@@ -4,31 +4,21 @@ Script para corregir asignaciones incorrectas de speakers en editing_guide.json
 
 Uso:
     python3 fix_speaker_assignment.py --swap-range 160 248
+    python3 fix_speaker_assignment.py --relabel 300 310.5 HOST_A
+    python3 fix_speaker_assignment.py --script correcciones.txt
+    python3 fix_speaker_assignment.py --undo
 
-Este script intercambia los hosts en un rango específico de tiempo.
+Las correcciones se agregan al diario editing_guide.json.journal.jsonl (editing_guide.py)
+en lugar de reescribir la guía: cada script que lee la guía las aplica al cargarla.
 """
 
-import json
+import os
 import argparse
-import shutil
-from datetime import datetime
-
-def swap_hosts_in_range(segments, start_time, end_time):
-    """Intercambia HOST_A y HOST_B en un rango de tiempo específico"""
-    swapped_count = 0
-
-    for seg in segments:
-        # Si el segmento está dentro o se superpone con el rango
-        if seg['start'] >= start_time and seg['end'] <= end_time:
-            # Intercambiar
-            if seg['host'] == 'HOST_A':
-                seg['host'] = 'HOST_B'
-                swapped_count += 1
-            elif seg['host'] == 'HOST_B':
-                seg['host'] = 'HOST_A'
-                swapped_count += 1
-
-    return swapped_count
+
+import run_log
+import profiling
+import editing_guide
+import debug_diarization
 
 def analyze_segments(segments):
     """Muestra estadísticas de los segmentos"""
@@ -40,6 +30,39 @@ def analyze_segments(segments):
     print(f"  HOST_A: {host_a_count} segmentos")
     print(f"  HOST_B: {host_b_count} segmentos")
 
+def describe(op):
+    """Descripción de una operación para la consola"""
+    partial = f" [{op['partial']}]" if 'partial' in op else ""
+    if op['op'] == 'swap':
+        return f"swap {op['start']}s - {op['end']}s{partial}"
+    if op['op'] == 'relabel':
+        return f"relabel {op['start']}s - {op['end']}s -> {op['host']}{partial}"
+    if op['op'] == 'split':
+        return f"split en {op['time']}s"
+    if op['op'] == 'merge':
+        return f"merge {op['start']}s - {op['end']}s"
+    return f"{op['op']} ({len(op.get('changes', []))} bloques)"
+
+def requested_operations(args):
+    """Operaciones pedidas por línea de comandos, en orden: flags y después el script"""
+    operations = []
+    if args.swap_range:
+        operations.append({'op': 'swap', 'start': args.swap_range[0], 'end': args.swap_range[1],
+                           'partial': args.partial})
+    if args.relabel:
+        if args.relabel[2] not in editing_guide.HOSTS:
+            raise ValueError(f"Host inválido: {args.relabel[2]} (usa {', '.join(editing_guide.HOSTS)})")
+        operations.append({'op': 'relabel', 'start': float(args.relabel[0]), 'end': float(args.relabel[1]),
+                           'host': args.relabel[2], 'partial': args.partial})
+    if args.split is not None:
+        operations.append({'op': 'split', 'time': args.split})
+    if args.merge:
+        operations.append({'op': 'merge', 'start': args.merge[0], 'end': args.merge[1]})
+    if args.script:
+        operations += [dict({'partial': args.partial}, **op) if op.get('op') in ('swap', 'relabel') else op
+                       for op in editing_guide.parse_script(args.script)]
+    return operations
+
 def main():
     parser = argparse.ArgumentParser(
         description='Corrige asignaciones incorrectas de speakers en editing_guide.json'
@@ -51,6 +74,56 @@ def main():
         metavar=('START', 'END'),
         help='Intercambiar hosts en el rango de tiempo especificado (en segundos)'
     )
+    parser.add_argument(
+        '--relabel',
+        nargs=3,
+        metavar=('START', 'END', 'HOST'),
+        help='Asignar un host a todo el rango de tiempo especificado'
+    )
+    parser.add_argument(
+        '--split',
+        type=float,
+        metavar='TIME',
+        help='Cortar en dos el bloque que contiene ese segundo'
+    )
+    parser.add_argument(
+        '--merge',
+        nargs=2,
+        type=float,
+        metavar=('START', 'END'),
+        help='Unir los bloques consecutivos del mismo host dentro del rango'
+    )
+    parser.add_argument(
+        '--script',
+        default=None,
+        help='Archivo con ediciones en lote (una operación por línea o lista JSON)'
+    )
+    parser.add_argument(
+        '--partial',
+        choices=editing_guide.PARTIAL_MODES,
+        default=editing_guide.DEFAULT_PARTIAL,
+        help=('Bloques que cruzan el borde del rango: split los corta, contained los deja '
+              f'igual, overlap los cambia completos (default: {editing_guide.DEFAULT_PARTIAL})')
+    )
+    parser.add_argument(
+        '--undo',
+        nargs='?',
+        type=int,
+        const=1,
+        default=None,
+        metavar='N',
+        help='Deshacer las últimas N correcciones del diario (default: 1)'
+    )
+    parser.add_argument(
+        '--history',
+        action='store_true',
+        help='Mostrar las correcciones del diario'
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Escribir la guía con las correcciones aplicadas y vaciar el diario'
+    )
     parser.add_argument(
         '--input',
         default='./output/editing_guide.json',
@@ -59,61 +132,96 @@ def main():
     parser.add_argument(
         '--output',
         default=None,
-        help='Archivo JSON de salida (default: sobrescribe el original)'
+        help='Archivo JSON de salida con las correcciones aplicadas (default: diario de la guía de entrada)'
     )
 
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiling.start('fix_speaker_assignment', args)
+    run_log.start('fix_speaker_assignment')
 
-    # Determinar archivo de salida
-    output_file = args.output if args.output else args.input
-
-    # Leer archivo
-    try:
-        with open(args.input, 'r') as f:
-            segments = json.load(f)
-    except FileNotFoundError:
+    if not os.path.exists(args.input):
         print(f"❌ Error: No se encontró el archivo {args.input}")
         return 1
-    except json.JSONDecodeError:
-        print(f"❌ Error: El archivo {args.input} no es un JSON válido")
+    journal = editing_guide.journal_path(args.input)
+
+    if args.history:
+        entries = editing_guide.read_journal(args.input)
+        print(f"📜 {len(entries)} correcciones en {journal}")
+        for number, entry in enumerate(entries, 1):
+            print(f"   {number}. {entry['ts']}  {describe(entry)}")
+        return 0
+
+    if args.undo is not None:
+        removed = editing_guide.undo(args.input, args.undo)
+        for entry in removed:
+            print(f"↩️  Deshecho: {describe(entry)}")
+        print(f"✓ {len(removed)} correcciones quitadas de {journal}")
+        run_log.add_output(journal)
+        return 0
+
+    if args.compact:
+        applied = editing_guide.compact(args.input)
+        print(f"✓ {applied} correcciones incorporadas a {args.input} (diario vaciado)")
+        run_log.add_output(args.input)
+        return 0
+
+    # Leer archivo (con las correcciones anteriores del diario)
+    profiling.phase('load')
+    try:
+        guide = editing_guide.load(args.input)
+        operations = requested_operations(args)
+    except FileNotFoundError as e:
+        print(f"❌ Error: No se encontró el archivo {e.filename}")
+        return 1
+    except ValueError as e:
+        # json.JSONDecodeError también es ValueError
+        print(f"❌ Error: {e}")
         return 1
 
     print(f"📂 Archivo cargado: {args.input}")
-    analyze_segments(segments)
+    if guide.replayed:
+        print(f"   {guide.replayed} correcciones previas aplicadas desde {journal}")
+    run_log.add_input(args.input)
+    analyze_segments(guide.segments)
 
-    # Hacer backup del original
-    if args.input == output_file:
-        backup_file = f"{args.input}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        shutil.copy(args.input, backup_file)
-        print(f"\n💾 Backup creado: {backup_file}")
+    if not operations:
+        print("\n⚠️  No se especificaron acciones. Usa --swap-range, --relabel, --split, --merge o --script.")
+        print("Ejemplo: python3 fix_speaker_assignment.py --swap-range 160 248")
+        return 0
 
     # Procesar según los argumentos
-    if args.swap_range:
-        start_time, end_time = args.swap_range
-        print(f"\n🔄 Intercambiando hosts en rango {start_time}s - {end_time}s...")
-
-        swapped_count = swap_hosts_in_range(segments, start_time, end_time)
-        print(f"   ✓ {swapped_count} segmentos intercambiados")
-
-        # Guardar archivo modificado
-        with open(output_file, 'w') as f:
-            json.dump(segments, f, indent=4)
-
-        print(f"\n💾 Archivo guardado: {output_file}")
-        analyze_segments(segments)
+    profiling.phase('edit')
+    changed_total = 0
+    for op in operations:
+        try:
+            changed = guide.apply(op)
+        except (ValueError, TypeError, IndexError) as e:
+            print(f"❌ Error en {op}: {e}")
+            return 1
+        print(f"\n🔄 {describe(op)}: {changed} bloques")
+        changed_total += changed
+
+    # Guardar: solo se anexan las operaciones al diario (la guía original no se toca)
+    if args.output and args.output != args.input:
+        editing_guide.write_guide(args.output, guide.segments)
+        output_file = args.output
+    else:
+        editing_guide.save(guide, args.input)
+        output_file = journal
 
-        # Ejecutar análisis de debug
-        print("\n" + "="*80)
-        print("EJECUTANDO ANÁLISIS DE VALIDACIÓN")
-        print("="*80)
-        import subprocess
-        subprocess.run(['python3', 'debug_diarization.py'])
+    print(f"\n💾 Guardado: {output_file}")
+    run_log.add_output(output_file)
+    run_log.count(operations=len(operations), swapped=changed_total)
+    analyze_segments(guide.segments)
 
-    else:
-        print("\n⚠️  No se especificaron acciones. Usa --swap-range para intercambiar hosts.")
-        print("Ejemplo: python3 fix_speaker_assignment.py --swap-range 160 248")
+    # Análisis de validación en el mismo proceso, sobre la guía corregida
+    print("\n" + "="*80)
+    print("EJECUTANDO ANÁLISIS DE VALIDACIÓN")
+    print("="*80)
+    debug_diarization.analyze_editing_guide(args.output or args.input)
 
     return 0
 
 if __name__ == '__main__':
-    exit(main())
+    exit(run_log.finish(main()))
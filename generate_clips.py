@@ -3,12 +3,26 @@
 # Descripción: Genera clips de video automáticamente desde el metadata.json
 
 import os
+import io
+import sys
 import json
 import re
+import time
+import argparse
 import unicodedata
-from moviepy.editor import VideoFileClip
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+import run_log
+import profiling
+import smart_render
+import vertical_render
+import single_pass_render
+import subtitle_render
+import clip_manifest
+import editing_guide
+
 # --- CONFIGURACIÓN ---
 INPUT_DIR = "./input"
 OUTPUT_DIR = "./output"
@@ -16,6 +30,12 @@ VIDEO_DIR = "./output"  # El video final está en /output después de assemble_v
 METADATA_DIR = "./output/metadata"
 CLIPS_DIR = "./output/clips"
 VIRAL_CLIPS_DIR = "./output/viral_clips"
+TRANSCRIPTIONS_DIR = "./output/transcriptions"
+EDITING_GUIDE_PATH = "./output/editing_guide.json"
+
+# Render en paralelo: hilos de libx264 por clip y memoria estimada por worker
+ENCODER_THREADS = 4
+WORKER_BASE_MEMORY_MB = 400
 
 def sanitize_filename(filename):
     """
@@ -108,7 +128,52 @@ def find_video_file(base_filename):
 
     return None
 
-def generate_clip(video_clip, clip_info, output_path, clip_type="clip"):
+def clip_filename(clip_info, clip_type):
+    """
+    Nombre de archivo del clip a partir de su título SEO (o título)
+    """
+    title = clip_info.get('seo_title', clip_info.get('title', 'Sin título'))
+    sanitized_title = sanitize_filename(title)
+    return f"{clip_type}_{sanitized_title}.mp4"
+
+def resolve_clip(clip_info, output_path, clip_type, video_duration):
+    """
+    Valida los timestamps del clip y arma el nombre de archivo de salida
+
+    Args:
+        clip_info: Diccionario con información del clip (start, end, title, etc.)
+        output_path: Directorio de salida
+        clip_type: Tipo de clip ("clip" o "viral_clip")
+        video_duration: Duración del video fuente (segundos)
+
+    Returns:
+        dict: {'start', 'end', 'filename', 'full_path'} o None si los timestamps son inválidos
+    """
+    # Convertir timestamps a segundos
+    start_time = timestamp_to_seconds(clip_info['start'])
+    end_time = timestamp_to_seconds(clip_info['end'])
+
+    # Validar timestamps
+    if start_time >= end_time:
+        print(f"⚠️  Timestamps inválidos para '{clip_info.get('title', 'Sin título')}': {clip_info['start']} - {clip_info['end']}")
+        return None
+
+    if end_time > video_duration:
+        print(f"⚠️  End time ({clip_info['end']}) excede la duración del video para '{clip_info.get('title', 'Sin título')}'")
+        end_time = video_duration
+
+    # Nombre asignado por assign_output_filenames() (ya sin colisiones) o el derivado del título
+    filename = clip_info.get('output_filename') or clip_filename(clip_info, clip_type)
+
+    return {
+        'start': start_time,
+        'end': end_time,
+        'filename': filename,
+        'full_path': os.path.join(output_path, filename)
+    }
+
+def generate_clip(video_clip, clip_info, output_path, clip_type="clip", threads=ENCODER_THREADS,
+                  source_path=None, vertical=None, subtitles=None):
     """
     Genera un clip individual de video
 
@@ -117,31 +182,59 @@ def generate_clip(video_clip, clip_info, output_path, clip_type="clip"):
         clip_info: Diccionario con información del clip (start, end, title, etc.)
         output_path: Ruta donde guardar el clip
         clip_type: Tipo de clip ("clip" o "viral_clip")
+        threads: Hilos del encoder libx264
+        source_path: Ruta del video fuente; si se indica se intenta primero el smart render
+                     (stream copy + recodificar solo cabeza/cola) y moviepy queda como respaldo
+        vertical: Opciones del render vertical 9:16 {'editing_guide'} (requiere source_path)
+        subtitles: Subtítulos a quemar {'srt', 'editing_guide'} (None = sin subtítulos)
     """
     try:
-        # Convertir timestamps a segundos
-        start_time = timestamp_to_seconds(clip_info['start'])
-        end_time = timestamp_to_seconds(clip_info['end'])
-
-        # Validar timestamps
-        if start_time >= end_time:
-            print(f"⚠️  Timestamps inválidos para '{clip_info.get('title', 'Sin título')}': {clip_info['start']} - {clip_info['end']}")
+        resolved = resolve_clip(clip_info, output_path, clip_type, video_clip.duration)
+        if not resolved:
             return False
+        start_time, end_time = resolved['start'], resolved['end']
+        filename, full_path = resolved['filename'], resolved['full_path']
+
+        print(f"   Extrayendo: {clip_info['start']} - {clip_info['end']} ({end_time - start_time:.1f}s)")
 
-        if end_time > video_clip.duration:
-            print(f"⚠️  End time ({clip_info['end']}) excede la duración del video para '{clip_info.get('title', 'Sin título')}'")
-            end_time = video_clip.duration
+        # Short vertical 9:16: recorte que sigue al host en cámara, en un solo encode
+        if vertical is not None and source_path:
+            info = vertical_render.render_vertical_clip(
+                source_path, start_time, end_time, full_path,
+                editing_guide_path=vertical.get('editing_guide'),
+                srt_path=subtitles['srt'] if subtitles else None,
+                threads=threads
+            )
+            subtitle_note = ", con subtítulos" if info['subtitles'] else ""
+            print(f"   📐 Vertical 9:16: {info['camera_switches']} cambios de cámara{subtitle_note}")
+            print(f"   ✓ Generado: {filename}")
+            return True
+
+        # Camino rápido: copiar los GOPs completos sin recodificar
+        if source_path:
+            try:
+                plan = smart_render.render_clip(source_path, start_time, end_time, full_path, threads=threads)
+            except Exception as e:
+                print(f"   ⚠️  Smart render no disponible ({e}), usando render normal")
+                plan = None
+
+            if plan:
+                copied = plan['copy'][1] - plan['copy'][0]
+                reencoded = (plan['end'] - plan['start']) - copied
+                print(f"   ⚡ Smart render: {copied:.1f}s copiados, {reencoded:.1f}s recodificados")
+                print(f"   ✓ Generado: {filename}")
+                return True
+
+        # Subtítulos: el .ass del episodio se quema en el mismo encode de moviepy
+        ffmpeg_params = None
+        if subtitles:
+            ass_path = subtitle_render.clip_ass(subtitles['srt'], subtitles['editing_guide'],
+                                                video_clip.w, video_clip.h, start_time, end_time)
+            ffmpeg_params = ['-vf', subtitle_render.ass_filter(ass_path)]
 
         # Extraer subclip
-        print(f"   Extrayendo: {clip_info['start']} - {clip_info['end']} ({end_time - start_time:.1f}s)")
         subclip = video_clip.subclip(start_time, end_time)
 
-        # Generar nombre de archivo
-        title = clip_info.get('seo_title', clip_info.get('title', 'Sin título'))
-        sanitized_title = sanitize_filename(title)
-        filename = f"{clip_type}_{sanitized_title}.mp4"
-        full_path = os.path.join(output_path, filename)
-
         # Exportar clip
         print(f"   Guardando: {filename}")
         subclip.write_videofile(
@@ -150,7 +243,8 @@ def generate_clip(video_clip, clip_info, output_path, clip_type="clip"):
             audio_codec="aac",
             fps=24,
             preset="medium",
-            threads=4,
+            threads=threads,
+            ffmpeg_params=ffmpeg_params,
             logger=None  # Suprimir logs verbosos de moviepy
         )
 
@@ -161,25 +255,368 @@ def generate_clip(video_clip, clip_info, output_path, clip_type="clip"):
         print(f"   ❌ Error generando clip '{clip_info.get('title', 'Sin título')}': {e}")
         return False
 
+def available_memory_mb():
+    """
+    Memoria disponible del sistema en MB (None si no se puede determinar)
+    """
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def recommended_workers(num_jobs, width, height):
+    """
+    Calcula cuántos clips codificar a la vez según núcleos y memoria disponibles
+
+    Cada worker mantiene abierto su propio decoder del video fuente y algunos
+    frames en memoria; los hilos de libx264 se reparten entre los workers para
+    no sobresuscribir la CPU.
+
+    Args:
+        num_jobs: Número de clips a generar
+        width: Ancho del video en píxeles
+        height: Alto del video en píxeles
+
+    Returns:
+        tuple: (workers, hilos del encoder por worker)
+    """
+    cores = os.cpu_count() or 1
+    workers = max(1, min(num_jobs, cores // 2))
+
+    memory_mb = available_memory_mb()
+    if memory_mb:
+        frame_mb = width * height * 3 / (1024 * 1024)
+        per_worker_mb = WORKER_BASE_MEMORY_MB + frame_mb * 60  # buffer del decoder + encoder
+        workers = max(1, min(workers, int(memory_mb * 0.8 // per_worker_mb)))
+
+    threads = max(1, cores // workers)
+    return workers, threads
+
+def plan_clip_jobs(viral_clips, chapter_clips, smart_render_chapters=True, vertical=None, subtitles=None):
+    """
+    Lista de trabajos de render (clips virales primero, luego capítulos)
+
+    Args:
+        viral_clips: Clips virales del metadata
+        chapter_clips: Clips de capítulo del metadata
+        smart_render_chapters: Usar smart render en los clips de capítulo
+        vertical: Opciones del render vertical para los clips virales (None = horizontal)
+        subtitles: Subtítulos a quemar en todos los clips {'srt', 'editing_guide'} (None = sin subtítulos).
+                   Quemarlos exige recodificar, así que desactiva el smart render
+
+    Returns:
+        list: Trabajos {'clip', 'output_dir', 'clip_type', 'group', 'index', 'group_total',
+              'smart_render', 'vertical', 'subtitles'}
+    """
+    jobs = []
+    for idx, clip in enumerate(viral_clips, 1):
+        jobs.append({'clip': clip, 'output_dir': VIRAL_CLIPS_DIR, 'clip_type': 'viral_clip',
+                     'group': 'viral', 'index': idx, 'group_total': len(viral_clips),
+                     'smart_render': False, 'vertical': vertical, 'subtitles': subtitles})
+    for idx, clip in enumerate(chapter_clips, 1):
+        jobs.append({'clip': clip, 'output_dir': CLIPS_DIR, 'clip_type': 'clip',
+                     'group': 'chapter', 'index': idx, 'group_total': len(chapter_clips),
+                     'smart_render': smart_render_chapters and not subtitles, 'vertical': None,
+                     'subtitles': subtitles})
+    return jobs
+
+def assign_output_filenames(jobs):
+    """
+    Asigna a cada trabajo un nombre de archivo único dentro de su carpeta
+
+    Dos títulos distintos pueden sanitizarse al mismo nombre (ej: "¿Qué es IA?" y
+    "Que es IA"). En lugar de sobrescribir, el primero (en orden del metadata)
+    conserva el nombre y los siguientes reciben _2, _3... Se compara sin
+    distinguir mayúsculas porque macOS y Windows tampoco lo hacen.
+
+    Returns:
+        int: Número de colisiones resueltas
+    """
+    taken = set()
+    collisions = 0
+
+    for job in jobs:
+        filename = clip_filename(job['clip'], job['clip_type'])
+        stem, ext = os.path.splitext(filename)
+        candidate = filename
+        suffix = 2
+        while (job['output_dir'], candidate.lower()) in taken:
+            candidate = f"{stem}_{suffix}{ext}"
+            suffix += 1
+
+        if candidate != filename:
+            collisions += 1
+            print(f"   ⚠️  Nombre repetido '{filename}': se guardará como '{candidate}'")
+
+        taken.add((job['output_dir'], candidate.lower()))
+        job['clip'] = dict(job['clip'], output_filename=candidate)
+
+    return collisions
+
+def encoder_profile(job, single_pass):
+    """
+    Describe cómo se renderiza un clip; si cambia, el clip se vuelve a generar
+
+    Returns:
+        dict: Perfil serializable (se guarda en el manifest)
+    """
+    if single_pass:
+        profile = {'engine': 'single_pass', 'crf': single_pass_render.VIDEO_CRF,
+                   'preset': single_pass_render.VIDEO_PRESET}
+    else:
+        profile = {'engine': 'moviepy', 'fps': 24, 'preset': 'medium'}
+    profile['smart_render'] = job['smart_render']
+
+    def optional_hash(path):
+        return clip_manifest.file_hash(path) if path and os.path.exists(path) else None
+
+    vertical = job['vertical']
+    if vertical:
+        profile['vertical'] = {
+            'size': f"{vertical_render.VERTICAL_WIDTH}x{vertical_render.VERTICAL_HEIGHT}",
+            'crf': vertical_render.VIDEO_CRF,
+            'crop_centers': vertical_render.HOST_CROP_CENTER,
+            'editing_guide_sha256': editing_guide.content_hash(vertical.get('editing_guide'))
+        }
+
+    subtitles = job['subtitles']
+    if subtitles:
+        profile['subtitles'] = {
+            'style_version': subtitle_render.STYLE_VERSION,
+            'colors': subtitle_render.HOST_COLORS,
+            'srt_sha256': optional_hash(subtitles['srt']),
+            'editing_guide_sha256': editing_guide.content_hash(subtitles['editing_guide'])
+        }
+    return profile
+
+def filter_up_to_date(jobs, manifests, source_hash, single_pass, force=False):
+    """
+    Separa los trabajos que hay que renderizar de los que ya están al día
+
+    Returns:
+        tuple: (trabajos pendientes, número de clips omitidos)
+    """
+    pending = []
+    skipped = 0
+    for job in jobs:
+        job['profile'] = encoder_profile(job, single_pass)
+        filename = job['clip']['output_filename']
+        output_path = os.path.join(job['output_dir'], filename)
+        if not force and clip_manifest.is_up_to_date(manifests[job['output_dir']], filename, output_path,
+                                                     source_hash, job['clip']['start'], job['clip']['end'],
+                                                     job['profile']):
+            skipped += 1
+            continue
+        pending.append(job)
+    return pending, skipped
+
+def record_completed(jobs, manifests, source_hash):
+    """
+    Registra en el manifest de su carpeta los clips generados correctamente
+    """
+    for job in jobs:
+        filename = job['clip']['output_filename']
+        output_path = os.path.join(job['output_dir'], filename)
+        if os.path.exists(output_path):
+            clip_manifest.record_clip(manifests[job['output_dir']], filename, output_path, source_hash,
+                                      job['clip']['start'], job['clip']['end'], job['profile'],
+                                      title=job['clip'].get('title'))
+    for clips_dir, manifest in manifests.items():
+        clip_manifest.save_manifest(clips_dir, manifest)
+
+# Estado por proceso worker: cada uno abre el video fuente una sola vez y lo reutiliza
+_worker_video = None
+_worker_video_path = None
+_worker_threads = ENCODER_THREADS
+
+def _init_render_worker(video_path, threads):
+    global _worker_video, _worker_video_path, _worker_threads
+    from moviepy.editor import VideoFileClip
+    _worker_video = VideoFileClip(video_path)
+    _worker_video_path = video_path
+    _worker_threads = threads
+
+def _render_job(job):
+    """
+    Renderiza un trabajo dentro de un worker y devuelve su log capturado
+    """
+    log = io.StringIO()
+    started_at = time.time()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        try:
+            ok = generate_clip(_worker_video, job['clip'], job['output_dir'],
+                               clip_type=job['clip_type'], threads=_worker_threads,
+                               source_path=_worker_video_path if job['smart_render'] or job['vertical'] else None,
+                               vertical=job['vertical'], subtitles=job['subtitles'])
+        except Exception as e:
+            print(f"   ❌ Error inesperado en el worker: {e}")
+            ok = False
+    return {'ok': ok, 'log': log.getvalue(), 'elapsed': time.perf_counter() - started,
+            'started_at': started_at, 'pid': os.getpid()}
+
+def render_clips_parallel(video_path, jobs, workers, threads):
+    """
+    Codifica varios clips a la vez con un pool de procesos
+
+    Args:
+        video_path: Ruta del video fuente
+        jobs: Trabajos de plan_clip_jobs()
+        workers: Número de procesos
+        threads: Hilos de libx264 por proceso
+
+    Returns:
+        tuple: (success_count, fail_count, trabajos completados)
+    """
+    success_count = 0
+    fail_count = 0
+    completed = []
+    total = len(jobs)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                             initargs=(video_path, threads)) as pool:
+        futures = {pool.submit(_render_job, job): job for job in jobs}
+
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            icon = "📱" if job['group'] == 'viral' else "📺"
+            print(f"\n[{done}/{total}] {icon} {job['clip'].get('title', 'Sin título')}")
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'ok': False, 'log': f"   ❌ El worker falló: {e}\n", 'elapsed': 0}
+
+            print(result['log'], end='')
+            if 'started_at' in result:
+                profiling.add_event('clip', result['started_at'], result['elapsed'], pid=result['pid'],
+                                    title=job['clip'].get('title', 'Sin título'), ok=result['ok'])
+            if result['ok']:
+                print(f"   ⏱️  {result['elapsed']:.1f}s")
+                success_count += 1
+                completed.append(job)
+            else:
+                fail_count += 1
+
+    return success_count, fail_count, completed
+
+def render_clips_single_pass(video_path, jobs, video_duration, threads=None):
+    """
+    Genera los clips con una sola decodificación del video (single_pass_render)
+
+    Los clips de capítulo con smart render se cortan primero por ese camino (casi no
+    decodifican); el resto se renderiza repartiendo los frames de la unión de rangos.
+
+    Args:
+        video_path: Ruta del video fuente
+        jobs: Trabajos de plan_clip_jobs()
+        video_duration: Duración del video fuente (segundos)
+        threads: Hilos de libx264 por encoder (default: automático)
+
+    Returns:
+        tuple: (success_count, fail_count, trabajos completados)
+    """
+    success_count = 0
+    fail_count = 0
+    completed = []
+    pending = []
+
+    for job in jobs:
+        clip_info = job['clip']
+        resolved = resolve_clip(clip_info, job['output_dir'], job['clip_type'], video_duration)
+        if not resolved:
+            fail_count += 1
+            continue
+
+        if job['smart_render']:
+            try:
+                plan = smart_render.render_clip(video_path, resolved['start'], resolved['end'],
+                                                resolved['full_path'], threads=threads or ENCODER_THREADS)
+            except Exception as e:
+                print(f"   ⚠️  Smart render no disponible para '{clip_info.get('title', 'Sin título')}' ({e})")
+                plan = None
+            if plan:
+                print(f"   ⚡ Smart render: {resolved['filename']}")
+                success_count += 1
+                completed.append(job)
+                continue
+
+        pending.append((job, resolved))
+
+    if not pending:
+        return success_count, fail_count, completed
+
+    clips = [{'start': r['start'], 'end': r['end'], 'output_path': r['full_path'],
+              'vertical': job['vertical'], 'subtitles': job['subtitles']}
+             for job, r in pending]
+    print(f"\n   Render en una pasada: {len(clips)} clips...")
+    started = time.perf_counter()
+    with profiling.span('render_single_pass', clips=len(clips)):
+        results, stats = single_pass_render.render_single_pass(video_path, clips, threads=threads)
+
+    for (job, resolved), result in zip(pending, results):
+        icon = "📱" if job['group'] == 'viral' else "📺"
+        if result['ok']:
+            print(f"   ✓ {icon} Generado: {resolved['filename']}")
+            success_count += 1
+            completed.append(job)
+        else:
+            print(f"   ❌ {icon} Error generando '{job['clip'].get('title', 'Sin título')}': {result['error']}")
+            fail_count += 1
+
+    print(f"\n   Decodificado: {stats['decoded_seconds']:.1f}s de video en {stats['ranges']} rangos "
+          f"(vs {stats['clip_seconds']:.1f}s sumando los clips)")
+    print(f"   Encoders simultáneos: {stats['max_encoders']}")
+    print(f"   Tiempo total de render: {time.perf_counter() - started:.1f}s")
+    return success_count, fail_count, completed
+
 def main():
+    parser = argparse.ArgumentParser(
+        description='Genera clips virales y de capítulo desde el metadata.json'
+    )
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Clips codificados a la vez (default: 0 = automático según CPU y memoria)')
+    parser.add_argument('--no-smart-render', action='store_true',
+                        help='Recodificar completos los clips de capítulo (sin stream copy)')
+    parser.add_argument('--vertical', action='store_true',
+                        help='Exportar los clips virales en vertical 9:16 (1080x1920) siguiendo al host en cámara')
+    parser.add_argument('--burn-subtitles', action='store_true',
+                        help='Quemar los subtítulos del episodio (color por host) en todos los clips')
+    parser.add_argument('--single-pass', action='store_true',
+                        help='Decodificar el video una sola vez y codificar todos los clips a la vez')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerar todos los clips aunque estén al día en el manifest')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('generate_clips', args)
+    run_log.start('generate_clips')
+
     print("=" * 80)
     print("  GENERADOR DE CLIPS - AI PODCAST PRODUCER")
     print("=" * 80)
 
     # 1. Buscar archivo metadata.json más reciente
     print("\n--> Paso 1/5: Buscando archivo de metadata...")
+    profiling.phase('find_metadata')
 
     if not os.path.exists(METADATA_DIR):
         print(f"❌ ERROR: Directorio {METADATA_DIR} no existe")
         print("Por favor, ejecuta primero: python analyze_chapters.py")
-        return
+        return 1
 
     metadata_files = [f for f in os.listdir(METADATA_DIR) if f.endswith('_metadata.json')]
 
     if len(metadata_files) == 0:
         print(f"❌ ERROR: No se encontró ningún archivo *_metadata.json en {METADATA_DIR}")
         print("Por favor, ejecuta primero: python analyze_chapters.py")
-        return
+        return 1
     elif len(metadata_files) > 1:
         print("⚠️  Se encontraron múltiples archivos de metadata:")
         for idx, file in enumerate(metadata_files, 1):
@@ -191,6 +628,7 @@ def main():
 
     # 2. Cargar metadata
     print("\n--> Paso 2/5: Cargando metadata...")
+    profiling.phase('load_metadata')
     try:
         with open(metadata_path, 'r', encoding='utf-8') as f:
             metadata = json.load(f)
@@ -204,14 +642,15 @@ def main():
 
         if len(viral_clips) == 0 and len(chapter_clips) == 0:
             print("❌ No hay clips para generar en el metadata")
-            return
+            return 1
 
     except Exception as e:
         print(f"❌ ERROR al cargar metadata: {e}")
-        return
+        return 1
 
     # 3. Buscar archivo de video
     print("\n--> Paso 3/5: Buscando archivo de video...")
+    profiling.phase('find_video')
 
     # Extraer nombre base del archivo metadata
     base_filename = os.path.splitext(metadata_files[0])[0].replace('_metadata', '')
@@ -224,13 +663,17 @@ def main():
         print(f"   Buscado: {base_filename}.mp4 (o .mov, .avi, .mkv)")
         print("\nAsegúrate de que el video final esté en /output")
         print("Ejecuta primero: python assemble_video.py")
-        return
+        return 1
 
     print(f"✓ Video encontrado: {os.path.basename(video_path)}")
+    run_log.set_episode(base_filename)
+    run_log.add_input(video_path)
 
     # 4. Cargar video
     print("\n--> Paso 4/5: Cargando video...")
+    profiling.phase('load_video')
     try:
+        from moviepy.editor import VideoFileClip
         video = VideoFileClip(video_path)
         print(f"✓ Video cargado")
         print(f"   • Duración: {video.duration:.1f}s ({video.duration // 60:.0f}:{video.duration % 60:02.0f})")
@@ -238,39 +681,110 @@ def main():
         print(f"   • FPS: {video.fps}")
     except Exception as e:
         print(f"❌ ERROR al cargar video: {e}")
-        return
+        return 1
 
     # 5. Crear directorios de salida
     os.makedirs(CLIPS_DIR, exist_ok=True)
     os.makedirs(VIRAL_CLIPS_DIR, exist_ok=True)
 
-    # 6. Generar clips virales
+    # 6. Generar clips
     print("\n--> Paso 5/5: Generando clips...")
+    profiling.phase('plan')
 
     success_count = 0
     fail_count = 0
 
-    if len(viral_clips) > 0:
-        print(f"\n📱 Generando {len(viral_clips)} clips virales (short)...")
-        for idx, clip in enumerate(viral_clips, 1):
-            print(f"\n[{idx}/{len(viral_clips)}] {clip.get('title', 'Sin título')}")
-            if generate_clip(video, clip, VIRAL_CLIPS_DIR, clip_type="viral_clip"):
-                success_count += 1
-            else:
-                fail_count += 1
-
-    # 7. Generar clips de capítulo
-    if len(chapter_clips) > 0:
-        print(f"\n📺 Generando {len(chapter_clips)} clips de capítulo (long)...")
-        for idx, clip in enumerate(chapter_clips, 1):
-            print(f"\n[{idx}/{len(chapter_clips)}] {clip.get('title', 'Sin título')}")
-            if generate_clip(video, clip, CLIPS_DIR, clip_type="clip"):
-                success_count += 1
-            else:
-                fail_count += 1
-
-    # 8. Cerrar video
-    video.close()
+    subtitles = None
+    if args.burn_subtitles:
+        srt_path = os.path.join(TRANSCRIPTIONS_DIR, f"{base_filename}.srt")
+        if os.path.exists(srt_path):
+            subtitles = {'srt': srt_path, 'editing_guide': EDITING_GUIDE_PATH}
+            print(f"   Subtítulos quemados con color por host (sin smart render: hay que recodificar)")
+        else:
+            print(f"   ⚠️  No se encontró {srt_path}: los clips se generarán sin subtítulos")
+
+    # Quemar subtítulos exige recodificar: el smart render no aplica
+    smart_render_chapters = not args.no_smart_render and len(chapter_clips) > 0 and subtitles is None
+    if smart_render_chapters:
+        # Se analiza una sola vez (queda en caché para todos los workers)
+        try:
+            with profiling.span('probe_keyframes'):
+                keyframes = smart_render.probe_keyframes(video_path)
+            print(f"   Keyframes del video: {len(keyframes)} (smart render para clips de capítulo)")
+        except Exception as e:
+            print(f"   ⚠️  No se pudieron leer los keyframes ({e}), se usará el render normal")
+            smart_render_chapters = False
+
+    vertical = None
+    if args.vertical and len(viral_clips) > 0:
+        vertical = {'editing_guide': EDITING_GUIDE_PATH}
+        if not os.path.exists(EDITING_GUIDE_PATH):
+            print(f"   ⚠️  No se encontró {EDITING_GUIDE_PATH}: el recorte vertical quedará fijo en {vertical_render.DEFAULT_HOST}")
+        print(f"   Clips virales en vertical 9:16 ({vertical_render.VERTICAL_WIDTH}x{vertical_render.VERTICAL_HEIGHT})")
+
+    jobs = plan_clip_jobs(viral_clips, chapter_clips, smart_render_chapters, vertical, subtitles)
+    assign_output_filenames(jobs)
+
+    # Manifest: solo se renderizan los clips nuevos o que cambiaron
+    manifests = {clips_dir: clip_manifest.load_manifest(clips_dir) for clips_dir in (VIRAL_CLIPS_DIR, CLIPS_DIR)}
+    for clips_dir, manifest in manifests.items():
+        clip_manifest.prune_missing(manifest, clips_dir)
+    source_hash = clip_manifest.source_video_hash(video_path, manifests.values())
+    jobs, skipped_count = filter_up_to_date(jobs, manifests, source_hash, args.single_pass, force=args.force)
+    print(f"   Clips al día (omitidos): {skipped_count}")
+    print(f"   Clips por generar: {len(jobs)}")
+
+    if args.workers > 0:
+        workers, threads = args.workers, max(1, (os.cpu_count() or 1) // args.workers)
+    else:
+        workers, threads = recommended_workers(len(jobs), video.w, video.h)
+    if workers == 1:
+        threads = ENCODER_THREADS  # Ruta en serie: la misma cantidad de hilos fija de siempre
+
+    completed = []
+    profiling.phase('render')
+    if not jobs:
+        video.close()
+    elif args.single_pass:
+        video_duration = video.duration
+        video.close()
+        success_count, fail_count, completed = render_clips_single_pass(video_path, jobs, video_duration)
+    elif workers > 1:
+        print(f"   Render en paralelo: {workers} clips a la vez ({threads} hilos por clip)")
+        # Cada worker abre su propio decoder; el del proceso principal ya no se necesita
+        video.close()
+        started = time.perf_counter()
+        success_count, fail_count, completed = render_clips_parallel(video_path, jobs, workers, threads)
+        print(f"\n   Tiempo total de render: {time.perf_counter() - started:.1f}s")
+    else:
+        groups = [('viral', "📱", "clips virales (short)"), ('chapter', "📺", "clips de capítulo (long)")]
+        for group, icon, label in groups:
+            group_jobs = [job for job in jobs if job['group'] == group]
+            if not group_jobs:
+                continue
+            print(f"\n{icon} Generando {len(group_jobs)} {label}...")
+            for idx, job in enumerate(group_jobs, 1):
+                print(f"\n[{idx}/{len(group_jobs)}] {job['clip'].get('title', 'Sin título')}")
+                with profiling.span('clip', title=job['clip'].get('title', 'Sin título')):
+                    ok = generate_clip(video, job['clip'], job['output_dir'], clip_type=job['clip_type'],
+                                       threads=threads,
+                                       source_path=video_path if job['smart_render'] or job['vertical'] else None,
+                                       vertical=job['vertical'], subtitles=job['subtitles'])
+                if ok:
+                    success_count += 1
+                    completed.append(job)
+                else:
+                    fail_count += 1
+
+        # 8. Cerrar video
+        video.close()
+
+    profiling.phase('record_manifest')
+    record_completed(completed, manifests, source_hash)
+    profiling.phase(None)
+    for job in completed:
+        run_log.add_output(os.path.join(job['output_dir'], job['clip']['output_filename']))
+    run_log.count(clips=success_count, clips_failed=fail_count, clips_skipped=skipped_count)
 
     # 9. Resumen final
     print("\n" + "=" * 80)
@@ -278,6 +792,7 @@ def main():
     print("=" * 80)
     print(f"\n📊 RESUMEN:")
     print(f"   • Clips generados exitosamente: {success_count}")
+    print(f"   • Clips al día (omitidos): {skipped_count}")
     print(f"   • Clips con errores: {fail_count}")
     print(f"\n📂 ARCHIVOS GENERADOS:")
     print(f"   • Clips virales: {VIRAL_CLIPS_DIR}/")
@@ -287,6 +802,7 @@ def main():
     print(f"   2. Usa los clips para publicar en redes sociales según el calendario")
     print(f"   3. Consulta '{base_filename}_calendar.csv' para el plan de publicación")
     print("=" * 80)
+    return 1 if fail_count else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(run_log.finish(main()))
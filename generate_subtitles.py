@@ -3,10 +3,16 @@
 # Descripción: Genera subtítulos (.srt) desde el audio original usando Whisper AI
 
 import os
+import sys
+import argparse
 import warnings
-import whisper
 from datetime import timedelta
 
+import run_log
+import profiling
+import model_server
+import inference_runtime
+
 # Ignorar warnings innecesarios
 warnings.filterwarnings("ignore")
 
@@ -14,6 +20,7 @@ warnings.filterwarnings("ignore")
 INPUT_DIR = "./input"
 OUTPUT_DIR = "./output"
 TRANSCRIPTIONS_DIR = "./output/transcriptions"
+WHISPER_MODEL = "base"
 
 def format_timestamp(seconds):
     """
@@ -54,7 +61,84 @@ def generate_plain_text(segments, output_path):
         full_text = ' '.join(segment['text'].strip() for segment in segments)
         f.write(full_text)
 
+def load_whisper_model(name=WHISPER_MODEL):
+    """
+    Carga el modelo de Whisper (se importa aquí: torch es pesado) con los hilos y
+    la cuantización de inference_runtime
+    """
+    inference_runtime.configure_torch()
+    import whisper
+    model = whisper.load_model(name)
+    if inference_runtime.INFERENCE_QUANTIZE and model.device.type == 'cpu':
+        model, _ = inference_runtime.quantize_dynamic_int8(model)
+    return model
+
+def transcribe(model, audio):
+    """
+    Transcribe con las opciones optimizadas para subtítulos
+
+    Args:
+        model: Modelo de load_whisper_model()
+        audio: Ruta del audio o np.ndarray float32 mono a 16 kHz
+
+    Returns:
+        dict: Resultado de Whisper ('segments', 'language', ...)
+    """
+    with inference_runtime.inference_context():
+        return model.transcribe(
+            audio,
+            language="es",           # Forzar español para mejor precisión
+            task="transcribe",       # 'transcribe' mantiene idioma original
+            verbose=False,           # No mostrar progreso detallado
+            word_timestamps=False    # Timestamps por frase (mejor para SRT)
+        )
+
+def transcribe_locally(input_file):
+    """
+    Carga Whisper en este proceso y transcribe (sin model_server.py)
+
+    Returns:
+        dict: Resultado de transcribe(), o None si hubo un error
+    """
+    print("\n--> Paso 2/4: Cargando modelo de IA Whisper...")
+    profiling.phase('load_model')
+    print("    Modelos disponibles: tiny, base, small, medium, large")
+    print(f"    Usando: '{WHISPER_MODEL}' (mejor balance velocidad/precisión)")
+    print("    💡 Tip: Para español de alta calidad usa 'medium' o 'large'")
+
+    try:
+        # Opciones de modelo:
+        # - tiny: Muy rápido, menos preciso (~1GB RAM)
+        # - base: Rápido, buena precisión (~1GB RAM) ← RECOMENDADO
+        # - small: Más lento, mejor precisión (~2GB RAM)
+        # - medium: Lento, excelente precisión (~5GB RAM)
+        # - large: Muy lento, máxima precisión (~10GB RAM)
+        model = load_whisper_model()
+    except Exception as e:
+        print(f"❌ ERROR al cargar el modelo: {e}")
+        return None
+
+    # 3. Transcribir audio
+    print("\n--> Paso 3/4: Transcribiendo audio (esto puede tardar varios minutos)...")
+    print("    Procesando con timestamps precisos para subtítulos...")
+    print(f"    Runtime: {inference_runtime.describe()}")
+    profiling.phase('transcription')
+
+    try:
+        # Transcribir con opciones optimizadas para subtítulos
+        return transcribe(model, input_file)
+    except Exception as e:
+        print(f"❌ ERROR durante la transcripción: {e}")
+        return None
+
 def main():
+    parser = argparse.ArgumentParser(
+        description='Genera subtítulos (.srt) y la transcripción (.txt) del .m4a de /input con Whisper'
+    )
+    profiling.add_arguments(parser)
+    profiling.start('generate_subtitles', parser.parse_args())
+    run_log.start('generate_subtitles')
+
     print("=" * 60)
     print("  GENERADOR DE SUBTÍTULOS - AI PODCAST PRODUCER")
     print("=" * 60)
@@ -66,7 +150,7 @@ def main():
     if len(m4a_files) == 0:
         print("❌ ERROR: No se encontró ningún archivo .m4a en el directorio /input")
         print("Por favor, coloca tu audio de NotebookLM en la carpeta /input")
-        return
+        return 1
     elif len(m4a_files) > 1:
         print("⚠️  ADVERTENCIA: Se encontraron múltiples archivos .m4a:")
         for idx, file in enumerate(m4a_files, 1):
@@ -77,41 +161,31 @@ def main():
     filename = os.path.splitext(m4a_files[0])[0]
     output_srt = os.path.join(TRANSCRIPTIONS_DIR, f"{filename}.srt")
     output_txt = os.path.join(TRANSCRIPTIONS_DIR, f"{filename}.txt")
+    run_log.set_episode(filename)
+    run_log.add_input(input_file)
 
     print(f"✓ Archivo encontrado: {m4a_files[0]}")
 
-    # 2. Cargar modelo de Whisper
-    print("\n--> Paso 2/4: Cargando modelo de IA Whisper...")
-    print("    Modelos disponibles: tiny, base, small, medium, large")
-    print("    Usando: 'base' (mejor balance velocidad/precisión)")
-    print("    💡 Tip: Para español de alta calidad usa 'medium' o 'large'")
-
-    try:
-        # Opciones de modelo:
-        # - tiny: Muy rápido, menos preciso (~1GB RAM)
-        # - base: Rápido, buena precisión (~1GB RAM) ← RECOMENDADO
-        # - small: Más lento, mejor precisión (~2GB RAM)
-        # - medium: Lento, excelente precisión (~5GB RAM)
-        # - large: Muy lento, máxima precisión (~10GB RAM)
-        model = whisper.load_model("base")
-    except Exception as e:
-        print(f"❌ ERROR al cargar el modelo: {e}")
-        return
-
-    # 3. Transcribir audio
-    print("\n--> Paso 3/4: Transcribiendo audio (esto puede tardar varios minutos)...")
-    print("    Procesando con timestamps precisos para subtítulos...")
+    # 2. Cargar modelo de Whisper (o usar el que ya tiene cargado model_server.py)
+    result = None
+    if model_server.request('ping'):
+        print("\n--> Paso 2/4: Usando el modelo Whisper ya cargado en model_server.py")
+        print("\n--> Paso 3/4: Transcribiendo audio (esto puede tardar varios minutos)...")
+        profiling.phase('transcription (model_server)')
+        try:
+            result = model_server.transcribe(input_file)
+        except model_server.ModelServerError as e:
+            print(f"❌ ERROR durante la transcripción: {e}")
+            return 1
+        if result is None:
+            print("    ⚠️  El servidor dejó de responder, se cargará el modelo en este proceso")
+
+    if result is None:
+        result = transcribe_locally(input_file)
+        if result is None:
+            return 1
 
     try:
-        # Transcribir con opciones optimizadas para subtítulos
-        result = model.transcribe(
-            input_file,
-            language="es",           # Forzar español para mejor precisión
-            task="transcribe",       # 'transcribe' mantiene idioma original
-            verbose=False,           # No mostrar progreso detallado
-            word_timestamps=False    # Timestamps por frase (mejor para SRT)
-        )
-
         segments = result['segments']
         total_segments = len(segments)
 
@@ -129,10 +203,11 @@ def main():
 
     except Exception as e:
         print(f"❌ ERROR durante la transcripción: {e}")
-        return
+        return 1
 
     # 4. Generar archivos de salida
     print(f"\n--> Paso 4/4: Generando archivos de salida...")
+    profiling.phase('write_outputs')
 
     try:
         # Crear directorio /output/transcriptions si no existe
@@ -145,12 +220,16 @@ def main():
         # Generar archivo .txt (transcripción completa sin timestamps)
         generate_plain_text(segments, output_txt)
         print(f"✓ Archivo .txt generado")
+        run_log.count(transcript_segments=total_segments)
+        run_log.add_output(output_srt)
+        run_log.add_output(output_txt)
 
     except Exception as e:
         print(f"❌ ERROR al guardar los archivos: {e}")
-        return
+        return 1
 
     # 5. Resumen final
+    profiling.phase(None)
     print("\n" + "=" * 60)
     print("✅ ¡PROCESO COMPLETADO!")
     print("=" * 60)
@@ -167,6 +246,7 @@ def main():
     print("   - Importa el .srt en tu editor de video o YouTube")
     print("   - Usa el .txt para análisis de capítulos (analyze_chapters.py)")
     print("=" * 60)
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(run_log.finish(main()))
@@ -3,10 +3,16 @@
 # Descripción: Genera prompts para imágenes e infografías con timestamps estratégicos
 
 import os
+import sys
 import json
+import argparse
 import warnings
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_stream import stream_json_completion, PartialResultWriter
+from openai_client import print_metrics_summary
+from transcript import parse_srt
+import profiling
+import run_log
 
 # Ignorar warnings innecesarios
 warnings.filterwarnings("ignore")
@@ -20,28 +26,6 @@ TRANSCRIPTIONS_DIR = "./output/transcriptions"
 METADATA_DIR = "./output/metadata"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def parse_srt(srt_path):
-    """
-    Lee un archivo .srt y extrae la transcripción con timestamps
-    """
-    with open(srt_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    blocks = content.strip().split('\n\n')
-    transcription = []
-
-    for block in blocks:
-        lines = block.split('\n')
-        if len(lines) >= 3:
-            timestamp = lines[1].split(' --> ')[0]
-            text = ' '.join(lines[2:])
-            transcription.append({
-                'timestamp': timestamp,
-                'text': text
-            })
-
-    return transcription
-
 def format_transcription_with_timestamps(transcription):
     """
     Formatea la transcripción con timestamps para análisis
@@ -51,12 +35,15 @@ def format_transcription_with_timestamps(transcription):
         formatted.append(f"[{entry['timestamp']}] {entry['text']}")
     return '\n'.join(formatted)
 
-def analyze_visual_opportunities(transcription_text):
+def analyze_visual_opportunities(transcription_text, on_element=None, label="visual_markers"):
     """
-    Analiza la transcripción y genera prompts visuales con timestamps
-    """
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    Analiza la transcripción y genera prompts visuales con timestamps (en modo streaming)
 
+    Args:
+        transcription_text: Transcripción formateada con timestamps
+        on_element: Callback on_element(key, element) por cada marcador completo
+        label: Nombre de la llamada para las métricas (una por episodio en modo batch)
+    """
     prompt = f"""Eres un experto en producción audiovisual y diseño gráfico para YouTube.
 
 Analiza la siguiente transcripción de podcast con timestamps y genera elementos visuales estratégicos para mantener la atención de la audiencia.
@@ -141,17 +128,20 @@ IMPORTANTE:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        result, info = stream_json_completion(
             messages=[
                 {"role": "system", "content": "Eres un experto en producción audiovisual y diseño gráfico. Respondes siempre con JSON válido."},
                 {"role": "user", "content": prompt}
             ],
+            model="gpt-4o-mini",
             temperature=0.7,
-            response_format={"type": "json_object"}
+            on_element=on_element,
+            label=label
         )
 
-        result = json.loads(response.choices[0].message.content)
+        if result and info['repaired']:
+            print("⚠️  La respuesta llegó incompleta: se recuperó hasta el último marcador completo")
+
         return result
 
     except Exception as e:
@@ -268,35 +258,24 @@ def generate_timeline_csv(markers, output_path):
 
             f.write(f'{timestamp},{marker_type},{duration},"{desc}"\n')
 
-def main():
-    print("=" * 80)
-    print("  GENERADOR DE MARCADORES VISUALES - AI PODCAST PRODUCER")
-    print("=" * 80)
-
-    # 1. Validar API Key
-    if not OPENAI_API_KEY:
-        print("\n❌ ERROR: No se encontró OPENAI_API_KEY en el archivo .env")
-        print("Por favor, agrega la línea: OPENAI_API_KEY=sk-tu_clave_aqui")
-        return
-
-    # 2. Buscar archivo .srt
-    print("\n--> Paso 1/4: Buscando archivo de subtítulos...")
-    srt_files = [f for f in os.listdir(TRANSCRIPTIONS_DIR) if f.endswith('.srt') and os.path.isfile(os.path.join(TRANSCRIPTIONS_DIR, f))]
-
-    if len(srt_files) == 0:
-        print("❌ ERROR: No se encontró ningún archivo .srt en /output/transcriptions")
-        print("Por favor, ejecuta primero: python generate_subtitles.py")
-        return
+def process_transcript(srt_path):
+    """
+    Procesa una transcripción completa: marcadores visuales con IA y archivos de salida
 
-    srt_path = os.path.join(TRANSCRIPTIONS_DIR, srt_files[0])
-    filename_base = os.path.splitext(srt_files[0])[0]
+    Args:
+        srt_path: Ruta al archivo .srt de la transcripción
 
-    print(f"✓ Archivo encontrado: {srt_files[0]}")
+    Returns:
+        bool: True si todos los archivos de salida se generaron correctamente
+    """
+    filename_base = os.path.splitext(os.path.basename(srt_path))[0]
 
     # 3. Parsear transcripción
     print("\n--> Paso 2/4: Analizando transcripción...")
+    profiling.phase('read_transcript')
     try:
         transcription = parse_srt(srt_path)
+        run_log.add_input(srt_path)
         total_entries = len(transcription)
         print(f"✓ Se cargaron {total_entries} segmentos")
 
@@ -305,10 +284,11 @@ def main():
             print(f"✓ Duración del contenido: {last_timestamp}")
     except Exception as e:
         print(f"❌ ERROR al leer el archivo: {e}")
-        return
+        return False
 
     # 4. Analizar con IA
     print("\n--> Paso 3/4: Generando marcadores visuales con IA...")
+    profiling.phase('llm_analysis')
     transcription_text = format_transcription_with_timestamps(transcription)
 
     # Calcular costo
@@ -319,16 +299,33 @@ def main():
     print(f"   Costo estimado: ~${estimated_cost:.4f} USD")
     print("   Analizando momentos clave para elementos visuales...")
 
-    analysis = analyze_visual_opportunities(transcription_text)
+    # Los marcadores se guardan en disco a medida que llegan del stream
+    os.makedirs(METADATA_DIR, exist_ok=True)
+    partial_path = os.path.join(METADATA_DIR, f"{filename_base}_visual_partial.jsonl")
+    partial_writer = PartialResultWriter(partial_path)
+
+    def on_element(key, element):
+        partial_writer(key, element)
+        if key == 'visual_markers':
+            print(f"   ✓ Marcador recibido: {element.get('timestamp', '?')} ({element.get('type', '?')})")
+
+    try:
+        analysis = analyze_visual_opportunities(transcription_text, on_element=on_element,
+                                                label=f"visual_markers:{filename_base}")
+    finally:
+        partial_writer.close()
 
     if not analysis:
         print("❌ ERROR: No se pudo completar el análisis")
-        return
+        if partial_writer.count:
+            print(f"   Resultados parciales guardados en: {partial_path}")
+        return False
 
     markers = analysis.get('visual_markers', [])
     summary = analysis.get('summary', {})
 
     print(f"✓ Análisis completado")
+    print_metrics_summary(f"visual_markers:{filename_base}")
     print(f"   • Total de marcadores: {summary.get('total_markers', len(markers))}")
     print(f"   • Imágenes: {summary.get('photos', 0)}")
     print(f"   • Infografías: {summary.get('infographics', 0)}")
@@ -336,6 +333,7 @@ def main():
 
     # 5. Generar archivos
     print("\n--> Paso 4/4: Generando archivos de salida...")
+    profiling.phase('write_outputs')
 
     try:
         os.makedirs(METADATA_DIR, exist_ok=True)
@@ -358,9 +356,18 @@ def main():
             json.dump(analysis, f, indent=2, ensure_ascii=False)
         print(f"✓ {json_path}")
 
+        for path in (guide_path, csv_path, json_path):
+            run_log.add_output(path)
+        run_log.count(visual_markers=len(markers))
+
     except Exception as e:
         print(f"❌ ERROR al guardar archivos: {e}")
-        return
+        return False
+
+    profiling.phase(None)
+    # Las salidas finales ya están en disco: el archivo parcial ya no es necesario
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
 
     # 6. Resumen
     print("\n" + "=" * 80)
@@ -384,5 +391,40 @@ def main():
     print(f"   • Edición: DaVinci Resolve, Premiere Pro, Final Cut Pro")
     print("=" * 80)
 
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Genera marcadores visuales (imágenes, infografías) desde la transcripción (.srt)'
+    )
+    profiling.add_arguments(parser)
+    profiling.start('generate_visual_markers', parser.parse_args())
+    run_log.start('generate_visual_markers')
+
+    print("=" * 80)
+    print("  GENERADOR DE MARCADORES VISUALES - AI PODCAST PRODUCER")
+    print("=" * 80)
+
+    # 1. Validar API Key
+    if not OPENAI_API_KEY:
+        print("\n❌ ERROR: No se encontró OPENAI_API_KEY en el archivo .env")
+        print("Por favor, agrega la línea: OPENAI_API_KEY=sk-tu_clave_aqui")
+        return 1
+
+    # 2. Buscar archivo .srt
+    print("\n--> Paso 1/4: Buscando archivo de subtítulos...")
+    profiling.phase('find_transcript')
+    srt_files = [f for f in os.listdir(TRANSCRIPTIONS_DIR) if f.endswith('.srt') and os.path.isfile(os.path.join(TRANSCRIPTIONS_DIR, f))]
+
+    if len(srt_files) == 0:
+        print("❌ ERROR: No se encontró ningún archivo .srt en /output/transcriptions")
+        print("Por favor, ejecuta primero: python generate_subtitles.py")
+        return 1
+
+    print(f"✓ Archivo encontrado: {srt_files[0]}")
+
+    run_log.set_episode(os.path.splitext(srt_files[0])[0])
+    return 0 if process_transcript(os.path.join(TRANSCRIPTIONS_DIR, srt_files[0])) else 1
+
 if __name__ == "__main__":
-    main()
+    sys.exit(run_log.finish(main()))
@@ -0,0 +1,228 @@
+# Módulo: inference_runtime.py
+# Requisitos: pip install torch python-dotenv
+# Descripción: Configuración compartida de torch para inferencia en CPU (pyannote y
+#              Whisper): hilos intra/inter-op, cuantización dinámica int8 de las capas
+#              soportadas, torch.inference_mode y un límite de memoria residente (RSS)
+#              que corta el trabajo con un error claro en vez de dejar que el sistema
+#              empiece a usar swap. Todo se ajusta desde .env
+
+import os
+import sys
+import _thread
+import subprocess
+import threading
+import contextlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+# Hilos para las operaciones de torch (0 = todos los núcleos disponibles)
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))
+# Hilos para ejecutar operaciones independientes en paralelo (1 evita sobresuscripción)
+INFERENCE_INTEROP_THREADS = int(os.getenv("INFERENCE_INTEROP_THREADS", "1"))
+# Cuantización dinámica int8 de Linear/LSTM (más rápida en CPU, precisión casi igual)
+INFERENCE_QUANTIZE = os.getenv("INFERENCE_QUANTIZE", "0") == "1"
+# Límite de memoria residente en MB (0 = sin límite)
+INFERENCE_MAX_RSS_MB = int(os.getenv("INFERENCE_MAX_RSS_MB", "0"))
+RSS_POLL_SECONDS = 0.5
+
+_configured = None
+_rss_warned = False
+
+
+def available_cores():
+    """
+    Núcleos que este proceso puede usar (respeta taskset/cgroups si el SO lo informa)
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def configure_torch(threads=None, interop_threads=None):
+    """
+    Fija los hilos de torch antes de cargar un modelo. Solo la primera llamada del
+    proceso tiene efecto (torch no permite cambiar los hilos inter-op después), así
+    un worker puede fijar su parte de los núcleos y los cargadores no la pisan.
+
+    Args:
+        threads: Hilos intra-op (default: INFERENCE_THREADS o todos los núcleos)
+        interop_threads: Hilos inter-op (default: INFERENCE_INTEROP_THREADS)
+
+    Returns:
+        dict: {'threads', 'interop_threads'} efectivos
+    """
+    global _configured
+    if _configured is not None:
+        return _configured
+
+    threads = threads or INFERENCE_THREADS or available_cores()
+    interop_threads = interop_threads or INFERENCE_INTEROP_THREADS
+    # Antes de importar torch: las librerías de BLAS/OpenMP leen estas variables al cargarse
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(interop_threads)
+    except RuntimeError:
+        # Ya hubo trabajo en paralelo en este proceso: se mantiene el valor actual
+        interop_threads = torch.get_num_interop_threads()
+
+    _configured = {'threads': threads, 'interop_threads': interop_threads}
+    return _configured
+
+def quantize_dynamic_int8(model):
+    """
+    Cuantiza a int8 (pesos) las capas Linear y LSTM de un modelo de torch
+
+    Las subclases de nn.Linear sin parámetros propios (ej: la Linear de Whisper, que
+    solo castea el dtype) se tratan como nn.Linear para que también se cuanticen.
+
+    Args:
+        model: torch.nn.Module en CPU
+
+    Returns:
+        tuple: (modelo cuantizado, número de capas cuantizadas)
+    """
+    import torch
+    from torch import nn
+
+    for module in model.modules():
+        if isinstance(module, nn.Linear) and type(module) is not nn.Linear:
+            if set(name for name, _ in module.named_parameters(recurse=False)) <= {'weight', 'bias'}:
+                module.__class__ = nn.Linear
+
+    layers = {nn.Linear, nn.LSTM}
+    count = sum(1 for module in model.modules() if type(module) in layers)
+    quantized = torch.ao.quantization.quantize_dynamic(model, layers, dtype=torch.qint8)
+    return quantized, count
+
+def quantize_modules(owner):
+    """
+    Cuantiza los modelos de torch que cuelgan de un objeto que no es un nn.Module
+    (ej: un Pipeline de pyannote, que guarda sus modelos en atributos internos)
+
+    Args:
+        owner: Objeto a recorrer (atributos directos y un nivel más)
+
+    Returns:
+        int: Número de capas cuantizadas
+    """
+    from torch import nn
+
+    total = 0
+    for parent in [owner] + [value for value in vars(owner).values() if hasattr(value, '__dict__')]:
+        if isinstance(parent, nn.Module):
+            continue
+        for name, value in list(vars(parent).items()):
+            if isinstance(value, nn.Module):
+                quantized, count = quantize_dynamic_int8(value)
+                setattr(parent, name, quantized)
+                total += count
+    return total
+
+def rss_mb():
+    """
+    Memoria residente actual del proceso en MB (None si no se puede leer)
+
+    En Linux se lee de /proc; en macOS (sin /proc) se le pregunta a ps, que la informa en KB.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+
+    try:
+        result = subprocess.run(['ps', '-o', 'rss=', '-p', str(os.getpid())],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return int(result.stdout.strip()) // 1024
+    except (OSError, ValueError):
+        return None
+
+def peak_rss_mb(children=False):
+    """
+    Pico de memoria residente del proceso en MB
+
+    Args:
+        children: Medir el mayor de los subprocesos terminados (ej: ffmpeg) en vez del propio
+    """
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # macOS lo informa en bytes y Linux en KB
+    return peak // (1024 * 1024) if sys.platform == 'darwin' else peak // 1024
+
+@contextlib.contextmanager
+def memory_guard(max_rss_mb=None):
+    """
+    Interrumpe el bloque con MemoryError si la memoria residente supera el límite
+
+    Un hilo revisa el RSS cada RSS_POLL_SECONDS y, si se pasa, interrumpe el hilo
+    principal (el error se lanza cuando torch devuelve el control a Python). Fuera
+    del hilo principal (ej: trabajos de model_server.py) no se vigila.
+
+    Args:
+        max_rss_mb: Límite en MB (default: INFERENCE_MAX_RSS_MB; 0 = sin límite)
+    """
+    global _rss_warned
+    limit = INFERENCE_MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+    if not limit or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    if rss_mb() is None:
+        if not _rss_warned:
+            _rss_warned = True
+            print(f"⚠️  No se puede leer la memoria residente en este sistema: "
+                  f"INFERENCE_MAX_RSS_MB={limit} no se aplicará")
+        yield
+        return
+
+    exceeded = []
+    done = threading.Event()
+
+    def watch():
+        while not done.wait(RSS_POLL_SECONDS):
+            current = rss_mb()
+            if current and current > limit:
+                exceeded.append(current)
+                _thread.interrupt_main()
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        yield
+    except KeyboardInterrupt:
+        if exceeded:
+            raise MemoryError(f"Memoria residente {exceeded[0]} MB > límite {limit} MB "
+                              f"(INFERENCE_MAX_RSS_MB). Usa un modelo más chico o INFERENCE_QUANTIZE=1") from None
+        raise
+    finally:
+        done.set()
+        watcher.join()
+
+@contextlib.contextmanager
+def inference_context(max_rss_mb=None):
+    """
+    Contexto para correr un modelo: torch.inference_mode + memory_guard
+    """
+    import torch
+    with memory_guard(max_rss_mb), torch.inference_mode():
+        yield
+
+def describe():
+    """
+    Resumen de la configuración efectiva (para los logs de los scripts)
+    """
+    threads = _configured or {'threads': INFERENCE_THREADS or available_cores(),
+                              'interop_threads': INFERENCE_INTEROP_THREADS}
+    limit = f"{INFERENCE_MAX_RSS_MB} MB" if INFERENCE_MAX_RSS_MB else "sin límite"
+    return (f"hilos={threads['threads']}, inter-op={threads['interop_threads']}, "
+            f"int8={'sí' if INFERENCE_QUANTIZE else 'no'}, RSS máx={limit}")
+
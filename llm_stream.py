@@ -0,0 +1,358 @@
+# Módulo: llm_stream.py
+# Requisitos: pip install openai
+# Descripción: Streaming de respuestas JSON de OpenAI con parseo incremental y reparación
+#              de respuestas truncadas (usado por analyze_chapters.py y generate_visual_markers.py)
+
+import os
+import json
+from openai_client import stream_chat_completion, is_fatal
+
+# Pares de apertura/cierre de contenedores JSON
+CLOSERS = {'{': '}', '[': ']'}
+
+# Mensaje para pedir al modelo que complete una respuesta cortada. Con response_format
+# json_object la respuesta tiene que ser un objeto JSON completo: se pide el objeto entero
+# (copiando lo ya escrito) y los elementos repetidos se descartan por índice
+CONTINUATION_PROMPT = (
+    "Tu respuesta anterior se cortó. Envía de nuevo el objeto JSON COMPLETO: copia sin cambios "
+    "lo que ya escribiste, termina lo que falta y no agregues texto fuera del JSON."
+)
+
+
+class IncrementalJSONParser:
+    """
+    Parser JSON incremental basado en una máquina de estados por carácter.
+
+    - Emite cada elemento completo de los arreglos de primer nivel
+      (ej: cada capítulo de "chapters" o cada marcador de "visual_markers")
+      en cuanto se cierra, sin esperar al resto de la respuesta.
+    - Registra el último punto seguro (checkpoint) para poder reparar una
+      respuesta truncada cerrando los contenedores abiertos.
+    """
+
+    def __init__(self, on_element=None):
+        """
+        Args:
+            on_element: Callback opcional on_element(key, element) que se llama
+                        por cada elemento completo de un arreglo de primer nivel
+        """
+        self.on_element = on_element
+        self.text = ''
+        self.complete = False
+        self.emitted = 0
+        self.element_counts = {}    # {llave del arreglo: elementos completos vistos}
+
+        self._stack = []            # [tipo, espera_llave, llave] por contenedor abierto
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._literal_start = None
+        self._element_start = None
+        self._root_end = None
+        self._checkpoint = None     # (índice, cierres pendientes)
+
+    def feed(self, chunk):
+        """
+        Procesa un fragmento de texto recibido del stream
+
+        Args:
+            chunk: Texto parcial (delta) de la respuesta
+        """
+        start = len(self.text)
+        self.text += chunk
+
+        for i in range(start, len(self.text)):
+            if self.complete:
+                return
+
+            ch = self.text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string(i)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in '{[':
+                self._open(ch, i)
+            elif ch in '}]':
+                self._end_literal(i)
+                self._close(i)
+            elif ch == ',':
+                self._end_literal(i)
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][1] = True
+            elif ch == ':':
+                if self._stack:
+                    self._stack[-1][1] = False
+            elif ch.isspace():
+                self._end_literal(i)
+            elif self._literal_start is None and self._stack:
+                # Números, true, false, null
+                self._literal_start = i
+
+    def _pending_closers(self):
+        return ''.join(CLOSERS[entry[0]] for entry in reversed(self._stack))
+
+    def _mark_checkpoint(self, index):
+        # Dentro de un elemento de un arreglo de primer nivel no hay puntos seguros:
+        # un elemento a medias se descarta completo
+        if len(self._stack) <= 2:
+            self._checkpoint = (index, self._pending_closers())
+
+    def _open(self, ch, i):
+        # Inicio de un elemento dentro de un arreglo de primer nivel
+        if len(self._stack) == 2 and self._stack[0][0] == '{' and self._stack[1][0] == '[':
+            self._element_start = i
+
+        key = None
+        if len(self._stack) == 1 and self._stack[0][0] == '{':
+            key = self._stack[0][2]
+
+        self._stack.append([ch, ch == '{', key])
+        # Un contenedor vacío recién abierto ya es reparable cerrándolo
+        self._mark_checkpoint(i + 1)
+
+    def _close(self, i):
+        if not self._stack:
+            return
+
+        self._stack.pop()
+
+        if not self._stack:
+            self._root_end = i + 1
+            self.complete = True
+            return
+
+        # Elemento completo de un arreglo de primer nivel
+        if (len(self._stack) == 2 and self._stack[1][0] == '['
+                and self._element_start is not None):
+            key = self._stack[1][2]
+            try:
+                element = json.loads(self.text[self._element_start:i + 1])
+            except json.JSONDecodeError:
+                element = None
+            self._element_start = None
+            if element is not None:
+                self.emitted += 1
+                self.element_counts[key] = self.element_counts.get(key, 0) + 1
+                if self.on_element:
+                    self.on_element(key, element)
+
+        self._mark_checkpoint(i + 1)
+
+    def _close_string(self, i):
+        if not self._stack:
+            return
+
+        top = self._stack[-1]
+        if top[0] == '{' and top[1]:
+            # Es una llave: recordarla para etiquetar arreglos de primer nivel
+            if len(self._stack) == 1:
+                try:
+                    top[2] = json.loads(self.text[self._string_start:i + 1])
+                except json.JSONDecodeError:
+                    top[2] = None
+            return
+
+        self._mark_checkpoint(i + 1)
+
+    def _end_literal(self, i):
+        if self._literal_start is not None:
+            self._literal_start = None
+            self._mark_checkpoint(i)
+
+    def result(self):
+        """
+        Returns:
+            dict: JSON completo parseado (solo si la respuesta terminó correctamente)
+        """
+        return json.loads(self.text[:self._root_end])
+
+    def snapshot(self):
+        """
+        Returns:
+            tuple: Checkpoint actual, para poder reparar desde este punto más tarde
+        """
+        return self._checkpoint
+
+    def repair(self, checkpoint=None):
+        """
+        Repara una respuesta truncada: recorta hasta el último elemento completo
+        y cierra los contenedores que quedaron abiertos.
+
+        Args:
+            checkpoint: Checkpoint a usar (default: el más reciente)
+
+        Returns:
+            dict: JSON reparado, o None si no hay nada recuperable
+        """
+        if self.complete and checkpoint is None:
+            # Balanceado pero no necesariamente válido (ej: una continuación que no encajó)
+            try:
+                return self.result()
+            except json.JSONDecodeError:
+                return None
+
+        checkpoint = checkpoint or self._checkpoint
+        if not checkpoint:
+            return None
+
+        index, closers = checkpoint
+        candidate = self.text[:index].rstrip().rstrip(',') + closers
+
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            return None
+
+
+class PartialResultWriter:
+    """
+    Escribe en disco (JSON Lines) cada elemento en cuanto llega del stream,
+    para tener resultados utilizables antes de que termine la respuesta.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def __call__(self, key, element):
+        self._file.write(json.dumps({'key': key, 'item': element}, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self, remove=False):
+        """
+        Args:
+            remove: Si True, elimina el archivo parcial (ya se guardaron las salidas finales)
+        """
+        self._file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _consume_stream(stream, parser):
+    """
+    Alimenta el parser con los deltas de un stream de chat completions
+
+    Returns:
+        str: finish_reason reportado por la API (o None si el stream se interrumpió)
+    """
+    finish_reason = None
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.delta and choice.delta.content:
+            parser.feed(choice.delta.content)
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+    return finish_reason
+
+
+def stream_json_completion(messages, model="gpt-4o-mini", temperature=0.7,
+                           on_element=None, max_continuations=1, label="openai"):
+    """
+    Pide una respuesta JSON en modo streaming y la parsea de forma incremental.
+
+    Si la respuesta se corta (límite de tokens o conexión interrumpida) se pide al
+    modelo el objeto completo partiendo de lo que ya escribió (sigue en modo JSON) y,
+    si aun así no es JSON válido, se repara desde el último elemento completo de la
+    respuesta más avanzada. on_element recibe cada elemento una sola vez: los que la
+    continuación repite (mismo arreglo, mismo índice) no se vuelven a entregar.
+
+    Args:
+        messages: Lista de mensajes para el chat
+        model: Modelo a usar
+        temperature: Temperatura de muestreo
+        on_element: Callback on_element(key, element) por cada elemento completo
+        max_continuations: Número máximo de peticiones de continuación
+        label: Nombre de la llamada para las métricas de openai_client
+
+    Returns:
+        tuple: (resultado dict o None, info dict con 'finish_reason', 'repaired', 'continuations')
+    """
+    info = {'finish_reason': None, 'repaired': False, 'continuations': 0}
+    delivered = {}  # {llave del arreglo: elementos ya entregados a on_element}
+
+    def new_parser():
+        parser = IncrementalJSONParser()
+
+        def deliver(key, element):
+            index = parser.element_counts[key] - 1
+            if index < delivered.get(key, 0):
+                return  # Ya se entregó (y escribió en el parcial) en una respuesta anterior
+            delivered[key] = index + 1
+            if on_element:
+                on_element(key, element)
+
+        parser.on_element = deliver
+        return parser
+
+    parser = new_parser()
+    attempts = [parser]
+    stream = stream_chat_completion(
+        label=label,
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        response_format={"type": "json_object"}
+    )
+
+    try:
+        info['finish_reason'] = _consume_stream(stream, parser)
+    except Exception as e:
+        # El stream se abre al consumirlo: un rechazo de la API (401, 403, 400...) llega
+        # aquí y no se arregla pidiendo una continuación
+        if is_fatal(e):
+            raise
+        print(f"⚠️  Stream interrumpido: {e}")
+
+    while not parser.complete and info['continuations'] < max_continuations and parser.text:
+        info['continuations'] += 1
+        print(f"⚠️  Respuesta truncada, solicitando continuación ({info['continuations']}/{max_continuations})...")
+
+        previous_text = parser.text
+        parser = new_parser()
+        attempts.append(parser)
+        try:
+            stream = stream_chat_completion(
+                label=label,
+                model=model,
+                messages=messages + [
+                    {"role": "assistant", "content": previous_text},
+                    {"role": "user", "content": CONTINUATION_PROMPT}
+                ],
+                temperature=temperature,
+                response_format={"type": "json_object"}
+            )
+            info['finish_reason'] = _consume_stream(stream, parser)
+        except Exception as e:
+            if is_fatal(e):
+                raise
+            print(f"⚠️  Continuación fallida: {e}")
+
+    if parser.complete:
+        try:
+            return parser.result(), info
+        except json.JSONDecodeError:
+            pass
+
+    # Reparar desde el último elemento completo, empezando por la respuesta que llegó
+    # más lejos; si la continuación no sirve, queda la respuesta original
+    info['repaired'] = True
+    for attempt in sorted(attempts, key=lambda p: p.emitted, reverse=True):
+        result = attempt.repair()
+        if result is not None:
+            return result, info
+    return None, info
@@ -0,0 +1,317 @@
+# Script: model_server.py
+# Requisitos: pip install pyannote.audio openai-whisper torch python-dotenv
+# Descripción: Servidor local opcional que mantiene cargados los modelos de pyannote
+#              (diarización) y Whisper (transcripción) entre episodios. Escucha en un
+#              socket Unix; split_audios.py y generate_subtitles.py lo usan si está
+#              corriendo y, si no, cargan el modelo en su propio proceso como siempre.
+#              Así, varios episodios seguidos pagan la carga de los modelos una sola vez
+# Uso: python model_server.py [--preload diarization whisper]   (en otra terminal)
+#      python model_server.py --status | --stop
+
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import traceback
+from multiprocessing.connection import Listener, Client
+from dotenv import load_dotenv
+
+import run_log
+import profiling
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+SOCKET_PATH = os.getenv("MODEL_SERVER_SOCKET", "./output/.model_server.sock")
+AUTHKEY_PATH = os.getenv("MODEL_SERVER_KEY", "./output/.model_server.key")
+USE_MODEL_SERVER = os.getenv("MODEL_SERVER", "1") != "0"  # MODEL_SERVER=0 fuerza la carga local
+MODELS = ('diarization', 'whisper')
+
+
+class ModelServerError(RuntimeError):
+    """El servidor recibió el trabajo pero falló al procesarlo"""
+
+
+# --- CLIENTE ---
+
+def _read_authkey():
+    try:
+        with open(AUTHKEY_PATH, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def connect():
+    """
+    Abre una conexión con el servidor
+
+    Returns:
+        Connection: Conexión autenticada, o None si el servidor no está corriendo
+    """
+    if not USE_MODEL_SERVER or not os.path.exists(SOCKET_PATH):
+        return None
+    authkey = _read_authkey()
+    if not authkey:
+        return None
+    try:
+        return Client(SOCKET_PATH, family='AF_UNIX', authkey=authkey)
+    except (OSError, EOFError):
+        # Socket huérfano de un servidor que ya no existe
+        return None
+
+def request(op, **params):
+    """
+    Envía un trabajo al servidor y espera la respuesta
+
+    Args:
+        op: 'ping', 'diarize', 'transcribe', 'status' o 'shutdown'
+        **params: Parámetros del trabajo
+
+    Returns:
+        El resultado del trabajo, o None si el servidor no está corriendo
+
+    Raises:
+        ModelServerError: Si el servidor falló al procesar el trabajo
+    """
+    conn = connect()
+    if conn is None:
+        return None
+    try:
+        conn.send({'op': op, **params})
+        reply = conn.recv()
+    except (OSError, EOFError):
+        return None
+    finally:
+        conn.close()
+
+    if not reply.get('ok'):
+        raise ModelServerError(reply.get('error', 'error desconocido'))
+    return reply['result']
+
+def diarize(audio_path):
+    """
+    Diarización en el servidor
+
+    Args:
+        audio_path: Audio a analizar (el servidor lo lee del disco)
+
+    Returns:
+        list: Turnos [(inicio, fin, speaker)] (ver split_audios.run_diarization), o None
+              si el servidor no está corriendo
+    """
+    return request('diarize', audio=os.path.abspath(audio_path))
+
+def transcribe(audio_path):
+    """
+    Transcripción en el servidor
+
+    Returns:
+        dict: {'segments', 'language'} (ver generate_subtitles.transcribe), o None
+              si el servidor no está corriendo
+    """
+    return request('transcribe', audio=os.path.abspath(audio_path))
+
+
+# --- SERVIDOR ---
+
+class ModelServer:
+    """
+    Mantiene los modelos en memoria y atiende trabajos (un hilo por conexión;
+    cada modelo procesa un trabajo a la vez, pero diarización y transcripción
+    pueden correr al mismo tiempo)
+    """
+
+    def __init__(self):
+        self.models = {}
+        self.locks = {name: threading.Lock() for name in MODELS}
+        self.stats = {name: {'jobs': 0, 'load_seconds': None, 'busy_seconds': 0.0} for name in MODELS}
+        self.started_at = time.time()
+        self.listener = None
+        self.stopping = False
+
+    def get_model(self, name):
+        """
+        Devuelve el modelo, cargándolo la primera vez (con el lock del modelo tomado)
+        """
+        if name not in self.models:
+            print(f"--> Cargando modelo '{name}'...")
+            started = time.time()
+            if name == 'diarization':
+                import split_audios
+                self.models[name] = split_audios.load_diarization_pipeline()
+            else:
+                import generate_subtitles
+                self.models[name] = generate_subtitles.load_whisper_model()
+            self.stats[name]['load_seconds'] = round(time.time() - started, 1)
+            print(f"✓ Modelo '{name}' cargado en {self.stats[name]['load_seconds']}s")
+        return self.models[name]
+
+    def run_job(self, name, audio):
+        with self.locks[name], profiling.span(name, audio=os.path.basename(audio)):
+            model = self.get_model(name)
+            started = time.time()
+            if name == 'diarization':
+                import split_audios
+                result = split_audios.run_diarization(model, audio)
+            else:
+                import generate_subtitles
+                transcription = generate_subtitles.transcribe(model, audio)
+                result = {'segments': transcription['segments'], 'language': transcription.get('language')}
+            elapsed = time.time() - started
+            self.stats[name]['jobs'] += 1
+            self.stats[name]['busy_seconds'] += elapsed
+            print(f"✓ {name}: {os.path.basename(audio)} en {elapsed:.1f}s")
+            return result
+
+    def handle(self, message):
+        op = message.get('op')
+        if op == 'ping':
+            return 'pong'
+        if op == 'status':
+            return {'pid': os.getpid(), 'uptime_seconds': round(time.time() - self.started_at),
+                    'loaded': sorted(self.models), 'stats': self.stats}
+        if op == 'shutdown':
+            return 'bye'  # serve_connection detiene el servidor después de responder
+        if op in ('diarize', 'transcribe'):
+            audio = message.get('audio')
+            if not audio or not os.path.exists(audio):
+                raise FileNotFoundError(f"No existe el audio: {audio}")
+            return self.run_job('diarization' if op == 'diarize' else 'whisper', audio)
+        raise ValueError(f"Operación desconocida: {op}")
+
+    def serve_connection(self, conn):
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    break
+                try:
+                    reply = {'ok': True, 'result': self.handle(message)}
+                except Exception as e:
+                    traceback.print_exc()
+                    reply = {'ok': False, 'error': f"{e.__class__.__name__}: {e}"}
+                conn.send(reply)
+                if message.get('op') == 'shutdown':
+                    self.stop()
+                    break
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def stop(self):
+        """
+        Detiene el bucle de serve_forever()
+
+        Cerrar el Listener desde otro hilo no despierta un accept() bloqueado en Linux:
+        se abre una conexión vacía al socket para que accept() vuelva y vea `stopping`
+        """
+        self.stopping = True
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wakeup:
+                wakeup.connect(SOCKET_PATH)
+        except OSError:
+            pass  # El socket ya no existe: accept() no está esperando
+
+    def serve_forever(self, authkey):
+        self.listener = Listener(SOCKET_PATH, family='AF_UNIX', authkey=authkey)
+        os.chmod(SOCKET_PATH, 0o600)
+        print(f"✓ Escuchando en {SOCKET_PATH} (pid {os.getpid()})")
+        print("   Detener con: python model_server.py --stop (o Ctrl+C)")
+        try:
+            while not self.stopping:
+                try:
+                    conn = self.listener.accept()
+                except Exception as e:
+                    if self.stopping:
+                        break  # Conexión vacía de stop()
+                    # Cliente sin la clave correcta u otra conexión inválida
+                    print(f"⚠️  Conexión rechazada: {e}")
+                    continue
+                if self.stopping:
+                    conn.close()
+                    break
+                threading.Thread(target=self.serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            self.listener.close()
+            if os.path.exists(SOCKET_PATH):
+                os.remove(SOCKET_PATH)
+
+
+def write_authkey():
+    """
+    Clave aleatoria compartida con los clientes (solo legible por el usuario)
+    """
+    os.makedirs(os.path.dirname(AUTHKEY_PATH) or '.', exist_ok=True)
+    authkey = os.urandom(32)
+    fd = os.open(AUTHKEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(authkey)
+    return authkey
+
+def print_status(status):
+    print(f"✓ Servidor activo (pid {status['pid']}, {status['uptime_seconds']}s)")
+    print(f"   Modelos cargados: {', '.join(status['loaded']) or 'ninguno'}")
+    for name, stats in status['stats'].items():
+        load = f"{stats['load_seconds']}s" if stats['load_seconds'] is not None else "—"
+        print(f"   • {name}: {stats['jobs']} trabajos, carga {load}, {stats['busy_seconds']:.1f}s procesando")
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local que mantiene cargados pyannote y Whisper')
+    parser.add_argument('--preload', nargs='*', choices=MODELS, default=None,
+                        help='Cargar estos modelos al arrancar (sin valores: ambos)')
+    parser.add_argument('--status', action='store_true', help='Mostrar el estado del servidor')
+    parser.add_argument('--stop', action='store_true', help='Detener el servidor')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        if not USE_MODEL_SERVER:
+            print("⚠️  MODEL_SERVER=0: el cliente está desactivado")
+            return 1
+        status = request('status')
+        if status is None:
+            print("⚠️  El servidor no está corriendo")
+            return 1
+        print_status(status)
+        if args.stop:
+            request('shutdown')
+            print("✓ Servidor detenido")
+        return 0
+
+    if connect() is not None:
+        print(f"⚠️  Ya hay un servidor corriendo en {SOCKET_PATH}")
+        return 1
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)  # Socket huérfano
+
+    print("=" * 60)
+    print("  SERVIDOR DE MODELOS - AI PODCAST PRODUCER")
+    print("=" * 60)
+
+    # Solo el servidor se perfila (la traza se escribe al detenerlo): un span por trabajo
+    profiling.start('model_server', args)
+    run_log.start('model_server')
+    server = ModelServer()
+    authkey = write_authkey()
+    if args.preload is not None:
+        for name in args.preload or MODELS:
+            try:
+                server.get_model(name)
+            except Exception as e:
+                print(f"❌ ERROR al cargar '{name}': {e}")
+                return 1
+
+    try:
+        server.serve_forever(authkey)
+        print("\n✓ Servidor detenido (--stop)")
+    except KeyboardInterrupt:
+        print("\n✓ Servidor detenido")
+    run_log.count(**{f"{name}_jobs": stats['jobs'] for name, stats in server.stats.items()})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_log.finish(main()))
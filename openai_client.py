@@ -0,0 +1,360 @@
+# Módulo: openai_client.py
+# Requisitos: pip install openai python-dotenv
+# Descripción: Capa compartida para las llamadas a OpenAI: un solo cliente reutilizado
+#              (pool de conexiones), reintentos con backoff exponencial en 429/5xx,
+#              limitador token-bucket y métricas de latencia/tokens por llamada
+
+import os
+import time
+import random
+import threading
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Permite apuntar a un servidor stub local (ej: http://127.0.0.1:8080/v1) sin usar la red
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("OPENAI_BACKOFF_BASE", "1.0"))
+BACKOFF_MAX_SECONDS = float(os.getenv("OPENAI_BACKOFF_MAX", "30"))
+# Límites de la organización (ajustar según el tier de la cuenta)
+REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_RPM_LIMIT", "500"))
+TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+# Precios en USD por millón de tokens (entrada, salida) para estimar el costo por episodio
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00)
+}
+
+_client = None
+_client_lock = threading.Lock()
+_metrics = []
+_metrics_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Limitador token-bucket thread-safe.
+
+    La capacidad se rellena de forma continua a razón de `per_minute / 60`
+    unidades por segundo. acquire() bloquea hasta que haya saldo suficiente.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """
+        Consume `amount` unidades, esperando lo necesario
+
+        Returns:
+            float: Segundos que se esperó
+        """
+        # Una petición más grande que la capacidad nunca cabría: se limita a la capacidad
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+
+                wait = (amount - self.tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+    def charge(self, amount):
+        """
+        Ajusta el saldo sin esperar: positivo para cobrar consumo que no se reservó (el
+        saldo puede quedar negativo y el próximo acquire() espera), negativo para devolver
+        """
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens - float(amount))
+
+
+request_bucket = TokenBucket(REQUESTS_PER_MINUTE)
+token_bucket = TokenBucket(TOKENS_PER_MINUTE)
+
+
+def get_client():
+    """
+    Devuelve el cliente compartido de OpenAI (se crea una sola vez).
+
+    Reutilizar la misma instancia mantiene abiertas las conexiones HTTP entre
+    llamadas. Los reintentos internos del SDK se desactivan porque los maneja
+    esta capa.
+
+    Returns:
+        OpenAI: Cliente configurado
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Import diferido: el SDK tarda en cargar y los scripts validan sus entradas antes
+            from openai import OpenAI
+            _client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=0
+            )
+        return _client
+
+
+def estimate_tokens(messages):
+    """
+    Estima los tokens de entrada (4 caracteres ≈ 1 token), igual que los scripts
+    """
+    return sum(len(m.get('content') or '') for m in messages) // 4
+
+
+def reserved_tokens(kwargs):
+    """
+    Tokens que se reservan en el limitador antes de la llamada: entrada estimada más
+    el máximo de salida pedido (TOKENS_PER_MINUTE cuenta entrada + salida)
+    """
+    max_output = kwargs.get('max_tokens') or kwargs.get('max_completion_tokens') or 0
+    return estimate_tokens(kwargs.get('messages', [])) + max_output
+
+
+def reconcile_tokens(reserved, prompt_tokens, completion_tokens):
+    """
+    Cobra (o devuelve) la diferencia entre lo reservado y lo que reportó la API
+    """
+    # acquire() nunca cobra más que la capacidad: se reconcilia contra lo que cobró de verdad
+    token_bucket.charge(prompt_tokens + completion_tokens - min(reserved, token_bucket.capacity))
+
+
+def is_retryable(error):
+    """
+    Returns:
+        bool: True si el error es transitorio (429, 5xx, conexión o timeout)
+    """
+    from openai import APIStatusError, APIConnectionError
+
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def is_fatal(error):
+    """
+    Returns:
+        bool: True si la API rechazó la petición y repetirla no sirve (400, 401, 403, 404...)
+    """
+    from openai import APIStatusError
+
+    return isinstance(error, APIStatusError) and not is_retryable(error)
+
+
+def backoff_delay(attempt, error=None):
+    """
+    Calcula la espera antes del siguiente intento (backoff exponencial con jitter).
+    Si la API envía Retry-After se respeta.
+    """
+    response = getattr(error, 'response', None)
+    if response is not None:
+        retry_after = response.headers.get('retry-after')
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX_SECONDS)
+            except ValueError:
+                pass
+
+    delay = BACKOFF_BASE_SECONDS * (2 ** attempt)
+    return min(delay, BACKOFF_MAX_SECONDS) * random.uniform(0.5, 1.0)
+
+
+def _create_with_retry(label, **kwargs):
+    """
+    Llama a chat.completions.create aplicando límites y reintentos
+
+    Returns:
+        tuple: (respuesta, número de reintentos, segundos esperados por el limitador)
+    """
+    client = get_client()
+    # Los tokens se reservan una vez (la reconciliación cobra lo que se usó de verdad),
+    # pero cada intento es una petición más para el límite de RPM
+    reserved = reserved_tokens(kwargs)
+    throttled = token_bucket.acquire(reserved)
+
+    attempt = 0
+    while True:
+        throttled += request_bucket.acquire(1)
+        try:
+            return client.chat.completions.create(**kwargs), attempt, throttled
+        except Exception as e:
+            if not is_retryable(e) or attempt >= MAX_RETRIES:
+                # La llamada no se hizo: se devuelve la reserva
+                token_bucket.charge(-min(reserved, token_bucket.capacity))
+                raise
+            delay = backoff_delay(attempt, e)
+            attempt += 1
+            print(f"⚠️  [{label}] OpenAI no disponible ({e.__class__.__name__}), reintento {attempt}/{MAX_RETRIES} en {delay:.1f}s...")
+            time.sleep(delay)
+
+
+def _record(metric):
+    with _metrics_lock:
+        _metrics.append(metric)
+
+
+def chat_completion(label="openai", **kwargs):
+    """
+    Llamada normal (sin streaming) a chat completions con reintentos y métricas
+
+    Args:
+        label: Nombre de la llamada para métricas y logs
+        **kwargs: Argumentos de client.chat.completions.create
+
+    Returns:
+        Respuesta de la API
+    """
+    started = time.perf_counter()
+    response, retries, throttled = _create_with_retry(label, **kwargs)
+    usage = getattr(response, 'usage', None)
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    if usage:
+        reconcile_tokens(reserved_tokens(kwargs), prompt_tokens, completion_tokens)
+
+    _record({
+        'label': label,
+        'model': kwargs.get('model'),
+        'latency_seconds': time.perf_counter() - started,
+        'first_token_seconds': None,
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'retries': retries,
+        'throttled_seconds': throttled
+    })
+    return response
+
+
+def stream_chat_completion(label="openai", **kwargs):
+    """
+    Llamada en streaming con reintentos (al abrir el stream) y métricas.
+    Las métricas se registran cuando el stream termina de consumirse.
+
+    Args:
+        label: Nombre de la llamada para métricas y logs
+        **kwargs: Argumentos de client.chat.completions.create (sin stream)
+
+    Yields:
+        Chunks del stream
+    """
+    kwargs['stream'] = True
+    kwargs.setdefault('stream_options', {"include_usage": True})
+
+    started = time.perf_counter()
+    stream, retries, throttled = _create_with_retry(label, **kwargs)
+    metric = {
+        'label': label,
+        'model': kwargs.get('model'),
+        'latency_seconds': None,
+        'first_token_seconds': None,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'retries': retries,
+        'throttled_seconds': throttled
+    }
+
+    # Sin el chunk de usage (stream cortado) la salida se estima por caracteres recibidos
+    streamed_chars = 0
+    try:
+        for chunk in stream:
+            if metric['first_token_seconds'] is None and chunk.choices:
+                metric['first_token_seconds'] = time.perf_counter() - started
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                streamed_chars += len(chunk.choices[0].delta.content)
+            usage = getattr(chunk, 'usage', None)
+            if usage:
+                metric['prompt_tokens'] = usage.prompt_tokens or 0
+                metric['completion_tokens'] = usage.completion_tokens or 0
+            yield chunk
+    finally:
+        metric['latency_seconds'] = time.perf_counter() - started
+        if metric['prompt_tokens'] or metric['completion_tokens']:
+            reconcile_tokens(reserved_tokens(kwargs), metric['prompt_tokens'], metric['completion_tokens'])
+        else:
+            reconcile_tokens(reserved_tokens(kwargs), estimate_tokens(kwargs.get('messages', [])),
+                             streamed_chars // 4)
+        _record(metric)
+
+
+def get_metrics(label=None):
+    """
+    Returns:
+        list: Métricas registradas (opcionalmente filtradas por label)
+    """
+    with _metrics_lock:
+        return [dict(m) for m in _metrics if label is None or m['label'] == label]
+
+
+def usage_summary(label=None):
+    """
+    Totales de las llamadas realizadas (para run_log.py)
+
+    Args:
+        label: Solo las llamadas con este label, o las que empiezan con "label:"
+
+    Returns:
+        dict: {'calls', 'retries', 'prompt_tokens', 'completion_tokens', 'cost_usd'}
+              (cost_usd es None si algún modelo no está en MODEL_PRICES)
+    """
+    with _metrics_lock:
+        metrics = [m for m in _metrics if label is None or m['label'] == label
+                   or m['label'].startswith(f"{label}:")]
+
+    cost = 0.0
+    for m in metrics:
+        prices = MODEL_PRICES.get(m['model'])
+        if prices is None:
+            cost = None
+            break
+        cost += (m['prompt_tokens'] * prices[0] + m['completion_tokens'] * prices[1]) / 1_000_000
+
+    return {
+        'calls': len(metrics),
+        'retries': sum(m['retries'] for m in metrics),
+        'prompt_tokens': sum(m['prompt_tokens'] for m in metrics),
+        'completion_tokens': sum(m['completion_tokens'] for m in metrics),
+        'cost_usd': round(cost, 6) if cost is not None else None
+    }
+
+
+def print_metrics_summary(label=None):
+    """
+    Imprime un resumen de latencia y tokens de las llamadas realizadas
+    """
+    metrics = get_metrics(label)
+    if not metrics:
+        return
+
+    latency = sum(m['latency_seconds'] or 0 for m in metrics)
+    prompt_tokens = sum(m['prompt_tokens'] for m in metrics)
+    completion_tokens = sum(m['completion_tokens'] for m in metrics)
+    retries = sum(m['retries'] for m in metrics)
+
+    print(f"   Llamadas a OpenAI: {len(metrics)} ({retries} reintentos)")
+    print(f"   Latencia total: {latency:.1f}s")
+    first_token = [m['first_token_seconds'] for m in metrics if m['first_token_seconds'] is not None]
+    if first_token:
+        print(f"   Primer token: {first_token[0]:.1f}s")
+    print(f"   Tokens reales: {prompt_tokens:,} entrada / {completion_tokens:,} salida")
@@ -0,0 +1,420 @@
+# Script: pipeline.py
+# Requisitos: los de cada etapa (ver requirements.txt)
+# Descripción: Orquestador del flujo completo. Modela cada script como una etapa con
+#              entradas y salidas declaradas, omite las etapas cuyas salidas ya están al
+#              día (por hash de contenido de entradas y salidas) y ejecuta en paralelo las
+#              etapas independientes (ej: transcripción junto con diarización)
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import run_log
+import profiling
+
+# --- CONFIGURACIÓN ---
+INPUT_DIR = "./input"
+OUTPUT_DIR = "./output"
+METADATA_DIR = "./output/metadata"
+TRANSCRIPTIONS_DIR = "./output/transcriptions"
+EDITING_GUIDE_PATH = "./output/editing_guide.json"
+# Diario de correcciones de la guía (editing_guide.py): corregir speakers invalida las etapas que la leen
+EDITING_GUIDE_JOURNAL = EDITING_GUIDE_PATH + ".journal.jsonl"
+VIDEO_HOST_A = "./input/video_host_A.mp4"
+VIDEO_HOST_B = "./input/video_host_B.mp4"
+STATE_PATH = "./output/.pipeline_state.json"
+LOGS_DIR = "./output/logs/pipeline"
+STATE_VERSION = 1
+DEFAULT_JOBS = 2
+LOG_TAIL_LINES = 15
+# Nombre de cada estado de etapa en los contadores de run_log.py
+STATUS_COUNTERS = {'ok': 'run', 'al día': 'up_to_date', 'falló': 'failed', 'bloqueada': 'blocked',
+                   'omitida': 'skipped', 'se ejecutaría': 'planned'}
+
+def find_episode():
+    """
+    Nombre base del episodio: el mismo .m4a que eligen los scripts (el primero de /input)
+    """
+    if not os.path.isdir(INPUT_DIR):
+        return None
+    m4a_files = [f for f in os.listdir(INPUT_DIR) if f.endswith('.m4a') and os.path.isfile(os.path.join(INPUT_DIR, f))]
+    return os.path.splitext(m4a_files[0])[0] if m4a_files else None
+
+def build_stages(episode, burn_subtitles=False, vertical=False, notion_date=None, combined_audio=False):
+    """
+    Define el DAG de etapas del episodio
+
+    Cada etapa declara:
+        script / args: Comando a ejecutar (python script args)
+        deps: Etapas que deben terminar bien antes (si fallan, esta no corre)
+        soft_deps: Etapas que se esperan si están en la corrida, pero cuyo fallo no bloquea
+        inputs: Archivos que la etapa lee (obligatorios)
+        optional_inputs: Archivos que lee si existen
+        outputs: Archivos que la etapa debe producir
+
+    Returns:
+        dict: {nombre: etapa} en orden del flujo
+    """
+    m4a = os.path.join(INPUT_DIR, f"{episode}.m4a")
+    srt = os.path.join(TRANSCRIPTIONS_DIR, f"{episode}.srt")
+    video = os.path.join(OUTPUT_DIR, f"{episode}.mp4")
+    metadata = os.path.join(METADATA_DIR, f"{episode}_metadata.json")
+    calendar = os.path.join(METADATA_DIR, f"{episode}_calendar.csv")
+
+    subtitle_flag = ['--burn-subtitles'] if burn_subtitles else []
+
+    stages = {
+        'diarization': {
+            'script': 'split_audios.py', 'args': [],
+            'deps': [], 'soft_deps': [],
+            'inputs': [m4a], 'optional_inputs': [],
+            'outputs': ['./output/track_host_A.mp3', './output/track_host_B.mp3', EDITING_GUIDE_PATH]
+        },
+        'subtitles': {
+            'script': 'generate_subtitles.py', 'args': [],
+            'deps': [], 'soft_deps': [],
+            'inputs': [m4a], 'optional_inputs': [],
+            'outputs': [srt, os.path.join(TRANSCRIPTIONS_DIR, f"{episode}.txt")]
+        },
+        'assemble': {
+            'script': 'assemble_video.py', 'args': subtitle_flag,
+            'deps': ['diarization'] + (['subtitles'] if burn_subtitles else []), 'soft_deps': [],
+            # Los videos de HeyGen son un paso manual: si faltan, la etapa queda bloqueada
+            'inputs': [VIDEO_HOST_A, VIDEO_HOST_B, EDITING_GUIDE_PATH] + ([srt] if burn_subtitles else []),
+            'optional_inputs': [EDITING_GUIDE_JOURNAL],
+            'outputs': [video]
+        },
+        'chapters': {
+            'script': 'analyze_chapters.py', 'args': [],
+            # La guía de edición mejora la pre-selección de clips, pero no es obligatoria
+            'deps': ['subtitles'], 'soft_deps': ['diarization'],
+            'inputs': [srt], 'optional_inputs': [EDITING_GUIDE_PATH, EDITING_GUIDE_JOURNAL],
+            'outputs': [metadata, calendar,
+                        os.path.join(METADATA_DIR, f"{episode}_chapters.json"),
+                        os.path.join(METADATA_DIR, f"{episode}_youtube.txt"),
+                        os.path.join(METADATA_DIR, f"{episode}_content_table.csv")]
+        },
+        'visual_markers': {
+            'script': 'generate_visual_markers.py', 'args': [],
+            'deps': ['subtitles'], 'soft_deps': [],
+            'inputs': [srt], 'optional_inputs': [],
+            'outputs': [os.path.join(METADATA_DIR, f"{episode}_visual_markers.json"),
+                        os.path.join(METADATA_DIR, f"{episode}_visual_guide.txt"),
+                        os.path.join(METADATA_DIR, f"{episode}_visual_timeline.csv")]
+        },
+        'clips': {
+            'script': 'generate_clips.py', 'args': (['--vertical'] if vertical else []) + subtitle_flag,
+            'deps': ['chapters', 'assemble'], 'soft_deps': [],
+            'inputs': [metadata, video] + ([srt] if burn_subtitles else []),
+            'optional_inputs': [EDITING_GUIDE_PATH, EDITING_GUIDE_JOURNAL],
+            'outputs': ['./output/clips/.clips_manifest.json', './output/viral_clips/.clips_manifest.json']
+        }
+    }
+
+    if notion_date:
+        stages['notion'] = {
+            'script': 'sync_to_notion.py', 'args': [notion_date],
+            'deps': ['chapters'], 'soft_deps': [],
+            'inputs': [calendar], 'optional_inputs': [],
+            'outputs': []
+        }
+
+    if combined_audio:
+        # Una sola etapa (analyze_audio.py) decodifica el audio una vez y corre ambos modelos
+        stages = _merge_audio_stages(stages)
+
+    return stages
+
+def _merge_audio_stages(stages):
+    merged = {
+        'audio': {
+            'script': 'analyze_audio.py', 'args': [],
+            'deps': [], 'soft_deps': [],
+            'inputs': stages['diarization']['inputs'], 'optional_inputs': [],
+            'outputs': stages['diarization']['outputs'] + stages['subtitles']['outputs']
+        }
+    }
+    replaced = ('diarization', 'subtitles')
+    for name, stage in stages.items():
+        if name in replaced:
+            continue
+        for key in ('deps', 'soft_deps'):
+            deps = [d for d in stage[key] if d not in replaced]
+            if any(d in replaced for d in stage[key]) and 'audio' not in stage['deps']:
+                deps.insert(0, 'audio')
+            stage[key] = deps
+        merged[name] = stage
+    return merged
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+    try:
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"⚠️  Estado del pipeline inválido, se regenerará: {STATE_PATH}")
+        return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+    if state.get('version') != STATE_VERSION:
+        return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+    state.setdefault('files', {})
+    state.setdefault('stages', {})
+    return state
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp_path = STATE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, STATE_PATH)
+
+def content_hash(path, state):
+    """
+    SHA-256 del archivo, reutilizando el guardado en el estado si no cambió el tamaño
+    ni la fecha de modificación (evita releer videos de varios GB en cada corrida)
+
+    Returns:
+        str: Hash, o None si el archivo no existe
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    cached = state['files'].get(path)
+    if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+        return cached['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    state['files'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    return digest.hexdigest()
+
+def stage_fingerprint(stage, state):
+    """
+    Hashes de todo lo que determina el resultado de la etapa
+    """
+    return {
+        'command': [stage['script']] + stage['args'],
+        'inputs': {path: content_hash(path, state) for path in stage['inputs'] + stage['optional_inputs']}
+    }
+
+def is_up_to_date(name, stage, state):
+    """
+    Una etapa está al día si corrió bien con las mismas entradas y el mismo comando, y sus
+    salidas siguen siendo las que produjo (no se borraron ni se editaron después)
+    """
+    record = state['stages'].get(name)
+    if not record:
+        return False
+    fingerprint = stage_fingerprint(stage, state)
+    if record.get('command') != fingerprint['command'] or record.get('inputs') != fingerprint['inputs']:
+        return False
+    return all(content_hash(path, state) == record.get('outputs', {}).get(path) for path in stage['outputs'])
+
+def run_stage(name, stage):
+    """
+    Ejecuta el script de la etapa en un subproceso, con su salida en un log propio
+
+    Returns:
+        dict: {'ok', 'elapsed', 'log_path', 'returncode'}
+    """
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    log_path = os.path.join(LOGS_DIR, f"{name}.log")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), stage['script'])
+    # El entorno también lleva el episodio y el run_id del pipeline al registro de cada script
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+
+    started = time.perf_counter()
+    # Con --profile el script hijo hereda el perfilado por el entorno y agrega sus fases a la traza
+    with open(log_path, 'w', encoding='utf-8') as log, profiling.span(name, script=stage['script']):
+        returncode = subprocess.run([sys.executable, script] + stage['args'], stdout=log,
+                                    stderr=subprocess.STDOUT, env=env).returncode
+    elapsed = time.perf_counter() - started
+
+    # Algunos scripts terminan con exit() (código 0) ante un error: se validan las salidas
+    missing = [path for path in stage['outputs'] if not os.path.exists(path)]
+    return {'ok': returncode == 0 and not missing, 'elapsed': elapsed, 'log_path': log_path,
+            'returncode': returncode, 'missing': missing}
+
+def print_log_tail(log_path, lines=LOG_TAIL_LINES):
+    try:
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+            tail = f.read().splitlines()[-lines:]
+    except OSError:
+        return
+    for line in tail:
+        print(f"      {line}")
+
+def run_pipeline(stages, state, jobs=DEFAULT_JOBS, force=False, dry_run=False):
+    """
+    Recorre el DAG: cada etapa se evalúa cuando terminan sus dependencias (así un cambio
+    aguas arriba se detecta por hash) y las etapas listas se ejecutan en paralelo
+
+    Returns:
+        dict: {nombre: 'ok' | 'al día' | 'falló' | 'bloqueada' | 'omitida' | 'se ejecutaría'}
+    """
+    status = {}
+    pending = dict(stages)
+    running = {}
+    produced = {path for stage in stages.values() for path in stage['outputs']}
+
+    def deps_done(stage):
+        waiting = [d for d in stage['deps'] + stage['soft_deps'] if d in stages]
+        return all(d in status for d in waiting)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for name in [n for n, s in pending.items() if deps_done(s)]:
+                stage = pending.pop(name)
+
+                failed_deps = [d for d in stage['deps'] if d in stages and status[d] not in ('ok', 'al día', 'se ejecutaría')]
+                if failed_deps:
+                    status[name] = 'omitida'
+                    reasons = ', '.join(f"{d} {status[d]}" for d in failed_deps)
+                    print(f"   ⏭️  {name}: omitida ({reasons})")
+                    continue
+
+                upstream_changes = any(status.get(d) == 'se ejecutaría' for d in stage['deps'] + stage['soft_deps'])
+                if not force and not upstream_changes and is_up_to_date(name, stage, state):
+                    status[name] = 'al día'
+                    print(f"   ✓ {name}: al día")
+                    continue
+
+                # En --dry-run las entradas que generaría otra etapa todavía no existen
+                missing = [path for path in stage['inputs']
+                           if not os.path.exists(path) and not (dry_run and path in produced)]
+                if missing:
+                    status[name] = 'bloqueada'
+                    print(f"   ⏸️  {name}: bloqueada, faltan {', '.join(missing)}")
+                    continue
+
+                if dry_run:
+                    status[name] = 'se ejecutaría'
+                    print(f"   ▶ {name}: se ejecutaría ({' '.join(['python', stage['script']] + stage['args'])})")
+                    continue
+
+                print(f"   ▶ {name}: python {' '.join([stage['script']] + stage['args'])}")
+                running[pool.submit(run_stage, name, stage)] = name
+
+            if not running:
+                # Las etapas al día se resuelven sin ejecutar nada: volver a evaluar las que dependen de ellas
+                if any(deps_done(s) for s in pending.values()):
+                    continue
+                # Dependencias circulares (no debería pasar): se marcan como omitidas
+                for name in list(pending):
+                    status[name] = 'omitida'
+                    pending.pop(name)
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stage = stages[name]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'ok': False, 'elapsed': 0, 'log_path': None, 'returncode': None,
+                              'missing': [], 'error': str(e)}
+
+                run_log.event('stage', stage=name, status='ok' if result['ok'] else 'error',
+                              duration_seconds=round(result['elapsed'], 3), returncode=result['returncode'],
+                              missing=result['missing'] or None)
+                if result['ok']:
+                    status[name] = 'ok'
+                    fingerprint = stage_fingerprint(stage, state)
+                    state['stages'][name] = dict(
+                        fingerprint,
+                        outputs={path: content_hash(path, state) for path in stage['outputs']},
+                        finished_at=datetime.now().isoformat(timespec='seconds'),
+                        elapsed=round(result['elapsed'], 1)
+                    )
+                    save_state(state)
+                    print(f"   ✓ {name}: completada en {result['elapsed']:.1f}s")
+                else:
+                    status[name] = 'falló'
+                    state['stages'].pop(name, None)
+                    save_state(state)
+                    reason = (f"código {result['returncode']}" if result['returncode'] else
+                              f"no generó {', '.join(result['missing'])}" if result['missing'] else
+                              result.get('error', 'error desconocido'))
+                    print(f"   ❌ {name}: falló ({reason}). Log: {result['log_path']}")
+                    if result['log_path']:
+                        print_log_tail(result['log_path'])
+
+    return status
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ejecuta el flujo completo del episodio, saltando las etapas que ya están al día'
+    )
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f'Etapas ejecutadas a la vez (default: {DEFAULT_JOBS})')
+    parser.add_argument('--only', nargs='+', default=None,
+                        help='Ejecutar solo estas etapas (las demás se consideran ya hechas)')
+    parser.add_argument('--force', action='store_true',
+                        help='Ejecutar las etapas aunque estén al día')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Mostrar qué etapas se ejecutarían sin ejecutarlas')
+    parser.add_argument('--burn-subtitles', action='store_true',
+                        help='Quemar subtítulos en el video final y en los clips')
+    parser.add_argument('--vertical', action='store_true',
+                        help='Exportar los clips virales en vertical 9:16')
+    parser.add_argument('--notion-date', default=None,
+                        help='Sincronizar el calendario a Notion desde este lunes (DD-MM-AAAA)')
+    parser.add_argument('--combined-audio', action='store_true',
+                        help='Diarización y transcripción en una sola etapa (analyze_audio.py)')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('pipeline', args)
+    run_log.start('pipeline')
+
+    print("=" * 80)
+    print("  PIPELINE - AI PODCAST PRODUCER")
+    print("=" * 80)
+
+    episode = find_episode()
+    if not episode:
+        print(f"❌ ERROR: No se encontró ningún archivo .m4a en {INPUT_DIR}")
+        return 1
+    print(f"\n✓ Episodio: {episode}")
+    run_log.set_episode(episode)
+
+    stages = build_stages(episode, burn_subtitles=args.burn_subtitles, vertical=args.vertical,
+                          notion_date=args.notion_date, combined_audio=args.combined_audio)
+    if args.only:
+        unknown = [name for name in args.only if name not in stages]
+        if unknown:
+            print(f"❌ ERROR: Etapas desconocidas: {', '.join(unknown)}")
+            print(f"   Etapas disponibles: {', '.join(stages)}")
+            return 1
+        stages = {name: stage for name, stage in stages.items() if name in args.only}
+
+    print(f"   Etapas: {', '.join(stages)} ({args.jobs} a la vez)\n")
+
+    state = load_state()
+    started = time.perf_counter()
+    profiling.phase('run_stages')
+    status = run_pipeline(stages, state, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    if not args.dry_run:
+        save_state(state)
+    profiling.phase(None)
+    for result in status.values():
+        run_log.count(**{f"stages_{STATUS_COUNTERS[result]}": 1})
+
+    print("\n" + "=" * 80)
+    print(f"📊 RESUMEN ({time.perf_counter() - started:.1f}s):")
+    for name in stages:
+        print(f"   • {name}: {status.get(name, 'omitida')}")
+    print("=" * 80)
+
+    return 1 if any(s == 'falló' for s in status.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(run_log.finish(main()))
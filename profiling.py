@@ -0,0 +1,319 @@
+# Módulo: profiling.py
+# Requisitos: Ninguno (solo librería estándar)
+# Descripción: Perfilado opcional por fases de los scripts (--profile). Cada paso del
+#              script es una fase con su tiempo real y de CPU, y se pueden anidar spans
+#              más finos. Al terminar se imprime un resumen y se guarda una línea de tiempo
+#              en formato Chrome Trace (se abre en Perfetto, chrome://tracing o Speedscope)
+#              y, con --profile-cprofile, un .prof de cProfile por fase (pstats, snakeviz).
+#              Sin --profile todas las funciones son no-ops de costo despreciable.
+#
+#              Los procesos hijos (ej: las etapas de pipeline.py) heredan el perfilado
+#              por variables de entorno y escriben en la misma carpeta; el proceso raíz
+#              junta todas las trazas en timeline.json
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import cProfile
+import threading
+import contextlib
+from datetime import datetime
+
+# --- CONFIGURACIÓN ---
+PROFILE_ROOT = "./output/.profiles"
+# Las heredan los procesos hijos (PROFILE_MODE=1 o =cprofile también activa el perfilado a mano)
+ENV_MODE = "PROFILE_MODE"
+ENV_DIR = "PROFILE_DIR"
+TIMELINE_NAME = "timeline.json"
+
+_profiler = None
+
+
+class Profiler:
+    """
+    Registro de spans de un proceso (seguro entre hilos)
+    """
+
+    def __init__(self, script, run_dir, use_cprofile=False, is_root=True):
+        self.script = script
+        self.run_dir = run_dir
+        self.use_cprofile = use_cprofile
+        self.is_root = is_root
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.events = []
+        self.threads = {}
+        self.workers = {}
+        self.totals = {}
+        self.cprofiles = {}
+        self.active_cprofile = None
+        self.current_phase = None
+        # Marcas de reloj: perf_counter para las duraciones y la hora real para alinear procesos
+        self.origin_perf = time.perf_counter_ns()
+        self.origin_wall = time.time_ns()
+        self.started_cpu = time.process_time()
+
+    def timestamp_us(self, perf_ns):
+        return (self.origin_wall + perf_ns - self.origin_perf) / 1000
+
+    def record(self, name, started_ns, ended_ns, cpu_seconds, category, args):
+        thread = threading.current_thread()
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': thread.ident,
+                 'ts': round(self.timestamp_us(started_ns), 1), 'dur': round((ended_ns - started_ns) / 1000, 1)}
+        if args:
+            event['args'] = args
+        with self.lock:
+            self.events.append(event)
+            self.threads[thread.ident] = thread.name
+            total = self.totals.setdefault((category, name), [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += (ended_ns - started_ns) / 1e9
+            total[2] += cpu_seconds
+
+    def start_cprofile(self, name):
+        """
+        cProfile de la fase (solo en el hilo principal y sin otra fase perfilándose:
+        Python no permite dos perfiladores activos a la vez)
+        """
+        if (not self.use_cprofile or self.active_cprofile is not None
+                or threading.current_thread() is not threading.main_thread()):
+            return None
+        profile = self.cprofiles.setdefault(name, cProfile.Profile())
+        try:
+            profile.enable()
+        except ValueError:
+            return None  # Hay otro perfilador activo (ej: python -m cProfile)
+        self.active_cprofile = profile
+        return profile
+
+    def stop_cprofile(self, profile):
+        if profile is not None:
+            profile.disable()
+            self.active_cprofile = None
+
+
+def _slug(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'fase'
+
+def _rss_mb():
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+def add_arguments(parser):
+    """
+    Agrega --profile y --profile-cprofile a un ArgumentParser
+    """
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Medir el tiempo de cada fase y guardar una línea de tiempo en {PROFILE_ROOT}')
+    parser.add_argument('--profile-cprofile', action='store_true',
+                        help='Como --profile, y además guardar un .prof de cProfile por fase')
+
+def enabled():
+    return _profiler is not None
+
+def start(script, args=None):
+    """
+    Activa el perfilado si se pidió (--profile, --profile-cprofile o PROFILE_MODE en el entorno)
+
+    Args:
+        script: Nombre del script (aparece en la línea de tiempo)
+        args: Namespace de argparse con las opciones de add_arguments()
+
+    Returns:
+        str: Carpeta de resultados, o None si el perfilado está apagado
+    """
+    global _profiler
+    env_mode = os.getenv(ENV_MODE, "0")
+    use_cprofile = bool(getattr(args, 'profile_cprofile', False)) or env_mode == 'cprofile'
+    if not (getattr(args, 'profile', False) or use_cprofile or env_mode not in ('', '0')):
+        return None
+    if _profiler is not None:
+        return _profiler.run_dir
+
+    run_dir = os.getenv(ENV_DIR)
+    is_root = not run_dir
+    if is_root:
+        run_dir = os.path.join(PROFILE_ROOT, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{script}")
+    os.makedirs(run_dir, exist_ok=True)
+    # Los subprocesos que también usen este módulo escriben en la misma carpeta
+    os.environ[ENV_MODE] = 'cprofile' if use_cprofile else '1'
+    os.environ[ENV_DIR] = run_dir
+
+    _profiler = Profiler(script, run_dir, use_cprofile, is_root)
+    atexit.register(finish)
+    return run_dir
+
+def phase(name):
+    """
+    Cierra la fase anterior y abre una nueva (los pasos secuenciales de un script)
+
+    Las fases son del hilo principal: llamada desde otro hilo (ej: process_transcript
+    dentro de batch_metadata.py) no hace nada; ahí se usan spans.
+
+    Args:
+        name: Nombre de la fase, o None para solo cerrar la actual
+    """
+    profiler = _profiler
+    if profiler is None or threading.current_thread() is not threading.main_thread():
+        return
+    current = profiler.current_phase
+    if current is not None:
+        name_, started_ns, started_cpu, profile = current
+        profiler.stop_cprofile(profile)
+        profiler.record(name_, started_ns, time.perf_counter_ns(), time.process_time() - started_cpu,
+                        'phase', {'rss_mb': _rss_mb()})
+        profiler.current_phase = None
+    if name is not None:
+        profile = profiler.start_cprofile(name)
+        profiler.current_phase = (name, time.perf_counter_ns(), time.process_time(), profile)
+
+@contextlib.contextmanager
+def span(name, **args):
+    """
+    Mide un bloque dentro de la fase actual (se puede anidar y usar desde otros hilos)
+
+    Args:
+        name: Nombre del span
+        **args: Datos que se guardan con el evento (ej: número de cortes)
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    started_ns = time.perf_counter_ns()
+    # El tiempo de CPU de un span es el de todo el proceso: solo es exacto sin otros hilos trabajando
+    started_cpu = time.process_time()
+    try:
+        yield
+    finally:
+        profiler.record(name, started_ns, time.perf_counter_ns(), time.process_time() - started_cpu,
+                        'span', args)
+
+def add_event(name, started_at, seconds, pid=None, **args):
+    """
+    Registra un intervalo medido en otro proceso que no perfila por su cuenta
+    (ej: un worker de ProcessPoolExecutor que devuelve cuándo empezó y cuánto tardó)
+
+    Args:
+        started_at: Inicio según time.time() del otro proceso
+        seconds: Duración
+        pid: Proceso donde ocurrió (aparece como su propia fila en la línea de tiempo)
+    """
+    profiler = _profiler
+    if profiler is None:
+        return
+    pid = pid or profiler.pid
+    event = {'name': name, 'cat': 'worker', 'ph': 'X', 'pid': pid, 'tid': pid,
+             'ts': round(started_at * 1e6, 1), 'dur': round(seconds * 1e6, 1)}
+    if args:
+        event['args'] = args
+    with profiler.lock:
+        profiler.events.append(event)
+        profiler.workers[pid] = name
+        total = profiler.totals.setdefault(('worker', name), [0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += seconds
+
+def traced(name=None):
+    """
+    Decorador: cada llamada a la función es un span (con el nombre de la función por defecto)
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+def merge_traces(paths, output_path):
+    """
+    Junta las trazas de varios procesos en una sola línea de tiempo
+
+    Returns:
+        int: Número de eventos escritos
+    """
+    events = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                events.extend(json.load(f).get('traceEvents', []))
+        except (OSError, ValueError):
+            continue
+    _write_json(output_path, {'traceEvents': events, 'displayTimeUnit': 'ms'})
+    return len(events)
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def print_summary(profiler, wall_seconds):
+    # A stderr: no se mezcla con salidas que se procesan (ej: search_transcripts.py --json)
+    print(f"\n⏱️  Perfil de {profiler.script} ({wall_seconds:.2f}s, "
+          f"CPU {time.process_time() - profiler.started_cpu:.2f}s)", file=sys.stderr)
+    rows = sorted(profiler.totals.items(), key=lambda item: (item[0][0] != 'phase', -item[1][1]))
+    for (category, name), (count, total, cpu) in rows:
+        share = total / wall_seconds * 100 if wall_seconds else 0
+        label = {'phase': name, 'span': f"  · {name}"}.get(category, f"  ⇉ {name}")
+        calls = f" ×{count}" if count > 1 else ""
+        cpu_label = f"CPU {cpu:>8.3f}s" if category != 'worker' else "(otro proceso)"
+        print(f"   {label[:44]:<44} {total:>9.3f}s {share:>5.1f}%  {cpu_label}{calls}", file=sys.stderr)
+
+def finish():
+    """
+    Cierra la fase abierta, escribe la traza (y los .prof) e imprime el resumen.
+    Se llama sola al salir del proceso.
+    """
+    global _profiler
+    profiler = _profiler
+    if profiler is None:
+        return
+    phase(None)
+    ended_ns = time.perf_counter_ns()
+    wall_seconds = (ended_ns - profiler.origin_perf) / 1e9
+    _profiler = None
+
+    # Evento raíz con todo el proceso y nombres de proceso/hilos para los visores
+    events = [{'name': profiler.script, 'cat': 'script', 'ph': 'X', 'pid': profiler.pid,
+               'tid': threading.main_thread().ident, 'ts': round(profiler.timestamp_us(profiler.origin_perf), 1),
+               'dur': round(wall_seconds * 1e6, 1), 'args': {'argv': sys.argv[1:]}},
+              {'name': 'process_name', 'ph': 'M', 'pid': profiler.pid,
+               'args': {'name': f"{profiler.script} ({profiler.pid})"}}]
+    events += [{'name': 'thread_name', 'ph': 'M', 'pid': profiler.pid, 'tid': tid, 'args': {'name': name}}
+               for tid, name in profiler.threads.items()]
+    events += [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f"{name} ({pid})"}}
+               for pid, name in profiler.workers.items() if pid != profiler.pid]
+    trace_path = os.path.join(profiler.run_dir, f"{profiler.script}.{profiler.pid}.trace.json")
+    _write_json(trace_path, {'traceEvents': events + profiler.events, 'displayTimeUnit': 'ms'})
+
+    for name, profile in profiler.cprofiles.items():
+        profile.dump_stats(os.path.join(profiler.run_dir, f"{profiler.script}.{_slug(name)}.prof"))
+
+    print_summary(profiler, wall_seconds)
+    output_path = trace_path
+    if profiler.is_root:
+        traces = sorted(os.path.join(profiler.run_dir, f) for f in os.listdir(profiler.run_dir)
+                        if f.endswith('.trace.json'))
+        if len(traces) > 1:
+            output_path = os.path.join(profiler.run_dir, TIMELINE_NAME)
+            merge_traces(traces, output_path)
+    print(f"   📄 Línea de tiempo: {output_path} (Perfetto / chrome://tracing / speedscope.app)", file=sys.stderr)
+    if profiler.cprofiles:
+        print(f"   📄 cProfile por fase: {profiler.run_dir}/*.prof (python -m pstats, snakeviz)", file=sys.stderr)
@@ -0,0 +1,346 @@
+# Módulo: run_log.py
+# Requisitos: pip install python-dotenv
+# Descripción: Registro estructurado de cada ejecución de los scripts: una línea JSON por
+#              ejecución (episodio, tamaños de entrada, duración, segmentos/cortes/clips,
+#              tokens y costo de OpenAI, bytes escritos) en output/.logs/runs.jsonl, más
+#              eventos sueltos (ej: cada etapa de pipeline.py). Opcionalmente mantiene un
+#              archivo .prom para el textfile collector de Prometheus (node_exporter), con
+#              totales acumulados por script. Así el rendimiento y el costo por episodio se
+#              pueden seguir en un dashboard sin leer la consola
+
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import socket
+import threading
+import contextlib
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+RUN_LOG = os.getenv("RUN_LOG", "1") != "0"  # RUN_LOG=0 desactiva el registro
+# En un directorio oculto: el historial sobrevive a archive_and_clean.sh (que borra output/*)
+RUN_LOG_PATH = os.getenv("RUN_LOG_PATH", "./output/.logs/runs.jsonl")
+# Carpeta del textfile collector de node_exporter (vacío = sin exportador)
+PROMETHEUS_TEXTFILE_DIR = os.getenv("PROMETHEUS_TEXTFILE_DIR") or None
+PROMETHEUS_FILE = "podcast_producer.prom"
+TOTALS_PATH = os.path.join(os.path.dirname(RUN_LOG_PATH), ".metrics_totals.json")
+# Los procesos hijos (ej: las etapas de pipeline.py) heredan el episodio y la ejecución padre
+ENV_PARENT_RUN = "RUN_LOG_PARENT_ID"
+ENV_EPISODE = "RUN_LOG_EPISODE"
+
+_run = None
+# Los trabajos de batch_metadata.py registran salidas desde varios hilos
+_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now().astimezone().isoformat(timespec='seconds')
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+@contextlib.contextmanager
+def _locked():
+    """
+    Lock entre procesos (las etapas de pipeline.py escriben a la vez)
+    """
+    os.makedirs(os.path.dirname(RUN_LOG_PATH) or '.', exist_ok=True)
+    with open(RUN_LOG_PATH + '.lock', 'a') as lock:
+        try:
+            import fcntl
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        except ImportError:
+            pass  # Windows: sin lock (las líneas cortas igual se escriben enteras)
+        yield
+
+def _peak_rss_mb():
+    try:
+        import inference_runtime
+        return inference_runtime.peak_rss_mb()
+    except ImportError:
+        return None  # Windows: no existe el módulo resource
+
+def _append(record):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _locked():
+        with open(RUN_LOG_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+def start(script, episode=None, **fields):
+    """
+    Abre el registro de la ejecución actual (se escribe al terminar, con finish())
+
+    Args:
+        script: Nombre del script
+        episode: Nombre base del episodio, si ya se conoce (si no, el que pasó el proceso padre)
+        **fields: Datos extra de la ejecución (ej: opciones usadas)
+    """
+    global _run
+    if not RUN_LOG or _run is not None:
+        return
+    _run = {
+        'run_id': uuid.uuid4().hex[:12],
+        'parent_run_id': os.getenv(ENV_PARENT_RUN),
+        'script': script,
+        'episode': episode or os.getenv(ENV_EPISODE),
+        'started_at': _now(),
+        'argv': sys.argv[1:],
+        'host': socket.gethostname(),
+        'pid': os.getpid(),
+        'inputs': {},
+        'outputs': [],
+        'counts': {},
+        'fields': dict(fields),
+        'error': None,
+        '_started': time.perf_counter(),
+        '_cpu': time.process_time()
+    }
+    os.environ[ENV_PARENT_RUN] = _run['run_id']
+    if _run['episode']:
+        os.environ[ENV_EPISODE] = _run['episode']
+
+    # Una excepción no controlada deja la ejecución marcada como fallida
+    previous_hook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        if _run is not None:
+            _run['error'] = f"{exc_type.__name__}: {exc}"
+        previous_hook(exc_type, exc, tb)
+    sys.excepthook = excepthook
+    atexit.register(finish)
+
+def set_episode(episode):
+    """
+    Episodio de la ejecución (los scripts lo conocen después de buscar la entrada)
+    """
+    if _run is not None and episode:
+        _run['episode'] = episode
+        os.environ[ENV_EPISODE] = episode
+
+def set_fields(**fields):
+    if _run is not None:
+        _run['fields'].update(fields)
+
+def add_input(path):
+    """
+    Registra un archivo de entrada con su tamaño actual
+    """
+    if _run is not None:
+        with _lock:
+            _run['inputs'][path] = _file_size(path)
+
+def add_output(path):
+    """
+    Registra un archivo de salida (el tamaño se mide al terminar)
+    """
+    if _run is None:
+        return
+    with _lock:
+        if path not in _run['outputs']:
+            _run['outputs'].append(path)
+
+def count(**counts):
+    """
+    Suma contadores de la ejecución (ej: count(segments=120, cuts=85))
+    """
+    if _run is None:
+        return
+    with _lock:
+        for key, value in counts.items():
+            _run['counts'][key] = _run['counts'].get(key, 0) + (value or 0)
+
+def event(name, **fields):
+    """
+    Escribe un evento suelto en el registro (ej: una etapa de pipeline.py o un trabajo del lote)
+    """
+    if not RUN_LOG:
+        return
+    record = {'ts': _now(), 'event': name}
+    if _run is not None:
+        record.update(run_id=_run['run_id'], script=_run['script'], episode=_run['episode'])
+    record.update(fields)
+    _append(record)
+
+def openai_usage(label=None):
+    """
+    Tokens y costo de OpenAI de este proceso (None si no se usó openai_client.py)
+    """
+    client = sys.modules.get('openai_client')
+    if client is None:
+        return None
+    usage = client.usage_summary(label)
+    return usage if usage['calls'] else None
+
+def finish(exit_code=None):
+    """
+    Cierra la ejecución y escribe su registro (se llama sola al salir del proceso)
+
+    Args:
+        exit_code: Código de salida de main(); distinto de 0/None = ejecución fallida
+
+    Returns:
+        El mismo exit_code (para usar como sys.exit(run_log.finish(main())))
+    """
+    global _run
+    run = _run
+    if run is None:
+        return exit_code
+    _run = None
+
+    failed = run['error'] is not None or exit_code not in (0, None)
+    outputs = {path: _file_size(path) for path in run['outputs']}
+    record = {
+        'ts': _now(),
+        'event': 'run',
+        'run_id': run['run_id'],
+        'parent_run_id': run['parent_run_id'],
+        'script': run['script'],
+        'episode': run['episode'],
+        'status': 'error' if failed else 'ok',
+        'exit_code': exit_code,
+        'error': run['error'],
+        'started_at': run['started_at'],
+        'duration_seconds': round(time.perf_counter() - run['_started'], 3),
+        'cpu_seconds': round(time.process_time() - run['_cpu'], 3),
+        'peak_rss_mb': _peak_rss_mb(),
+        'inputs': run['inputs'],
+        'input_bytes': sum(size or 0 for size in run['inputs'].values()),
+        'outputs': outputs,
+        'output_bytes': sum(size or 0 for size in outputs.values()),
+        'counts': run['counts'],
+        'openai': openai_usage(),
+        'argv': run['argv'],
+        'host': run['host'],
+        'pid': run['pid'],
+        **run['fields']
+    }
+    try:
+        _append(record)
+        if PROMETHEUS_TEXTFILE_DIR:
+            update_prometheus(record)
+    except OSError as e:
+        # El registro nunca debe romper el script
+        print(f"⚠️  No se pudo escribir el registro de la ejecución: {e}", file=sys.stderr)
+    return exit_code
+
+
+# --- EXPORTADOR DE PROMETHEUS ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+def _load_totals():
+    try:
+        with open(TOTALS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def accumulate(totals, record):
+    """
+    Suma una ejecución a los totales por script (contadores de Prometheus)
+    """
+    script = record['script']
+    per_script = totals.setdefault(script, {'runs': {}, 'duration_seconds': 0.0, 'cpu_seconds': 0.0,
+                                            'input_bytes': 0, 'output_bytes': 0, 'counts': {},
+                                            'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0})
+    per_script['runs'][record['status']] = per_script['runs'].get(record['status'], 0) + 1
+    for key in ('duration_seconds', 'cpu_seconds', 'input_bytes', 'output_bytes'):
+        per_script[key] += record[key]
+    for kind, value in record['counts'].items():
+        per_script['counts'][kind] = per_script['counts'].get(kind, 0) + value
+    usage = record['openai'] or {}
+    per_script['prompt_tokens'] += usage.get('prompt_tokens', 0)
+    per_script['completion_tokens'] += usage.get('completion_tokens', 0)
+    per_script['cost_usd'] += usage.get('cost_usd') or 0
+    per_script['last'] = {'status': record['status'], 'duration_seconds': record['duration_seconds'],
+                          'peak_rss_mb': record['peak_rss_mb'], 'episode': record['episode'],
+                          'timestamp': time.time()}
+    return totals
+
+def render_prometheus(totals):
+    """
+    Totales en el formato de texto de Prometheus
+
+    Returns:
+        str: Contenido del archivo .prom
+    """
+    metrics = [
+        ('podcast_runs_total', 'counter', 'Ejecuciones por script y resultado'),
+        ('podcast_run_seconds_total', 'counter', 'Tiempo real acumulado por script'),
+        ('podcast_run_cpu_seconds_total', 'counter', 'Tiempo de CPU acumulado por script'),
+        ('podcast_input_bytes_total', 'counter', 'Bytes leídos de las entradas registradas'),
+        ('podcast_output_bytes_total', 'counter', 'Bytes escritos en las salidas registradas'),
+        ('podcast_items_total', 'counter', 'Elementos procesados (segmentos, cortes, clips...)'),
+        ('podcast_openai_tokens_total', 'counter', 'Tokens de OpenAI por tipo'),
+        ('podcast_openai_cost_usd_total', 'counter', 'Costo estimado de OpenAI en USD'),
+        ('podcast_last_run_duration_seconds', 'gauge', 'Duración de la última ejecución'),
+        ('podcast_last_run_peak_rss_mb', 'gauge', 'Memoria pico de la última ejecución'),
+        ('podcast_last_run_success', 'gauge', '1 si la última ejecución terminó bien'),
+        ('podcast_last_run_timestamp_seconds', 'gauge', 'Hora (epoch) de la última ejecución')
+    ]
+    samples = {name: [] for name, _, _ in metrics}
+    for script, data in sorted(totals.items()):
+        for status, runs in sorted(data['runs'].items()):
+            samples['podcast_runs_total'].append((_labels(script=script, status=status), runs))
+        samples['podcast_run_seconds_total'].append((_labels(script=script), round(data['duration_seconds'], 3)))
+        samples['podcast_run_cpu_seconds_total'].append((_labels(script=script), round(data['cpu_seconds'], 3)))
+        samples['podcast_input_bytes_total'].append((_labels(script=script), data['input_bytes']))
+        samples['podcast_output_bytes_total'].append((_labels(script=script), data['output_bytes']))
+        for kind, value in sorted(data['counts'].items()):
+            samples['podcast_items_total'].append((_labels(script=script, kind=kind), value))
+        for kind in ('prompt', 'completion'):
+            if data[f'{kind}_tokens']:
+                samples['podcast_openai_tokens_total'].append((_labels(script=script, type=kind),
+                                                               data[f'{kind}_tokens']))
+        if data['cost_usd']:
+            samples['podcast_openai_cost_usd_total'].append((_labels(script=script), round(data['cost_usd'], 6)))
+        last = data.get('last')
+        if last:
+            samples['podcast_last_run_duration_seconds'].append((_labels(script=script), last['duration_seconds']))
+            if last.get('peak_rss_mb') is not None:
+                samples['podcast_last_run_peak_rss_mb'].append((_labels(script=script), last['peak_rss_mb']))
+            samples['podcast_last_run_success'].append((_labels(script=script), int(last['status'] == 'ok')))
+            samples['podcast_last_run_timestamp_seconds'].append((_labels(script=script), round(last['timestamp'])))
+
+    lines = []
+    for name, kind, help_text in metrics:
+        if not samples[name]:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{labels} {value}" for labels, value in samples[name]]
+    return '\n'.join(lines) + '\n'
+
+def update_prometheus(record):
+    """
+    Suma la ejecución a los totales y reescribe el .prom (atómico: el collector nunca lee uno a medias)
+
+    Todo ocurre dentro del lock: si el .prom se reemplazara después de soltarlo, una etapa
+    concurrente podría pisar unos totales nuevos con unos viejos y los contadores
+    retrocederían (Prometheus lo toma como un reinicio del contador)
+    """
+    with _locked():
+        totals = accumulate(_load_totals(), record)
+        tmp_path = TOTALS_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(totals, f, indent=2)
+        os.replace(tmp_path, TOTALS_PATH)
+
+        os.makedirs(PROMETHEUS_TEXTFILE_DIR, exist_ok=True)
+        prom_path = os.path.join(PROMETHEUS_TEXTFILE_DIR, PROMETHEUS_FILE)
+        tmp_path = f"{prom_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(render_prometheus(totals))
+        os.replace(tmp_path, prom_path)
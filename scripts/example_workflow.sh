@@ -13,6 +13,19 @@ echo "  WORKFLOW COMPLETO - AI PODCAST PRODUCER"
 echo "========================================="
 echo ""
 
+# --------------------------
+# ATAJO: Orquestador
+# --------------------------
+echo "ATAJO: Ejecutar todas las etapas automáticas con el orquestador"
+echo "Comando:"
+echo "  python pipeline.py --dry-run   # Ver qué etapas están pendientes"
+echo "  python pipeline.py             # Ejecutarlas (transcripción y diarización en paralelo)"
+echo ""
+echo "  Omite las etapas que ya están al día (hash de entradas y salidas)"
+echo "  y se detiene en 'assemble' hasta que estén los videos de HeyGen (PASO 3)."
+echo "  Después de descargarlos, volver a correr: python pipeline.py"
+echo ""
+
 # --------------------------
 # PASO 1: Preparar Input
 # --------------------------
@@ -54,6 +67,7 @@ echo ""
 echo "PASO 4: Ensamblar video final"
 echo "Comando:"
 echo "  python assemble_video.py"
+echo "  (o: python pipeline.py, que también genera subtítulos, metadata y clips)"
 echo ""
 echo "Output esperado:"
 echo "  - output/final_episode.mp4"
@@ -0,0 +1,342 @@
+# Script: search_transcripts.py
+# Requisitos: pip install numpy (SQLite con FTS5 viene incluido en Python)
+# Descripción: Índice de búsqueda de texto completo (SQLite FTS5) sobre todas las
+#              transcripciones: las .srt de /output/transcriptions y las que quedaron
+#              dentro de los .zip de /archives. Se actualiza de forma incremental y
+#              devuelve hits rankeados con episodio y tiempos de inicio/fin en ms,
+#              listos para usar como rango de un clip
+
+import os
+import io
+import sys
+import re
+import json
+import time
+import sqlite3
+import zipfile
+import hashlib
+import argparse
+from datetime import datetime
+
+import transcript
+import run_log
+import profiling
+
+# --- CONFIGURACIÓN ---
+TRANSCRIPTIONS_DIR = "./output/transcriptions"
+ARCHIVES_DIR = "./archives"
+# En un directorio oculto: sobrevive a archive_and_clean.sh (que borra output/*)
+INDEX_PATH = "./output/.cache/transcript_index.db"
+INDEX_VERSION = 1
+TRANSCRIPT_EXTENSIONS = ('.srt', '.vtt')
+DEFAULT_LIMIT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    episode TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    cue_count INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cues (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    cue INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cues_by_source ON cues(source_id, cue);
+CREATE VIRTUAL TABLE IF NOT EXISTS cues_fts USING fts5(
+    text, content='cues', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+def open_index(index_path=INDEX_PATH):
+    """
+    Abre (o crea) la base del índice; si cambió INDEX_VERSION se reconstruye desde cero
+    """
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        conn.executescript("DROP TABLE IF EXISTS cues_fts; DROP TABLE IF EXISTS cues; DROP TABLE IF EXISTS sources;")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version={INDEX_VERSION}")
+        conn.commit()
+    return conn
+
+def discover_sources(transcriptions_dir=TRANSCRIPTIONS_DIR, archives_dir=ARCHIVES_DIR, include_archives=True):
+    """
+    Enumera las transcripciones a indexar sin leer su contenido
+
+    Returns:
+        list: [{'path', 'episode', 'fingerprint', 'zip', 'member'}] donde 'path' es la ruta del
+              archivo o 'archivo.zip!miembro' y 'fingerprint' cambia si cambia el contenido
+    """
+    sources = []
+
+    if os.path.isdir(transcriptions_dir):
+        for name in sorted(os.listdir(transcriptions_dir)):
+            path = os.path.join(transcriptions_dir, name)
+            if name.lower().endswith(TRANSCRIPT_EXTENSIONS) and os.path.isfile(path):
+                stat = os.stat(path)
+                sources.append({'path': path, 'episode': os.path.splitext(name)[0],
+                                'fingerprint': f"{stat.st_size}:{stat.st_mtime_ns}", 'zip': None, 'member': None})
+
+    if include_archives and os.path.isdir(archives_dir):
+        for name in sorted(os.listdir(archives_dir)):
+            zip_path = os.path.join(archives_dir, name)
+            if not name.lower().endswith('.zip') or not os.path.isfile(zip_path):
+                continue
+            try:
+                with zipfile.ZipFile(zip_path) as zf:
+                    members = [info for info in zf.infolist()
+                               if info.filename.lower().endswith(TRANSCRIPT_EXTENSIONS) and not info.is_dir()]
+            except zipfile.BadZipFile:
+                print(f"⚠️  Archivo .zip inválido, se omite: {zip_path}")
+                continue
+            for info in members:
+                # El CRC y el tamaño del directorio del zip bastan: no hace falta descomprimir
+                sources.append({'path': f"{zip_path}!{info.filename}",
+                                'episode': os.path.splitext(os.path.basename(info.filename))[0],
+                                'fingerprint': f"{info.file_size}:{info.CRC:08x}",
+                                'zip': zip_path, 'member': info.filename})
+
+    return sources
+
+def _read_source(source):
+    """
+    Parsea una transcripción (del disco o dentro de un .zip) en streaming
+
+    Returns:
+        tuple: (transcript.Transcript, sha256 del contenido)
+    """
+    digest = hashlib.sha256()
+
+    def hashed_lines(stream):
+        for line in stream:
+            digest.update(line.encode('utf-8'))
+            yield line
+
+    if source['zip']:
+        with zipfile.ZipFile(source['zip']) as zf, zf.open(source['member']) as raw:
+            text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+            cues = transcript.parse_transcript(hashed_lines(text))
+    else:
+        with open(source['path'], 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+            cues = transcript.parse_transcript(hashed_lines(f))
+
+    return cues, digest.hexdigest()
+
+def _remove_source(conn, source_id):
+    conn.execute("INSERT INTO cues_fts(cues_fts, rowid, text) "
+                 "SELECT 'delete', id, text FROM cues WHERE source_id = ?", (source_id,))
+    conn.execute("DELETE FROM cues WHERE source_id = ?", (source_id,))
+    conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+
+def update_index(conn, sources):
+    """
+    Sincroniza el índice con las transcripciones encontradas: indexa las nuevas o
+    modificadas y quita las que ya no existen
+
+    Returns:
+        dict: {'added', 'updated', 'removed', 'unchanged', 'cues'}
+    """
+    stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'cues': 0}
+    indexed = {row['path']: row for row in conn.execute("SELECT id, path, fingerprint FROM sources")}
+    current = {source['path'] for source in sources}
+
+    for path, row in indexed.items():
+        if path not in current:
+            _remove_source(conn, row['id'])
+            stats['removed'] += 1
+
+    for source in sources:
+        row = indexed.get(source['path'])
+        if row and row['fingerprint'] == source['fingerprint']:
+            stats['unchanged'] += 1
+            continue
+
+        try:
+            cues, sha = _read_source(source)
+        except (OSError, zipfile.BadZipFile, KeyError) as e:
+            print(f"⚠️  No se pudo leer {source['path']}: {e}")
+            continue
+
+        if row:
+            _remove_source(conn, row['id'])
+            stats['updated'] += 1
+        else:
+            stats['added'] += 1
+
+        source_id = conn.execute(
+            "INSERT INTO sources (path, episode, fingerprint, sha256, cue_count, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (source['path'], source['episode'], source['fingerprint'], sha, len(cues),
+             datetime.now().isoformat(timespec='seconds'))
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO cues (source_id, cue, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?)",
+            ((source_id, i, int(cues.start_ms[i]), int(cues.end_ms[i]), cues.text(i).replace('\n', ' '))
+             for i in range(len(cues)))
+        )
+        conn.execute("INSERT INTO cues_fts(rowid, text) SELECT id, text FROM cues WHERE source_id = ?", (source_id,))
+        stats['cues'] += len(cues)
+
+    conn.commit()
+    return stats
+
+def build_match_query(query, raw=False):
+    """
+    Convierte el texto del usuario en una consulta FTS5
+
+    Sin `raw`, cada palabra se busca como prefijo (AND implícito), para que
+    "intelig artific" encuentre "inteligencia artificial".
+    """
+    if raw:
+        return query
+    words = re.findall(r'\w+', query, re.UNICODE)
+    if not words:
+        return None
+    return ' '.join(f'"{w}"*' for w in words)
+
+def search(conn, query, limit=DEFAULT_LIMIT, episode=None, context=0, raw=False):
+    """
+    Busca en el índice
+
+    Args:
+        conn: Conexión de open_index()
+        query: Texto a buscar
+        limit: Máximo de hits
+        episode: Filtrar por nombre de episodio (opcional)
+        context: Cues vecinos a incluir a cada lado en el rango del hit
+        raw: Usar `query` tal cual como sintaxis FTS5
+
+    Returns:
+        list: Hits por relevancia [{'episode', 'source', 'cue', 'start_ms', 'end_ms', 'score', 'snippet'}]
+    """
+    match = build_match_query(query, raw)
+    if not match:
+        return []
+
+    sql = ("SELECT s.episode, s.path AS source, s.sha256, c.source_id, c.cue, c.start_ms, c.end_ms, "
+           "bm25(cues_fts) AS score, snippet(cues_fts, 0, '[', ']', '…', 16) AS snippet "
+           "FROM cues_fts JOIN cues c ON c.id = cues_fts.rowid JOIN sources s ON s.id = c.source_id "
+           "WHERE cues_fts MATCH ?")
+    params = [match]
+    if episode:
+        sql += " AND s.episode = ?"
+        params.append(episode)
+    # Se piden de más para compensar los duplicados (mismo episodio en output y en un .zip)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit * 4)
+
+    hits = []
+    seen = set()
+    for row in conn.execute(sql, params):
+        key = (row['sha256'], row['cue'])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        start_ms, end_ms = row['start_ms'], row['end_ms']
+        if context > 0:
+            start_ms, end_ms = conn.execute(
+                "SELECT MIN(start_ms), MAX(end_ms) FROM cues WHERE source_id = ? AND cue BETWEEN ? AND ?",
+                (row['source_id'], row['cue'] - context, row['cue'] + context)
+            ).fetchone()
+
+        hits.append({
+            'episode': row['episode'],
+            'source': row['source'],
+            'cue': row['cue'],
+            'start_ms': start_ms,
+            'end_ms': end_ms,
+            'score': round(-row['score'], 4),  # bm25 de SQLite: menor es mejor
+            'snippet': row['snippet']
+        })
+        if len(hits) >= limit:
+            break
+    return hits
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Busca un tema en todas las transcripciones (output y archivos .zip)'
+    )
+    parser.add_argument('query', nargs='?', default=None,
+                        help='Texto a buscar (sin query solo se actualiza el índice)')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f'Máximo de resultados (default: {DEFAULT_LIMIT})')
+    parser.add_argument('--episode', default=None,
+                        help='Buscar solo en este episodio (nombre del .srt sin extensión)')
+    parser.add_argument('--context', type=int, default=0,
+                        help='Cues vecinos a incluir a cada lado en el rango de cada hit')
+    parser.add_argument('--raw', action='store_true',
+                        help='Usar la consulta tal cual en sintaxis FTS5 (OR, NEAR, "frases", prefijo*)')
+    parser.add_argument('--no-archives', action='store_true',
+                        help='No indexar las transcripciones dentro de /archives/*.zip')
+    parser.add_argument('--no-update', action='store_true',
+                        help='Buscar sin actualizar el índice')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Borrar el índice y reconstruirlo')
+    parser.add_argument('--json', action='store_true',
+                        help='Imprimir los resultados como JSON')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('search_transcripts', args)
+    run_log.start('search_transcripts', episode=args.episode)
+
+    if args.rebuild and os.path.exists(INDEX_PATH):
+        os.remove(INDEX_PATH)
+
+    conn = open_index()
+    try:
+        if not args.no_update:
+            profiling.phase('update_index')
+            started = time.perf_counter()
+            sources = discover_sources(include_archives=not args.no_archives)
+            stats = update_index(conn, sources)
+            run_log.count(sources=len(sources), indexed=stats['added'] + stats['updated'])
+            if not args.json:
+                print(f"✓ Índice: {len(sources)} transcripciones ({stats['added']} nuevas, "
+                      f"{stats['updated']} actualizadas, {stats['removed']} eliminadas, "
+                      f"{stats['unchanged']} sin cambios) en {time.perf_counter() - started:.2f}s")
+
+        if not args.query:
+            return 0
+
+        profiling.phase('search')
+        try:
+            hits = search(conn, args.query, limit=args.limit, episode=args.episode,
+                          context=args.context, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            print(f"❌ ERROR: Consulta inválida: {e}")
+            return 1
+    finally:
+        profiling.phase(None)
+        conn.close()
+    run_log.count(hits=len(hits))
+
+    if args.json:
+        print(json.dumps(hits, indent=2, ensure_ascii=False))
+        return 0
+
+    if not hits:
+        print(f"\nSin resultados para: {args.query}")
+        return 0
+
+    print(f"\n🔎 {len(hits)} resultados para: {args.query}\n")
+    for rank, hit in enumerate(hits, 1):
+        start = transcript.format_srt_time(hit['start_ms'])
+        end = transcript.format_srt_time(hit['end_ms'])
+        print(f"{rank:>3}. {hit['episode']}  {start} --> {end}  (start_ms={hit['start_ms']}, end_ms={hit['end_ms']})")
+        print(f"     {hit['snippet']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_log.finish(main()))
@@ -0,0 +1,191 @@
+# Módulo: single_pass_render.py
+# Requisitos: pip install moviepy numpy (moviepy instala imageio-ffmpeg, que trae ffmpeg)
+# Descripción: Render de todos los clips con una sola decodificación del video fuente.
+#              Ordena los intervalos de los clips, decodifica su unión de principio a fin
+#              y reparte cada frame a un encoder por cada clip que cubre ese instante.
+#              El trabajo de decodificación es proporcional a la unión de los rangos y
+#              no a la suma de sus duraciones
+
+import os
+import tempfile
+import imageio_ffmpeg
+
+import smart_render
+import vertical_render
+import subtitle_render
+
+# --- CONFIGURACIÓN ---
+# Rangos separados por menos de esto se decodifican de corrido (más barato que volver a buscar)
+MERGE_GAP_SECONDS = 2.0
+VIDEO_CRF = 23          # Igual que el default de libx264 que usa moviepy
+VIDEO_PRESET = "medium"
+AUDIO_BITRATE = "192k"
+
+def plan_decode_ranges(clips, merge_gap=MERGE_GAP_SECONDS):
+    """
+    Agrupa los clips en rangos de decodificación (unión de intervalos ordenados)
+
+    Args:
+        clips: Lista de {'start', 'end', ...} en segundos
+        merge_gap: Huecos menores a esto se decodifican igual para no partir el rango
+
+    Returns:
+        list: [{'start', 'end', 'clips': [índices]}] ordenados por inicio
+    """
+    ranges = []
+    for idx in sorted(range(len(clips)), key=lambda i: (clips[i]['start'], clips[i]['end'])):
+        clip = clips[idx]
+        if ranges and clip['start'] <= ranges[-1]['end'] + merge_gap:
+            ranges[-1]['end'] = max(ranges[-1]['end'], clip['end'])
+            ranges[-1]['clips'].append(idx)
+        else:
+            ranges.append({'start': clip['start'], 'end': clip['end'], 'clips': [idx]})
+    return ranges
+
+def max_overlap(clips):
+    """
+    Máximo número de clips que cubren un mismo instante (encoders simultáneos)
+    """
+    events = sorted([(c['start'], 1) for c in clips] + [(c['end'], -1) for c in clips])
+    current = peak = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+def _open_encoder(path, size, fps, video_filter, threads, crf):
+    """
+    Inicia un encoder libx264 que recibe frames rgb24 por stdin
+    """
+    output_params = ['-preset', VIDEO_PRESET, '-crf', str(crf), '-threads', str(threads)]
+    if video_filter:
+        output_params += ['-vf', video_filter]
+
+    writer = imageio_ffmpeg.write_frames(
+        path, size, pix_fmt_in='rgb24', pix_fmt_out='yuv420p', fps=fps,
+        quality=None, codec='libx264', macro_block_size=1,
+        ffmpeg_log_level='error', output_params=output_params
+    )
+    writer.send(None)  # Arrancar el generador (lanza el proceso de ffmpeg)
+    return writer
+
+def _mux_audio(video_only_path, source_path, start, end, output_path):
+    """
+    Une el video codificado con el audio del rango del clip
+    """
+    smart_render.run_command([
+        smart_render.ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        '-i', video_only_path, '-ss', f"{start:.3f}", '-t', f"{end - start:.3f}", '-i', source_path,
+        '-map', '0:v:0', '-map', '1:a:0?', '-c:v', 'copy', '-c:a', 'aac', '-b:a', AUDIO_BITRATE,
+        '-shortest', '-movflags', '+faststart', output_path
+    ])
+
+def render_single_pass(video_path, clips, threads=None):
+    """
+    Genera todos los clips decodificando cada rango del video una sola vez
+
+    Args:
+        video_path: Video fuente
+        clips: Lista de {'start', 'end', 'output_path', 'vertical', 'subtitles'} donde
+               'vertical' es None (horizontal, tamaño original) o {'editing_guide'} y
+               'subtitles' es None o {'srt', 'editing_guide'}
+        threads: Hilos de libx264 por encoder (default: núcleos / clips simultáneos)
+
+    Returns:
+        tuple: (resultados alineados con clips [{'ok', 'error', 'info'}],
+                estadísticas {'ranges', 'decoded_seconds', 'clip_seconds', 'max_encoders'})
+    """
+    results = [{'ok': False, 'error': 'no procesado', 'info': None} for _ in clips]
+    stats = {
+        'ranges': 0,
+        'decoded_seconds': 0.0,
+        'clip_seconds': sum(c['end'] - c['start'] for c in clips),
+        'max_encoders': max_overlap(clips) if clips else 0
+    }
+    if not clips:
+        return results, stats
+
+    if threads is None:
+        threads = max(1, (os.cpu_count() or 1) // max(1, stats['max_encoders']))
+
+    ranges = plan_decode_ranges(clips)
+    stats['ranges'] = len(ranges)
+    stream = smart_render.probe_video_stream(video_path)
+
+    with tempfile.TemporaryDirectory(prefix="single_pass_") as tmp_dir:
+        # Filtros por clip (el recorte vertical y los subtítulos se aplican dentro de su encoder)
+        filters = {}
+        for idx, clip in enumerate(clips):
+            subtitles = clip.get('subtitles')
+            if clip.get('vertical') is not None:
+                filters[idx], results[idx]['info'] = vertical_render.build_vertical_filter(
+                    stream['width'], stream['height'], clip['start'], clip['end'],
+                    clip['vertical'].get('editing_guide'), subtitles['srt'] if subtitles else None
+                )
+            elif subtitles:
+                ass_path = subtitle_render.clip_ass(subtitles['srt'], subtitles['editing_guide'],
+                                                    stream['width'], stream['height'], clip['start'], clip['end'])
+                filters[idx] = subtitle_render.ass_filter(ass_path)
+
+        for decode_range in ranges:
+            duration = decode_range['end'] - decode_range['start']
+            stats['decoded_seconds'] += duration
+
+            reader = imageio_ffmpeg.read_frames(
+                video_path,
+                input_params=['-ss', f"{decode_range['start']:.3f}"],
+                output_params=['-t', f"{duration:.3f}"]
+            )
+            meta = next(reader)
+            fps = meta['fps']
+
+            # Límites de cada clip en número de frame relativo al inicio del rango
+            bounds = {}
+            for idx in decode_range['clips']:
+                first = int(round((clips[idx]['start'] - decode_range['start']) * fps))
+                last = int(round((clips[idx]['end'] - decode_range['start']) * fps))
+                bounds[idx] = (first, max(last, first + 1))
+            pending = sorted(decode_range['clips'], key=lambda i: bounds[i][0])
+            active = {}
+
+            def finish(idx):
+                writer = active.pop(idx)
+                try:
+                    writer.close()
+                    video_only = os.path.join(tmp_dir, f"clip_{idx}.mp4")
+                    _mux_audio(video_only, video_path, clips[idx]['start'], clips[idx]['end'],
+                               clips[idx]['output_path'])
+                    results[idx].update(ok=True, error=None)
+                except Exception as e:
+                    results[idx].update(ok=False, error=str(e))
+
+            try:
+                for frame_number, frame in enumerate(reader):
+                    while pending and bounds[pending[0]][0] <= frame_number:
+                        idx = pending.pop(0)
+                        crf = vertical_render.VIDEO_CRF if clips[idx].get('vertical') is not None else VIDEO_CRF
+                        try:
+                            active[idx] = _open_encoder(os.path.join(tmp_dir, f"clip_{idx}.mp4"),
+                                                        meta['size'], fps, filters.get(idx), threads, crf)
+                        except Exception as e:
+                            results[idx].update(ok=False, error=str(e))
+
+                    for idx in list(active):
+                        try:
+                            active[idx].send(frame)
+                        except Exception as e:
+                            results[idx].update(ok=False, error=str(e))
+                            try:
+                                active.pop(idx).close()
+                            except Exception:
+                                pass
+                            continue
+                        if frame_number + 1 >= bounds[idx][1]:
+                            finish(idx)
+            finally:
+                reader.close()
+                # Clips que llegan al final del video: se cierran con los frames que hubo
+                for idx in list(active):
+                    finish(idx)
+
+    return results, stats
@@ -0,0 +1,286 @@
+# Módulo: smart_render.py
+# Requisitos: pip install moviepy numpy (moviepy instala imageio-ffmpeg, que trae ffmpeg)
+# Descripción: Corte rápido de clips con "smart render": copia sin recodificar (stream copy)
+#              todos los GOPs completos del clip y solo recodifica los fragmentos de
+#              inicio/final que no caen en un keyframe. Un capítulo de varios minutos se
+#              genera en segundos en lugar de minutos
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import numpy as np
+
+# --- CONFIGURACIÓN ---
+KEYFRAME_CACHE_DIR = "./output/.cache/keyframes"
+# Si un límite del clip queda a menos de esta distancia de un keyframe, se ajusta al keyframe
+# (el clip gana como máximo esta cantidad de segundos) y no hace falta recodificar ese extremo
+SNAP_TOLERANCE_SECONDS = 0.5
+# Por debajo de esta duración copiable no compensa: se usa el render normal
+MIN_COPY_SECONDS = 4.0
+# Calidad de los fragmentos recodificados (deben ser visualmente idénticos al resto)
+HEAD_TAIL_CRF = 16
+HEAD_TAIL_PRESET = "medium"
+AUDIO_BITRATE = "192k"
+
+# Perfiles H.264 tal como los reporta ffprobe/ffmpeg -> nombre para libx264
+X264_PROFILES = {
+    'constrained baseline': 'baseline',
+    'baseline': 'baseline',
+    'main': 'main',
+    'high': 'high',
+    'high 10': 'high10',
+    'high 4:2:2': 'high422',
+    'high 4:4:4 predictive': 'high444'
+}
+
+def ffmpeg_binary():
+    """
+    Ruta del ejecutable de ffmpeg: IMAGEIO_FFMPEG_EXE, el binario de imageio-ffmpeg o el del PATH
+    """
+    if os.getenv("IMAGEIO_FFMPEG_EXE"):
+        return os.getenv("IMAGEIO_FFMPEG_EXE")
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return shutil.which("ffmpeg") or "ffmpeg"
+
+def ffprobe_binary():
+    """
+    Ruta de ffprobe si está instalado (imageio-ffmpeg no lo incluye)
+    """
+    return shutil.which("ffprobe")
+
+def run_command(cmd):
+    """
+    Ejecuta un comando de ffmpeg/ffprobe y devuelve su salida (stdout, stderr)
+    """
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        last_lines = ' | '.join(result.stderr.strip().splitlines()[-3:])
+        raise RuntimeError(f"{os.path.basename(cmd[0])} falló: {last_lines}")
+    return result.stdout, result.stderr
+
+def probe_video_stream(video_path):
+    """
+    Lee los parámetros del stream de video (necesarios para que los fragmentos
+    recodificados sean compatibles con los copiados)
+
+    Returns:
+        dict: {'codec', 'profile', 'pix_fmt', 'width', 'height', 'fps'}
+    """
+    ffprobe = ffprobe_binary()
+    if ffprobe:
+        stdout, _ = run_command([ffprobe, '-v', 'error', '-select_streams', 'v:0',
+                                 '-show_entries', 'stream=codec_name,profile,pix_fmt,width,height,r_frame_rate',
+                                 '-of', 'json', video_path])
+        stream = json.loads(stdout)['streams'][0]
+        num, _, den = stream.get('r_frame_rate', '0/1').partition('/')
+        return {
+            'codec': stream.get('codec_name'),
+            'profile': (stream.get('profile') or '').lower(),
+            'pix_fmt': stream.get('pix_fmt'),
+            'width': int(stream.get('width', 0)),
+            'height': int(stream.get('height', 0)),
+            'fps': float(num) / float(den or 1) if float(den or 1) else 0.0
+        }
+
+    # Sin ffprobe: interpretar la línea "Stream #0:0: Video: h264 (High) ..., yuv420p(...), 1280x720, ..., 30 fps"
+    result = subprocess.run([ffmpeg_binary(), '-hide_banner', '-i', video_path],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = next((l for l in result.stderr.splitlines() if 'Video:' in l), '')
+    if not line:
+        raise RuntimeError(f"No se encontró stream de video en {video_path}")
+
+    codec = re.search(r'Video:\s*(\w+)(?:\s*\(([^)]*)\))?', line)
+    pix_fmt = re.search(r',\s*([a-z0-9_]+)(?:\([^)]*\))?,\s*\d+x\d+', line)
+    size = re.search(r'\b(\d{2,5})x(\d{2,5})\b', line)
+    fps = re.search(r'([\d.]+)\s*fps', line)
+    return {
+        'codec': codec.group(1) if codec else None,
+        'profile': (codec.group(2) or '').lower() if codec else '',
+        'pix_fmt': pix_fmt.group(1) if pix_fmt else 'yuv420p',
+        'width': int(size.group(1)) if size else 0,
+        'height': int(size.group(2)) if size else 0,
+        'fps': float(fps.group(1)) if fps else 0.0
+    }
+
+def _keyframe_cache_path(video_path):
+    stat = os.stat(video_path)
+    key = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(KEYFRAME_CACHE_DIR, f"{digest}.json")
+
+def probe_keyframes(video_path):
+    """
+    Obtiene los tiempos (segundos) de todos los keyframes del video.
+    Solo se decodifican los keyframes y el resultado se cachea en disco
+    (clave: ruta + tamaño + fecha de modificación).
+
+    Returns:
+        np.ndarray: Tiempos de keyframe ordenados
+    """
+    cache_path = _keyframe_cache_path(video_path)
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                return np.array(json.load(f), dtype=np.float64)
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    ffprobe = ffprobe_binary()
+    if ffprobe:
+        stdout, _ = run_command([ffprobe, '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+                                 '-show_entries', 'frame=pts_time', '-of', 'csv=p=0', video_path])
+        times = [float(l.strip().rstrip(',')) for l in stdout.splitlines() if l.strip() not in ('', 'N/A')]
+    else:
+        _, stderr = run_command([ffmpeg_binary(), '-hide_banner', '-nostats', '-skip_frame', 'nokey',
+                                 '-i', video_path, '-map', '0:v:0', '-vf', 'showinfo', '-f', 'null', '-'])
+        times = [float(t) for t in re.findall(r'pts_time:\s*([\d.]+)', stderr)]
+
+    keyframes = np.unique(np.array(times, dtype=np.float64))
+
+    os.makedirs(KEYFRAME_CACHE_DIR, exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump([round(float(t), 6) for t in keyframes], f)
+
+    return keyframes
+
+def plan_smart_cut(keyframes, start, end, tolerance=SNAP_TOLERANCE_SECONDS):
+    """
+    Divide el clip en cabeza (recodificar), cuerpo (copiar) y cola (recodificar)
+
+    Los extremos que quedan a menos de `tolerance` de un keyframe se ajustan a él
+    (el inicio hacia atrás, el final hacia adelante) para no tener que recodificarlos.
+
+    Args:
+        keyframes: Tiempos de keyframe ordenados
+        start: Inicio del clip (segundos)
+        end: Final del clip (segundos)
+        tolerance: Distancia máxima para ajustar un extremo a un keyframe
+
+    Returns:
+        dict: {'start', 'end', 'head', 'copy', 'tail'} donde cada fragmento es (inicio, fin)
+              o None, o None si no hay suficiente video copiable
+    """
+    keyframes = np.asarray(keyframes, dtype=np.float64)
+    if len(keyframes) == 0 or end <= start:
+        return None
+
+    # Inicio: keyframe anterior cercano (sin cabeza) o primer keyframe dentro del clip
+    prev_idx = np.searchsorted(keyframes, start, side='right') - 1
+    if prev_idx >= 0 and start - keyframes[prev_idx] <= tolerance:
+        start = float(keyframes[prev_idx])
+        copy_start = start
+    else:
+        next_idx = np.searchsorted(keyframes, start, side='left')
+        if next_idx >= len(keyframes):
+            return None
+        copy_start = float(keyframes[next_idx])
+
+    # Final: keyframe siguiente cercano (sin cola) o último keyframe dentro del clip
+    next_idx = np.searchsorted(keyframes, end, side='left')
+    if next_idx < len(keyframes) and keyframes[next_idx] - end <= tolerance:
+        end = float(keyframes[next_idx])
+        copy_end = end
+    else:
+        last_idx = np.searchsorted(keyframes, end, side='right') - 1
+        copy_end = float(keyframes[last_idx]) if last_idx >= 0 else start
+
+    if copy_end - copy_start < MIN_COPY_SECONDS:
+        return None
+
+    return {
+        'start': start,
+        'end': end,
+        'head': (start, copy_start) if copy_start > start else None,
+        'copy': (copy_start, copy_end),
+        'tail': (copy_end, end) if end > copy_end else None
+    }
+
+def _encode_segment(ffmpeg, video_path, segment, stream, output_path, threads):
+    """
+    Recodifica un fragmento (sin audio) con los mismos parámetros que el video fuente
+    """
+    seg_start, seg_end = segment
+    cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+           '-ss', f"{seg_start:.6f}", '-i', video_path, '-t', f"{seg_end - seg_start:.6f}",
+           '-map', '0:v:0', '-an',
+           '-c:v', 'libx264', '-preset', HEAD_TAIL_PRESET, '-crf', str(HEAD_TAIL_CRF),
+           '-pix_fmt', stream['pix_fmt'] or 'yuv420p', '-threads', str(threads)]
+    profile = X264_PROFILES.get(stream['profile'])
+    if profile:
+        cmd += ['-profile:v', profile]
+    if stream['fps']:
+        cmd += ['-r', f"{stream['fps']:.6f}"]
+    cmd += [output_path]
+    run_command(cmd)
+
+def _copy_segment(ffmpeg, video_path, segment, stream, output_path):
+    """
+    Copia un fragmento que empieza en keyframe sin recodificar
+    """
+    seg_start, seg_end = segment
+    # El fragmento cubre GOPs completos: cortar por número de paquetes es exacto
+    # (con -t se colarían los B-frames reordenados del GOP siguiente)
+    frame_count = int(round((seg_end - seg_start) * stream['fps']))
+    # El seek con -c copy se alinea al keyframe <= posición: un margen mínimo evita caer en el anterior
+    run_command([ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+                 '-ss', f"{seg_start + 0.001:.6f}", '-i', video_path, '-frames:v', str(frame_count),
+                 '-map', '0:v:0', '-an', '-c:v', 'copy', '-avoid_negative_ts', 'make_zero', output_path])
+
+def render_clip(video_path, start, end, output_path, threads=4):
+    """
+    Genera un clip con smart render (stream copy + recodificación de cabeza/cola)
+
+    Args:
+        video_path: Video fuente
+        start: Inicio del clip (segundos)
+        end: Final del clip (segundos)
+        output_path: Ruta del .mp4 de salida
+        threads: Hilos de libx264 para cabeza y cola
+
+    Returns:
+        dict: Plan aplicado ({'start', 'end', 'head', 'copy', 'tail'}) o None si el clip
+              no se puede generar así (el llamador debe usar el render normal)
+    """
+    stream = probe_video_stream(video_path)
+    if stream['codec'] != 'h264' or not stream['fps']:
+        return None
+
+    plan = plan_smart_cut(probe_keyframes(video_path), start, end)
+    if not plan:
+        return None
+
+    ffmpeg = ffmpeg_binary()
+    with tempfile.TemporaryDirectory(prefix="smart_render_") as tmp_dir:
+        parts = []
+        for name in ('head', 'copy', 'tail'):
+            segment = plan[name]
+            if not segment:
+                continue
+            part_path = os.path.join(tmp_dir, f"{name}.mp4")
+            if name == 'copy':
+                _copy_segment(ffmpeg, video_path, segment, stream, part_path)
+            else:
+                _encode_segment(ffmpeg, video_path, segment, stream, part_path, threads)
+            parts.append(part_path)
+
+        list_path = os.path.join(tmp_dir, "parts.txt")
+        with open(list_path, 'w') as f:
+            for part_path in parts:
+                f.write(f"file '{part_path}'\n")
+
+        # Unir el video y recodificar el audio del rango exacto (es barato y evita desfases)
+        duration = plan['end'] - plan['start']
+        run_command([ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+                     '-f', 'concat', '-safe', '0', '-i', list_path,
+                     '-ss', f"{plan['start']:.6f}", '-t', f"{duration:.6f}", '-i', video_path,
+                     '-map', '0:v:0', '-map', '1:a:0?', '-c:v', 'copy', '-c:a', 'aac', '-b:a', AUDIO_BITRATE,
+                     '-movflags', '+faststart', output_path])
+
+    return plan
@@ -1,19 +1,22 @@
 # Script definitivo: split_audios.py
-# Requisitos: pip install pyannote.audio pydub torch python-dotenv
+# Requisitos: pip install pyannote.audio pydub torch python-dotenv numpy
 
 import os
-import json
+import argparse
 import warnings
+import numpy as np
 from dotenv import load_dotenv
 
+import run_log
+import profiling
+import model_server
+import diarization_qa
+import editing_guide
+import inference_runtime
+
 # Ignorar warnings innecesarios
 warnings.filterwarnings("ignore")
 
-
-from pyannote.audio import Pipeline
-from pydub import AudioSegment
-from huggingface_hub import login
-
 # 1. Cargar variables de entorno (.env)
 # Esto busca el archivo .env en la misma carpeta y carga HF_TOKEN
 load_dotenv()
@@ -22,224 +25,335 @@ load_dotenv()
 HF_TOKEN = os.getenv("HF_TOKEN")
 INPUT_DIR = "./input"
 TEMP_WAV = "./input/temp_audio.wav"             # Archivo temporal
+TRACK_HOST_A = "./output/track_host_A.mp3"
+TRACK_HOST_B = "./output/track_host_B.mp3"
+EDITING_GUIDE_PATH = "./output/editing_guide.json"
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+# Configuración optimizada para mejorar la precisión
+# min_speakers=2 y max_speakers=2 fuerzan al modelo a buscar exactamente 2 speakers
+# y evitan detección de speakers extras
+PIPELINE_PARAMS = {
+    "min_speakers": 2,
+    "max_speakers": 2
+}
+
+def find_input_file():
+    """
+    Busca el archivo .m4a en /input (el primero si hay varios)
+
+    Returns:
+        str: Ruta del archivo, o None si no hay ninguno
+    """
+    print("--> Buscando archivo .m4a en /input...")
+    m4a_files = [f for f in os.listdir(INPUT_DIR) if f.endswith('.m4a') and os.path.isfile(os.path.join(INPUT_DIR, f))]
+
+    if len(m4a_files) == 0:
+        print("❌ ERROR: No se encontró ningún archivo .m4a en el directorio /input")
+        print("Por favor, coloca tu audio de NotebookLM en la carpeta /input")
+        return None
+    elif len(m4a_files) > 1:
+        print("⚠️  ADVERTENCIA: Se encontraron múltiples archivos .m4a:")
+        for idx, file in enumerate(m4a_files, 1):
+            print(f"   {idx}. {file}")
+        print(f"\nUsando el primer archivo: {m4a_files[0]}")
+    else:
+        print(f"✓ Archivo encontrado: {m4a_files[0]}")
 
-# Validación de seguridad
-if not HF_TOKEN:
-    print("❌ ERROR: No se encontró la variable HF_TOKEN.")
-    print("Asegúrate de tener un archivo '.env' con la línea: HF_TOKEN=hf_tu_token_aqui")
-    exit()
-
-# Buscar archivo .m4a en el directorio /input
-print("--> Buscando archivo .m4a en /input...")
-m4a_files = [f for f in os.listdir(INPUT_DIR) if f.endswith('.m4a') and os.path.isfile(os.path.join(INPUT_DIR, f))]
-
-if len(m4a_files) == 0:
-    print("❌ ERROR: No se encontró ningún archivo .m4a en el directorio /input")
-    print("Por favor, coloca tu audio de NotebookLM en la carpeta /input")
-    exit()
-elif len(m4a_files) > 1:
-    print("⚠️  ADVERTENCIA: Se encontraron múltiples archivos .m4a:")
-    for idx, file in enumerate(m4a_files, 1):
-        print(f"   {idx}. {file}")
-    print(f"\nUsando el primer archivo: {m4a_files[0]}")
-    INPUT_FILE = os.path.join(INPUT_DIR, m4a_files[0])
-else:
-    INPUT_FILE = os.path.join(INPUT_DIR, m4a_files[0])
-    print(f"✓ Archivo encontrado: {m4a_files[0]}")
-
-# 2. Preprocesamiento (M4A -> WAV)
-print(f"--> Paso 1/5: Convirtiendo audio a WAV para la IA...")
-try:
-    # Usamos pydub para leer el m4a y guardarlo como wav
-    original_audio = AudioSegment.from_file(INPUT_FILE, format="m4a")
-    original_audio.export(TEMP_WAV, format="wav")
-except Exception as e:
-    print(f"❌ Error al leer el audio. Verifica que tengas FFmpeg instalado.")
-    print(f"Detalle del error: {e}")
-    exit()
-
-# 3. Cargar el modelo de IA
-print("--> Paso 2/5: Cargando modelo de Diarización (esto puede tardar)...")
-try:
-    login(token=HF_TOKEN)
+    return os.path.join(INPUT_DIR, m4a_files[0])
 
-    pipeline = Pipeline.from_pretrained(
-        "pyannote/speaker-diarization-3.1"
-    )
+def load_diarization_pipeline():
+    """
+    Carga el modelo de diarización de pyannote (se importa aquí: torch es pesado)
+    con los hilos y la cuantización de inference_runtime
 
-    # Configuración optimizada para mejorar la precisión
-    # num_speakers=2 fuerza al modelo a buscar exactamente 2 speakers
-    # min_speakers=2 y max_speakers=2 evitan detección de speakers extras
-    pipeline_params = {
-        "min_speakers": 2,
-        "max_speakers": 2
-    }
-except Exception as e:
-    print(f"❌ ERROR TÉCNICO AL CARGAR EL MODELO:")
-    print(f"------------------------------------------------")
-    print(f"{e}")  # <--- ESTO ES LO QUE NECESITAMOS VER
-    print(f"------------------------------------------------")
-    print(f"Si el error menciona 'libsndfile' o 'torchaudio', es un problema de instalación, no de token.")
-    exit()
-
-# 4. Analizar quién habla
-print(f"--> Paso 3/5: Analizando conversación e identificando voces...")
-print(f"   Configuración: Forzando detección de exactamente 2 speakers")
-diarization = pipeline(TEMP_WAV, **pipeline_params)
-
-# 5. Procesamiento de Pistas y JSON
-print("--> Paso 4/5: Generando pistas sincronizadas y guía de video...")
-
-# Crear pistas mudas base (misma duración que el original)
-track_host_a = AudioSegment.silent(duration=len(original_audio), frame_rate=original_audio.frame_rate)
-track_host_b = AudioSegment.silent(duration=len(original_audio), frame_rate=original_audio.frame_rate)
-
-guia_video = []
-
-# Convertimos a lista para poder contar el total y usar una barra de progreso real
-tracks_list = list(diarization.itertracks(yield_label=True))
-total_segments = len(tracks_list)
-
-# Identificar todos los speakers únicos detectados
-unique_speakers = set()
-for turn, _, speaker in tracks_list:
-    unique_speakers.add(speaker)
-
-print(f"   Se encontraron {total_segments} segmentos de voz.")
-print(f"   Speakers detectados: {sorted(unique_speakers)}")
-
-# Mapeo dinámico de speakers basado en ORDEN DE APARICIÓN (quién habla primero)
-speaker_mapping = {}
-speakers_in_order = []
-
-# Obtener speakers en orden de aparición
-for turn, _, speaker in tracks_list:
-    if speaker not in speakers_in_order:
-        speakers_in_order.append(speaker)
-
-# Asignar HOST_A al que habla primero, HOST_B al segundo
-for idx, speaker in enumerate(speakers_in_order):
-    if idx == 0:
-        speaker_mapping[speaker] = "HOST_A"
-        print(f"   HOST_A asignado a '{speaker}' (habla primero en {tracks_list[0][0].start:.2f}s)")
-    elif idx == 1:
-        speaker_mapping[speaker] = "HOST_B"
-        # Encontrar cuándo habla por primera vez HOST_B
-        first_b_time = next((turn.start for turn, _, spk in tracks_list if spk == speaker), 0)
-        print(f"   HOST_B asignado a '{speaker}' (habla primero en {first_b_time:.2f}s)")
-    else:
-        # Si hay más de 2 speakers, asignar a HOST_B por defecto
-        speaker_mapping[speaker] = "HOST_B"
-        print(f"   ⚠️  ADVERTENCIA: Se detectó un tercer speaker '{speaker}', será asignado a HOST_B")
-
-print(f"   Mapeo final: {speaker_mapping}")
-print()
-
-for i, (turn, _, speaker) in enumerate(tracks_list):
-    # Convertir segundos a milisegundos para Pydub
-    start_ms = int(turn.start * 1000)
-    end_ms = int(turn.end * 1000)
-    
-    # A. Lógica de Audio usando mapeo dinámico
-    voice_segment = original_audio[start_ms:end_ms]
-
-    # Obtener el nombre del host del mapeo
-    host_name = speaker_mapping.get(speaker, "UNKNOWN")
-
-    # Pegar voz sobre el silencio del track correspondiente
-    if host_name == "HOST_A":
-        track_host_a = track_host_a.overlay(voice_segment, position=start_ms)
-    elif host_name == "HOST_B":
-        track_host_b = track_host_b.overlay(voice_segment, position=start_ms)
-    
-    # B. Lógica de Video (JSON)
-    guia_video.append({
-        "host": host_name,
-        "start": turn.start,
-        "end": turn.end,
-        "duration": turn.end - turn.start
-    })
-    
-    # Feedback visual simple
-    if i % 10 == 0: # Imprimir cada 10 segmentos para no saturar la consola
-        print(f"   Procesando... {i}/{total_segments}", end="\r")
-
-print(f"   Procesando... {total_segments}/{total_segments} - ¡Listo!")
-
-# 5.5. Validación y corrección de asignaciones
-print("--> Validando asignaciones de speakers...")
+    Returns:
+        Pipeline: Modelo listo para usar
+    """
+    inference_runtime.configure_torch()
+    from pyannote.audio import Pipeline
+    from huggingface_hub import login
+
+    login(token=HF_TOKEN)
+    pipeline = Pipeline.from_pretrained(DIARIZATION_MODEL)
+    if inference_runtime.INFERENCE_QUANTIZE:
+        inference_runtime.quantize_modules(pipeline)
+    return pipeline
+
+def run_diarization(pipeline, audio):
+    """
+    Analiza quién habla en cada momento
+
+    Args:
+        pipeline: Modelo de load_diarization_pipeline()
+        audio: Ruta de un .wav o {'waveform': tensor (canales, muestras), 'sample_rate': int}
+
+    Returns:
+        list: Turnos [(inicio, fin, speaker)] en segundos
+    """
+    with inference_runtime.inference_context():
+        diarization = pipeline(audio, **PIPELINE_PARAMS)
+    return [(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)]
+
+def map_speakers(turns):
+    """
+    Mapeo dinámico de speakers basado en ORDEN DE APARICIÓN (quién habla primero):
+    HOST_A al que habla primero, HOST_B al segundo (y a cualquier speaker extra)
+
+    Returns:
+        dict: {speaker de pyannote: 'HOST_A' | 'HOST_B'}
+    """
+    speakers_in_order = []
+    first_time = {}
+    for start, _, speaker in turns:
+        if speaker not in first_time:
+            speakers_in_order.append(speaker)
+            first_time[speaker] = start
+
+    print(f"   Se encontraron {len(turns)} segmentos de voz.")
+    print(f"   Speakers detectados: {sorted(speakers_in_order)}")
+
+    speaker_mapping = {}
+    for idx, speaker in enumerate(speakers_in_order):
+        if idx == 0:
+            speaker_mapping[speaker] = "HOST_A"
+            print(f"   HOST_A asignado a '{speaker}' (habla primero en {first_time[speaker]:.2f}s)")
+        elif idx == 1:
+            speaker_mapping[speaker] = "HOST_B"
+            print(f"   HOST_B asignado a '{speaker}' (habla primero en {first_time[speaker]:.2f}s)")
+        else:
+            # Si hay más de 2 speakers, asignar a HOST_B por defecto
+            speaker_mapping[speaker] = "HOST_B"
+            print(f"   ⚠️  ADVERTENCIA: Se detectó un tercer speaker '{speaker}', será asignado a HOST_B")
+
+    print(f"   Mapeo final: {speaker_mapping}")
+    print()
+    return speaker_mapping
+
+def build_editing_guide(turns, speaker_mapping):
+    """
+    Guía de edición para assemble_video.py: un bloque por turno de voz
+
+    Returns:
+        list: [{'host', 'start', 'end', 'duration'}]
+    """
+    return [{
+        "host": speaker_mapping.get(speaker, "UNKNOWN"),
+        "start": start,
+        "end": end,
+        "duration": end - start
+    } for start, end, speaker in turns]
+
+def build_host_tracks(samples, frame_rate, guide):
+    """
+    Pistas sincronizadas por host: la voz de cada host en sus turnos y silencio en el resto
+
+    Se arma una máscara por host con sumas acumuladas de los límites de sus turnos y se
+    aplica de una vez sobre todas las muestras (sin superponer segmento por segmento).
+
+    Args:
+        samples: np.ndarray (frames, canales) del audio original
+        frame_rate: Frecuencia de muestreo
+        guide: Bloques de build_editing_guide()
+
+    Returns:
+        dict: {'HOST_A': np.ndarray, 'HOST_B': np.ndarray} con la misma forma que samples
+    """
+    total_frames = len(samples)
+    tracks = {}
+    for host in ("HOST_A", "HOST_B"):
+        blocks = [block for block in guide if block['host'] == host]
+        starts = np.clip((np.array([b['start'] for b in blocks]) * frame_rate).astype(np.int64), 0, total_frames)
+        ends = np.clip((np.array([b['end'] for b in blocks]) * frame_rate).astype(np.int64), 0, total_frames)
+
+        edges = np.zeros(total_frames + 1, dtype=np.int32)
+        np.add.at(edges, starts, 1)
+        np.add.at(edges, ends, -1)
+        active = np.cumsum(edges[:-1]) > 0
+
+        tracks[host] = np.where(active[:, None], samples, 0).astype(samples.dtype)
+    return tracks
+
+def export_track(samples, frame_rate, path):
+    """
+    Exporta una pista (np.ndarray int16 (frames, canales)) como mp3
+    """
+    from pydub import AudioSegment
+    AudioSegment(
+        data=np.ascontiguousarray(samples, dtype=np.int16).tobytes(),
+        sample_width=2,
+        frame_rate=frame_rate,
+        channels=samples.shape[1]
+    ).export(path, format="mp3")
+
+def audio_to_int16(audio):
+    """
+    Muestras de un AudioSegment como np.ndarray int16 (frames, canales)
+    """
+    audio = audio.set_sample_width(2)
+    return np.array(audio.get_array_of_samples(), dtype=np.int16).reshape(-1, audio.channels)
 
 def detect_suspicious_sequences(segments, threshold=15):
     """Detecta secuencias largas del mismo speaker (probables errores)"""
-    suspicious = []
-    current_host = None
-    consecutive_count = 0
-    sequence_start = 0
-
-    for i, seg in enumerate(segments):
-        if seg['host'] == current_host:
-            consecutive_count += 1
-        else:
-            if consecutive_count >= threshold:
-                suspicious.append({
-                    'start_idx': sequence_start,
-                    'end_idx': i - 1,
-                    'host': current_host,
-                    'count': consecutive_count,
-                    'start_time': segments[sequence_start]['start'],
-                    'end_time': segments[i-1]['end']
-                })
-            current_host = seg['host']
-            consecutive_count = 1
-            sequence_start = i
-
-    # Verificar última secuencia
-    if consecutive_count >= threshold:
-        suspicious.append({
-            'start_idx': sequence_start,
-            'end_idx': len(segments) - 1,
-            'host': current_host,
-            'count': consecutive_count,
-            'start_time': segments[sequence_start]['start'],
-            'end_time': segments[-1]['end']
-        })
-
-    return suspicious
-
-suspicious_sequences = detect_suspicious_sequences(guia_video, threshold=15)
-
-if suspicious_sequences:
-    print(f"   ⚠️  ADVERTENCIA: Se detectaron {len(suspicious_sequences)} secuencias sospechosas:")
-    for seq in suspicious_sequences:
-        duration = seq['end_time'] - seq['start_time']
-        print(f"      {seq['host']}: {seq['count']} segmentos consecutivos ({seq['start_time']:.1f}s - {seq['end_time']:.1f}s, duración: {duration:.1f}s)")
-
-    print(f"\n   💡 SUGERENCIA: Esto puede indicar que el modelo confundió a los speakers.")
-    print(f"      Considera revisar el audio original en esos rangos de tiempo.")
-    print(f"      Si el problema persiste, puedes:")
-    print(f"      1. Ejecutar de nuevo el script (a veces da mejores resultados)")
-    print(f"      2. Usar un audio de mejor calidad")
-    print(f"      3. Editar manualmente el archivo editing_guide.json\n")
-else:
-    print(f"   ✓ No se detectaron secuencias sospechosas")
-
-# 6. Guardar Archivos
-print("--> Paso 5/5: Guardando archivos finales...")
-
-# Audios para HeyGen
-track_host_a.export("./output/track_host_A.mp3", format="mp3")
-track_host_b.export("./output/track_host_B.mp3", format="mp3")
-
-# JSON para el script de video
-with open('./output/editing_guide.json', 'w') as f:
-    json.dump(guia_video, f, indent=4)
-
-# Limpiar archivo temporal
-if os.path.exists(TEMP_WAV):
-    os.remove(TEMP_WAV)
-
-print("\n✅ ¡PROCESO FINALIZADO CON ÉXITO!")
-print("📂 Archivos generados:")
-print("   1. track_host_A.mp3  (Subir a HeyGen -> Generar video_host_A.mp4)")
-print("   2. track_host_B.mp3  (Subir a HeyGen -> Generar video_host_B.mp4)")
-print("   3. editing_guide.json (Usar con script 'montar_video.py')")
\ No newline at end of file
+    return diarization_qa.suspicious_sequences(diarization_qa.guide_arrays(segments), threshold)
+
+def report_suspicious_sequences(guide):
+    """
+    Validación de las asignaciones de speakers (solo informa, no modifica la guía)
+    """
+    print("--> Validando asignaciones de speakers...")
+    suspicious_sequences = detect_suspicious_sequences(guide, threshold=15)
+
+    if suspicious_sequences:
+        print(f"   ⚠️  ADVERTENCIA: Se detectaron {len(suspicious_sequences)} secuencias sospechosas:")
+        for seq in suspicious_sequences:
+            duration = seq['end_time'] - seq['start_time']
+            print(f"      {seq['host']}: {seq['count']} segmentos consecutivos ({seq['start_time']:.1f}s - {seq['end_time']:.1f}s, duración: {duration:.1f}s)")
+
+        print(f"\n   💡 SUGERENCIA: Esto puede indicar que el modelo confundió a los speakers.")
+        print(f"      Considera revisar el audio original en esos rangos de tiempo.")
+        print(f"      Si el problema persiste, puedes:")
+        print(f"      1. Ejecutar de nuevo el script (a veces da mejores resultados)")
+        print(f"      2. Usar un audio de mejor calidad")
+        print(f"      3. Corregir con fix_speaker_assignment.py (o editar editing_guide.json a mano,")
+        print(f"         después de 'fix_speaker_assignment.py --compact')\n")
+    else:
+        print(f"   ✓ No se detectaron secuencias sospechosas")
+
+def save_outputs(samples, frame_rate, turns):
+    """
+    Genera y guarda las pistas de HeyGen y la guía de edición a partir de los turnos
+
+    Args:
+        samples: np.ndarray int16 (frames, canales) del audio original
+        frame_rate: Frecuencia de muestreo
+        turns: Turnos de run_diarization()
+
+    Returns:
+        list: Guía de edición guardada
+    """
+    print("--> Paso 4/5: Generando pistas sincronizadas y guía de video...")
+    profiling.phase('tracks')
+    speaker_mapping = map_speakers(turns)
+    guide = build_editing_guide(turns, speaker_mapping)
+    with profiling.span('build_host_tracks', turns=len(guide), frames=len(samples)):
+        tracks = build_host_tracks(samples, frame_rate, guide)
+    print(f"   Procesando... {len(guide)}/{len(guide)} - ¡Listo!")
+
+    # 5.5. Validación y corrección de asignaciones
+    report_suspicious_sequences(guide)
+
+    # 6. Guardar Archivos
+    print("--> Paso 5/5: Guardando archivos finales...")
+    profiling.phase('export')
+    os.makedirs(os.path.dirname(EDITING_GUIDE_PATH), exist_ok=True)
+
+    # Audios para HeyGen
+    with profiling.span('export_track', host='HOST_A'):
+        export_track(tracks["HOST_A"], frame_rate, TRACK_HOST_A)
+    with profiling.span('export_track', host='HOST_B'):
+        export_track(tracks["HOST_B"], frame_rate, TRACK_HOST_B)
+
+    # JSON para el script de video (una guía nueva descarta el diario de correcciones de la anterior)
+    editing_guide.write_guide(EDITING_GUIDE_PATH, guide)
+
+    run_log.count(turns=len(turns), guide_segments=len(guide))
+    for path in (TRACK_HOST_A, TRACK_HOST_B, EDITING_GUIDE_PATH):
+        run_log.add_output(path)
+    return guide
+
+def print_final_summary():
+    print("\n✅ ¡PROCESO FINALIZADO CON ÉXITO!")
+    print("📂 Archivos generados:")
+    print("   1. track_host_A.mp3  (Subir a HeyGen -> Generar video_host_A.mp4)")
+    print("   2. track_host_B.mp3  (Subir a HeyGen -> Generar video_host_B.mp4)")
+    print("   3. editing_guide.json (Usar con script 'montar_video.py')")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Diarización del .m4a de /input: pistas por host para HeyGen y editing_guide.json'
+    )
+    profiling.add_arguments(parser)
+    profiling.start('split_audios', parser.parse_args())
+    run_log.start('split_audios')
+
+    # Validación de seguridad
+    if not HF_TOKEN:
+        print("❌ ERROR: No se encontró la variable HF_TOKEN.")
+        print("Asegúrate de tener un archivo '.env' con la línea: HF_TOKEN=hf_tu_token_aqui")
+        return 1
+
+    input_file = find_input_file()
+    if not input_file:
+        return 1
+    run_log.set_episode(os.path.splitext(os.path.basename(input_file))[0])
+    run_log.add_input(input_file)
+
+    # 2. Preprocesamiento (M4A -> WAV)
+    print(f"--> Paso 1/5: Convirtiendo audio a WAV para la IA...")
+    profiling.phase('decode')
+    try:
+        # Usamos pydub para leer el m4a y guardarlo como wav
+        from pydub import AudioSegment
+        original_audio = AudioSegment.from_file(input_file, format="m4a")
+        original_audio.export(TEMP_WAV, format="wav")
+    except Exception as e:
+        print(f"❌ Error al leer el audio. Verifica que tengas FFmpeg instalado.")
+        print(f"Detalle del error: {e}")
+        return 1
+
+    # 3. Cargar el modelo de IA (o usar el que ya tiene cargado model_server.py)
+    turns = None
+    if model_server.request('ping'):
+        print("--> Paso 2/5: Usando el modelo de Diarización ya cargado en model_server.py")
+        print(f"--> Paso 3/5: Analizando conversación e identificando voces...")
+        profiling.phase('diarization (model_server)')
+        print(f"   Configuración: Forzando detección de exactamente 2 speakers")
+        try:
+            turns = model_server.diarize(TEMP_WAV)
+        except model_server.ModelServerError as e:
+            print(f"❌ ERROR en el servidor de modelos: {e}")
+            return 1
+        if turns is None:
+            print("   ⚠️  El servidor dejó de responder, se cargará el modelo en este proceso")
+
+    if turns is None:
+        print("--> Paso 2/5: Cargando modelo de Diarización (esto puede tardar)...")
+        profiling.phase('load_model')
+        try:
+            pipeline = load_diarization_pipeline()
+        except Exception as e:
+            print(f"❌ ERROR TÉCNICO AL CARGAR EL MODELO:")
+            print(f"------------------------------------------------")
+            print(f"{e}")  # <--- ESTO ES LO QUE NECESITAMOS VER
+            print(f"------------------------------------------------")
+            print(f"Si el error menciona 'libsndfile' o 'torchaudio', es un problema de instalación, no de token.")
+            return 1
+
+        # 4. Analizar quién habla
+        print(f"--> Paso 3/5: Analizando conversación e identificando voces...")
+        print(f"   Configuración: Forzando detección de exactamente 2 speakers")
+        print(f"   Runtime: {inference_runtime.describe()}")
+        profiling.phase('diarization')
+        try:
+            turns = run_diarization(pipeline, TEMP_WAV)
+        except MemoryError as e:
+            print(f"❌ ERROR: {e}")
+            return 1
+    # Los turnos pueden llegar como listas desde el servidor
+    turns = [tuple(turn) for turn in turns]
+
+    # 5. Procesamiento de Pistas y JSON
+    profiling.phase('to_int16')
+    save_outputs(audio_to_int16(original_audio), original_audio.frame_rate, turns)
+    profiling.phase(None)
+
+    # Limpiar archivo temporal
+    if os.path.exists(TEMP_WAV):
+        os.remove(TEMP_WAV)
+
+    print_final_summary()
+    return 0
+
+if __name__ == "__main__":
+    exit(run_log.finish(main()))
@@ -0,0 +1,181 @@
+# Módulo: subtitle_render.py
+# Requisitos: pip install numpy (el filtro ass de ffmpeg viene en imageio-ffmpeg)
+# Descripción: Genera subtítulos ASS con estilo por host (color según quién habla en
+#              editing_guide.json) a partir del .srt de generate_subtitles.py. El .ass se
+#              cachea por episodio y se quema con el filtro ass de ffmpeg dentro del mismo
+#              encode del video o del clip (sin una segunda pasada)
+
+import os
+import hashlib
+import numpy as np
+
+import transcript
+import editing_guide
+
+# --- CONFIGURACIÓN ---
+SUBTITLE_CACHE_DIR = "./output/.cache/subtitles"
+STYLE_VERSION = 2  # Cambiar si cambian los estilos o el quemado (invalida la caché y los clips subtitulados)
+
+# Colores ASS en formato &HAABBGGRR
+HOST_COLORS = {
+    'HOST_A': "&H0000E5FF",  # Amarillo
+    'HOST_B': "&H00FFC84D"   # Celeste
+}
+DEFAULT_COLOR = "&H00FFFFFF"
+FONT_NAME = "Arial"
+
+def assign_hosts(cues, editing_guide_path):
+    """
+    Host de cada cue: el que tiene el turno en el punto medio del cue
+    (en silencios, el último que habló, igual que la cámara)
+
+    Args:
+        cues: transcript.Transcript del episodio
+        editing_guide_path: editing_guide.json
+
+    Returns:
+        list: Host por cue (None si no hay guía)
+    """
+    if not editing_guide_path or not os.path.exists(editing_guide_path) or not len(cues):
+        return [None] * len(cues)
+
+    guide = editing_guide.load_segments(editing_guide_path)
+    if not guide:
+        return [None] * len(cues)
+
+    starts = np.array([block['start'] for block in guide], dtype=np.float64)
+    midpoints = (cues.start_ms + cues.end_ms) / 2000
+    idx = np.maximum(np.searchsorted(starts, midpoints, side='right') - 1, 0)
+    return [guide[i]['host'] for i in idx]
+
+def _ass_time(seconds):
+    centis = int(round(seconds * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+def _ass_text(text):
+    return text.replace('{', '(').replace('}', ')').replace('\r', '').replace('\n', '\\N')
+
+def build_ass(cues, hosts, width, height, start=0.0, end=None):
+    """
+    Arma el contenido del .ass (un estilo por host, tamaños relativos a la resolución)
+
+    Args:
+        cues: transcript.Transcript del episodio
+        hosts: Host de cada cue
+        width: Ancho del video donde se quemará
+        height: Alto del video donde se quemará
+        start: Segundo del episodio donde empieza el video (los tiempos se desplazan a 0)
+        end: Segundo del episodio donde termina el video (None = hasta el final)
+
+    Returns:
+        str: Contenido del archivo .ass
+    """
+    vertical = height > width
+    font_size = int(height * (0.038 if vertical else 0.05))
+    margin_v = int(height * (0.22 if vertical else 0.06))  # En vertical, por encima de la UI de la app
+    margin_h = int(width * 0.06)
+    outline = max(2, font_size // 14)
+
+    styles = {'Default': DEFAULT_COLOR}
+    styles.update(HOST_COLORS)
+
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding"
+    ]
+    for name, color in styles.items():
+        lines.append(f"Style: {name},{FONT_NAME},{font_size},{color},{color},&H00000000,&H80000000,"
+                     f"-1,0,0,0,100,100,0,0,1,{outline},0,2,{margin_h},{margin_h},{margin_v},1")
+
+    lines += ["", "[Events]", "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"]
+    for (cue_start, cue_end, text), host in zip(cues.cues(), hosts):
+        if cue_end <= start or (end is not None and cue_start >= end):
+            continue
+        style = host if host in HOST_COLORS else 'Default'
+        lines.append(f"Dialogue: 0,{_ass_time(max(cue_start - start, 0.0))},{_ass_time(cue_end - start)},"
+                     f"{style},,0,0,0,,{_ass_text(text)}")
+
+    return '\n'.join(lines) + '\n'
+
+def episode_ass(srt_path, editing_guide_path, width, height):
+    """
+    Devuelve la ruta del .ass del episodio para una resolución, generándolo solo si
+    cambió la transcripción, la guía de edición o los estilos
+
+    Returns:
+        str: Ruta del .ass cacheado
+    """
+    return clip_ass(srt_path, editing_guide_path, width, height)
+
+def clip_ass(srt_path, editing_guide_path, width, height, start=0.0, end=None):
+    """
+    Como episode_ass(), pero con los tiempos llevados al inicio de un clip: el .ass se
+    quema sin tocar los timestamps de los frames (un setpts antes y después del filtro
+    ass hace que ffmpeg pierda la tasa de cuadros del stream y caiga a 25 fps)
+
+    Args:
+        start: Segundo del episodio donde empieza el clip
+        end: Segundo del episodio donde termina el clip (None = hasta el final)
+
+    Returns:
+        str: Ruta del .ass cacheado
+    """
+    digest = hashlib.sha256(f"{STYLE_VERSION}:{width}x{height}:{sorted(HOST_COLORS.items())}".encode())
+    journal = editing_guide.journal_path(editing_guide_path) if editing_guide_path else None
+    for path in (srt_path, editing_guide_path, journal):
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+
+    episode = os.path.splitext(os.path.basename(srt_path))[0]
+    clip = ""
+    if start or end is not None:
+        clip = f"_{start:.3f}-{end:.3f}" if end is not None else f"_{start:.3f}-"
+    ass_path = os.path.join(SUBTITLE_CACHE_DIR, f"{episode}_{width}x{height}{clip}_{digest.hexdigest()[:12]}.ass")
+    if os.path.exists(ass_path):
+        return ass_path
+
+    cues = transcript.load_transcript(srt_path)
+    content = build_ass(cues, assign_hosts(cues, editing_guide_path), width, height, start, end)
+
+    os.makedirs(SUBTITLE_CACHE_DIR, exist_ok=True)
+    tmp_path = ass_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, ass_path)
+    return ass_path
+
+def escape_filter_path(path):
+    """
+    Escapa una ruta para usarla dentro de un filtergraph de ffmpeg, sin comillas.
+    ffmpeg la desescapa dos veces: primero al separar los filtros del grafo y luego
+    al leer el valor de la opción, así que se escapa para la opción y después para el grafo.
+    """
+    path = path.replace('\\', '/')
+    for ch in "':":
+        path = path.replace(ch, '\\' + ch)
+    escaped = ''
+    for ch in path:
+        escaped += '\\' + ch if ch in "\\'[],;" else ch
+    return escaped
+
+def ass_filter(ass_path):
+    """
+    Filtro de ffmpeg que quema un .ass (de episode_ass() o clip_ass(), ya en tiempo del video filtrado)
+
+    Returns:
+        str: Cadena para -vf
+    """
+    return f"ass=filename={escape_filter_path(ass_path)}"
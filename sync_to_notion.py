@@ -7,12 +7,15 @@
 import os
 import sys
 import csv
+import argparse
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from notion_client import Client
 from dotenv import load_dotenv
 
+import run_log
+import profiling
+
 # Cargar variables de entorno desde .env
 load_dotenv()
 
@@ -254,6 +257,7 @@ def sync_calendar_to_notion(csv_path, start_date=None):
 
     # Inicializar cliente de Notion
     try:
+        from notion_client import Client
         notion = Client(auth=NOTION_TOKEN)
         print(f"✓ Conectado a Notion")
     except Exception as e:
@@ -308,12 +312,20 @@ def sync_calendar_to_notion(csv_path, start_date=None):
     return success_count, skip_count, fail_count
 
 def main():
+    parser = argparse.ArgumentParser(description='Sincroniza el calendario de publicación a Notion')
+    parser.add_argument('fecha_inicio', nargs='?', default=None,
+                        help='Lunes de la semana de publicación (DD-MM-AAAA)')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start('sync_to_notion', args)
+    run_log.start('sync_to_notion')
+
     print("=" * 80)
     print("  SINCRONIZACIÓN DE CALENDARIO A NOTION")
     print("=" * 80)
 
-    # Parsear argumentos de línea de comandos
-    if len(sys.argv) < 2:
+    # Validar la fecha de inicio
+    if not args.fecha_inicio:
         print("\n❌ ERROR: Debes especificar una fecha de inicio (lunes)")
         print("\nUso:")
         print("   python sync_to_notion.py DD-MM-AAAA")
@@ -321,33 +333,39 @@ def main():
         print("   python sync_to_notion.py 16-12-2024  # Para la semana del 16 de diciembre")
         print("   python sync_to_notion.py 06-01-2025  # Para la semana del 6 de enero")
         print("\nNota: La fecha debe ser un lunes (inicio de semana)")
-        return
+        return 1
 
-    date_str = sys.argv[1]
+    date_str = args.fecha_inicio
     start_date = parse_start_date(date_str)
     if not start_date:
         print(f"❌ ERROR: Formato de fecha inválido: {date_str}")
         print("   Usa el formato DD-MM-AAAA (ejemplo: 16-12-2024)")
-        return
+        return 1
 
     print(f"\n📅 Fecha de inicio configurada: {start_date.strftime('%d-%m-%Y (%A)')}")
 
     # 1. Buscar archivo de calendario
     print("\n--> Paso 1/2: Buscando archivo de calendario...")
+    profiling.phase('find_calendar')
 
     calendar_path = find_latest_calendar_csv()
 
     if not calendar_path:
         print(f"❌ ERROR: No se encontró ningún archivo *_calendar.csv en {METADATA_DIR}")
         print("Por favor, ejecuta primero: python analyze_chapters.py")
-        return
+        return 1
 
     print(f"✓ Calendario encontrado: {os.path.basename(calendar_path)}")
+    run_log.set_episode(os.path.basename(calendar_path).replace('_calendar.csv', ''))
+    run_log.add_input(calendar_path)
 
     # 2. Sincronizar a Notion
     print("\n--> Paso 2/2: Sincronizando a Notion...")
+    profiling.phase('sync')
 
     success_count, skip_count, fail_count = sync_calendar_to_notion(calendar_path, start_date)
+    profiling.phase(None)
+    run_log.count(notion_created=success_count, notion_skipped=skip_count, notion_failed=fail_count)
 
     # 3. Resumen final
     print("\n" + "=" * 80)
@@ -369,6 +387,7 @@ def main():
     print(f"   4. Reorganiza manualmente si hay conflictos de fechas")
     print(f"   5. Usa el checkbox 'Publicado' para marcar contenido publicado")
     print("=" * 80)
+    return 1 if fail_count else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(run_log.finish(main()))
@@ -0,0 +1,195 @@
+# Módulo: transcript.py
+# Requisitos: pip install numpy
+# Descripción: Carga de transcripciones .srt / .vtt compartida por todos los scripts.
+#              Parser en streaming (línea a línea) tolerante a BOM, CRLF, varias líneas en
+#              blanco seguidas, cabecera WEBVTT y bloques NOTE/STYLE. Devuelve arreglos
+#              columnares (start_ms, end_ms y offsets de texto en un solo buffer) y los
+#              cachea en binario para que las recargas sean instantáneas
+
+import os
+import re
+import hashlib
+from array import array
+import numpy as np
+
+# --- CONFIGURACIÓN ---
+TRANSCRIPT_CACHE_DIR = "./output/.cache/transcripts"
+CACHE_VERSION = 1  # Cambiar si cambia el parser (invalida la caché)
+
+# SRT usa coma y siempre lleva horas; VTT usa punto y las horas son opcionales
+CUE_TIME_RE = re.compile(
+    r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})'
+)
+
+
+class Transcript:
+    """
+    Transcripción en formato columnar
+
+    Attributes:
+        start_ms: np.ndarray int64 con el inicio de cada cue (milisegundos)
+        end_ms: np.ndarray int64 con el final de cada cue (milisegundos)
+        text_offsets: np.ndarray int64 de len(cues) + 1; el texto del cue i es
+                      text_buffer[text_offsets[i]:text_offsets[i + 1]] (UTF-8, líneas unidas con \\n)
+        text_buffer: bytes con el texto de todos los cues concatenado
+    """
+
+    def __init__(self, start_ms, end_ms, text_offsets, text_buffer):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.text_offsets = text_offsets
+        self.text_buffer = text_buffer
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    def text(self, index):
+        """
+        Texto del cue `index` (las líneas del cue separadas por \\n)
+        """
+        return self.text_buffer[self.text_offsets[index]:self.text_offsets[index + 1]].decode('utf-8')
+
+    def cues(self):
+        """
+        Itera los cues como (inicio, fin, texto) en segundos
+        """
+        for i in range(len(self)):
+            yield self.start_ms[i] / 1000, self.end_ms[i] / 1000, self.text(i)
+
+    def entries(self):
+        """
+        Formato de las versiones anteriores de parse_srt()
+
+        Returns:
+            list: [{'timestamp': 'HH:MM:SS,mmm', 'end_timestamp': 'HH:MM:SS,mmm', 'text': ...}]
+        """
+        return [{
+            'timestamp': format_srt_time(self.start_ms[i]),
+            'end_timestamp': format_srt_time(self.end_ms[i]),
+            'text': self.text(i).replace('\n', ' ')
+        } for i in range(len(self))]
+
+
+def format_srt_time(ms):
+    """
+    Convierte milisegundos a timestamp SRT (HH:MM:SS,mmm)
+    """
+    hours, ms = divmod(int(ms), 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+def _to_ms(hours, minutes, seconds, fraction):
+    # "5" en la fracción son 500 ms (algunos exportadores recortan ceros a la derecha)
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
+
+def parse_transcript(lines):
+    """
+    Parsea un .srt o .vtt línea a línea (memoria constante por cue)
+
+    Un cue empieza en la línea de tiempos y termina en la primera línea en blanco;
+    todo lo que no cae dentro de un cue (índices, identificadores VTT, cabecera,
+    bloques NOTE/STYLE) se ignora. Si falta la línea en blanco entre dos cues, el
+    índice numérico que quedó pegado al texto anterior se descarta.
+
+    Args:
+        lines: Iterable de líneas (ej: un archivo abierto)
+
+    Returns:
+        Transcript: Cues en orden de aparición
+    """
+    start_ms = array('q')
+    end_ms = array('q')
+    offsets = array('q', [0])
+    buffer = bytearray()
+
+    current = None  # Líneas de texto del cue abierto
+
+    def close_cue():
+        text = '\n'.join(current).strip()
+        if text:
+            buffer.extend(text.encode('utf-8'))
+            offsets.append(len(buffer))
+        else:
+            start_ms.pop()
+            end_ms.pop()
+
+    for line in lines:
+        line = line.strip().strip('\ufeff')
+
+        match = CUE_TIME_RE.search(line) if '-->' in line else None
+        if match:
+            if current is not None:
+                if current and current[-1].isdigit():
+                    current.pop()
+                close_cue()
+            g = match.groups()
+            start_ms.append(_to_ms(*g[:4]))
+            end_ms.append(_to_ms(*g[4:]))
+            current = []
+        elif current is not None:
+            if line:
+                current.append(line)
+            else:
+                close_cue()
+                current = None
+
+    if current is not None:
+        close_cue()
+
+    return Transcript(
+        np.frombuffer(start_ms, dtype=np.int64).copy(),
+        np.frombuffer(end_ms, dtype=np.int64).copy(),
+        np.frombuffer(offsets, dtype=np.int64).copy(),
+        bytes(buffer)
+    )
+
+def _cache_path(path):
+    stat = os.stat(path)
+    key = f"{CACHE_VERSION}:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(TRANSCRIPT_CACHE_DIR, f"{digest}.npz")
+
+def load_transcript(path, use_cache=True):
+    """
+    Carga una transcripción .srt / .vtt, usando la caché binaria si el archivo no cambió
+    (clave: ruta + tamaño + fecha de modificación)
+
+    Args:
+        path: Ruta del .srt o .vtt
+        use_cache: Leer/escribir la caché en TRANSCRIPT_CACHE_DIR
+
+    Returns:
+        Transcript: Cues de la transcripción
+    """
+    cache_path = _cache_path(path) if use_cache else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as data:
+                return Transcript(data['start_ms'], data['end_ms'], data['text_offsets'],
+                                  data['text_buffer'].tobytes())
+        except (OSError, KeyError, ValueError):
+            pass
+
+    with open(path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        transcript = parse_transcript(f)
+
+    if cache_path:
+        os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, start_ms=transcript.start_ms, end_ms=transcript.end_ms,
+                     text_offsets=transcript.text_offsets,
+                     text_buffer=np.frombuffer(transcript.text_buffer, dtype=np.uint8))
+        os.replace(tmp_path, cache_path)
+
+    return transcript
+
+def parse_srt(srt_path):
+    """
+    Lee un archivo .srt (o .vtt) y extrae la transcripción con timestamps
+
+    Returns:
+        list: [{'timestamp', 'end_timestamp', 'text'}] (ver Transcript.entries)
+    """
+    return load_transcript(srt_path).entries()
@@ -0,0 +1,167 @@
+# Módulo: vertical_render.py
+# Requisitos: pip install moviepy numpy python-dotenv (moviepy instala imageio-ffmpeg, que trae ffmpeg con libass)
+# Descripción: Render vertical 9:16 de clips virales en una sola pasada de ffmpeg. El recorte
+#              sigue al host que está en cámara según editing_guide.json y, opcionalmente,
+#              se queman los subtítulos con color por host (subtitle_render). Sale un short
+#              listo para publicar
+
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+import smart_render
+import editing_guide
+import subtitle_render
+
+# Cargar variables de entorno
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+VERTICAL_WIDTH = 1080
+VERTICAL_HEIGHT = 1920
+VIDEO_CRF = 20
+VIDEO_PRESET = "medium"
+AUDIO_BITRATE = "192k"
+
+# Centro horizontal del recorte para cada host (fracción del ancho: 0 = izquierda, 0.5 = centro, 1 = derecha).
+# Ajustar si el avatar de HeyGen no está centrado en su video
+HOST_CROP_CENTER = {
+    'HOST_A': float(os.getenv("VERTICAL_CROP_HOST_A", "0.5")),
+    'HOST_B': float(os.getenv("VERTICAL_CROP_HOST_B", "0.5"))
+}
+DEFAULT_HOST = "HOST_A"  # assemble_video.py empieza mostrando a HOST_A
+
+def load_camera_track(editing_guide_path):
+    """
+    Reconstruye qué host está en cámara en cada momento del video final
+
+    assemble_video.py muestra a cada host desde el inicio de su bloque y, en los
+    silencios, mantiene al último que habló: el host visible cambia justo al inicio
+    de cada bloque.
+
+    Returns:
+        tuple: (np.ndarray de inicios en segundos, lista de hosts) sin repeticiones consecutivas
+    """
+    if not editing_guide_path or not os.path.exists(editing_guide_path):
+        return np.zeros(0), []
+
+    guide = editing_guide.load_segments(editing_guide_path)
+
+    starts = []
+    hosts = []
+    for block in guide:
+        if hosts and hosts[-1] == block['host']:
+            continue
+        starts.append(float(block['start']))
+        hosts.append(block['host'])
+
+    return np.array(starts, dtype=np.float64), hosts
+
+def crop_segments(starts, hosts, clip_start, clip_end):
+    """
+    Tramos de cámara dentro del clip, en tiempo relativo al clip
+
+    Returns:
+        list: [(inicio_relativo, host), ...] empezando siempre en 0
+    """
+    if len(starts) == 0:
+        return [(0.0, DEFAULT_HOST)]
+
+    first = np.searchsorted(starts, clip_start, side='right') - 1
+    segments = [(0.0, hosts[first] if first >= 0 else DEFAULT_HOST)]
+
+    last = np.searchsorted(starts, clip_end, side='left')
+    for idx in range(max(first + 1, 0), last):
+        segments.append((float(starts[idx] - clip_start), hosts[idx]))
+
+    return segments
+
+def crop_x_expression(segments, frame_width, crop_width):
+    """
+    Expresión de ffmpeg para la X del recorte en función del tiempo (t)
+
+    Returns:
+        str: Número fijo o if(lt(t,T1),X0,if(lt(t,T2),X1,...)) anidado
+    """
+    def host_x(host):
+        center = HOST_CROP_CENTER.get(host, 0.5) * frame_width
+        return int(min(max(center - crop_width / 2, 0), frame_width - crop_width))
+
+    xs = [host_x(host) for _, host in segments]
+    expression = str(xs[-1])
+    for (switch_time, _), x in zip(reversed(segments[1:]), reversed(xs[:-1])):
+        expression = f"if(lt(t,{switch_time:.3f}),{x},{expression})"
+    return expression
+
+def build_vertical_filter(frame_width, frame_height, start, end, editing_guide_path=None,
+                          srt_path=None):
+    """
+    Arma la cadena de filtros (-vf) del short vertical para un clip
+
+    El tiempo t de la expresión de recorte es relativo al inicio del clip (el primer
+    frame que recibe el filtro es t=0); los subtítulos se queman con el .ass del
+    episodio (subtitle_render) llevando los timestamps al tiempo del episodio.
+
+    Args:
+        frame_width: Ancho del video fuente
+        frame_height: Alto del video fuente
+        start: Inicio del clip (segundos)
+        end: Final del clip (segundos)
+        editing_guide_path: editing_guide.json para seguir al host en cámara (opcional)
+        srt_path: Transcripción .srt para quemar subtítulos con color por host (opcional)
+
+    Returns:
+        tuple: (filtro -vf, {'camera_switches', 'subtitles'})
+    """
+    crop_height = frame_height
+    crop_width = min(frame_width, int(frame_height * VERTICAL_WIDTH / VERTICAL_HEIGHT) // 2 * 2)
+
+    starts, hosts = load_camera_track(editing_guide_path)
+    segments = crop_segments(starts, hosts, start, end)
+    x_expression = crop_x_expression(segments, frame_width, crop_width)
+
+    filters = [
+        f"crop=w={crop_width}:h={crop_height}:x='{x_expression}':y=0",
+        f"scale={VERTICAL_WIDTH}:{VERTICAL_HEIGHT}:flags=lanczos",
+        "setsar=1"
+    ]
+
+    subtitles = bool(srt_path and os.path.exists(srt_path))
+    if subtitles:
+        ass_path = subtitle_render.clip_ass(srt_path, editing_guide_path, VERTICAL_WIDTH, VERTICAL_HEIGHT, start, end)
+        filters.append(subtitle_render.ass_filter(ass_path))
+
+    return ','.join(filters), {'camera_switches': len(segments) - 1, 'subtitles': subtitles}
+
+def render_vertical_clip(video_path, start, end, output_path, editing_guide_path=None,
+                         srt_path=None, threads=4):
+    """
+    Genera un clip vertical 1080x1920 con un solo encode
+
+    Args:
+        video_path: Video fuente (horizontal)
+        start: Inicio del clip (segundos)
+        end: Final del clip (segundos)
+        output_path: Ruta del .mp4 de salida
+        editing_guide_path: editing_guide.json para seguir al host en cámara (opcional)
+        srt_path: Transcripción .srt para quemar subtítulos con color por host (opcional)
+        threads: Hilos de libx264
+
+    Returns:
+        dict: {'camera_switches', 'subtitles'} con lo aplicado
+    """
+    stream = smart_render.probe_video_stream(video_path)
+
+    video_filter, info = build_vertical_filter(stream['width'], stream['height'], start, end,
+                                               editing_guide_path, srt_path)
+
+    smart_render.run_command([
+        smart_render.ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        '-ss', f"{start:.3f}", '-t', f"{end - start:.3f}", '-i', video_path,
+        '-map', '0:v:0', '-map', '0:a:0?', '-vf', video_filter,
+        '-c:v', 'libx264', '-preset', VIDEO_PRESET, '-crf', str(VIDEO_CRF), '-pix_fmt', 'yuv420p',
+        '-threads', str(threads), '-c:a', 'aac', '-b:a', AUDIO_BITRATE,
+        '-movflags', '+faststart', output_path
+    ])
+
+    return info